@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+from random import uniform
+
+
+def exponential_backoff(
+    attempt: int,
+    base: float,
+    maximum: float,
+    jitter=True,
+) -> float:
+    """
+    Delay before the next retry.
+
+    The delay doubles with each attempt up to ``maximum``.
+    With ``jitter``, it is randomly chosen from the upper half of the delay,
+    so that many clients do not retry at the same moment.
+    """
+
+    assert attempt >= 0
+    assert base >= 0
+    assert maximum >= 0
+
+    delay = min(maximum, base * (2 ** min(attempt, 32)))
+    if jitter:
+        half = delay / 2
+        return half + uniform(0, half)
+    else:
+        return delay
@@ -6,10 +6,17 @@ from functools import lru_cache
 from typing import Callable, Dict
 
 from osom_api.apps.discord import discord_main
+from osom_api.apps.dlq import dlq_main
 from osom_api.apps.master import master_main
 from osom_api.apps.telegram import telegram_main
 from osom_api.apps.worker import worker_main
-from osom_api.arguments import CMD_DISCORD, CMD_MASTER, CMD_TELEGRAM, CMD_WORKER
+from osom_api.arguments import (
+    CMD_DISCORD,
+    CMD_DLQ,
+    CMD_MASTER,
+    CMD_TELEGRAM,
+    CMD_WORKER,
+)
 from osom_api.logging.logging import logger
 
 
@@ -20,6 +27,7 @@ def cmd_apps() -> Dict[str, Callable[[Namespace], None]]:
         CMD_TELEGRAM: telegram_main,
         CMD_MASTER: master_main,
         CMD_WORKER: worker_main,
+        CMD_DLQ: dlq_main,
     }
 
 
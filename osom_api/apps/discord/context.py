@@ -2,7 +2,7 @@
 
 from argparse import Namespace
 
-from discord import Intents
+from discord import Intents, RawMessageDeleteEvent
 from discord.ext.commands import Bot, check
 from discord.ext.commands.context import Context as CommandContext
 from discord.message import Message
@@ -45,6 +45,10 @@ class DiscordContext(EndpointContext):
         async def on_message(message) -> None:
             await self.on_message(message)
 
+        @bot.event
+        async def on_raw_message_delete(payload: RawMessageDeleteEvent) -> None:
+            await self.cancel_message(payload.channel_id, payload.message_id)
+
     async def is_registration(self, ctx: CommandContext) -> bool:
         if await self.db.registered_discord_channel_id(ctx.channel.id):
             return True
@@ -84,7 +88,7 @@ class DiscordContext(EndpointContext):
         )
 
         response = await self.do_message(msg)
-        if response is None:
+        if response is None or response.cancelled:
             return
 
         await message.channel.send(response.reply_content)
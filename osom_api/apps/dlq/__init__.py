@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+
+from argparse import Namespace
+
+from osom_api.apps.dlq.context import DlqContext
+
+
+def dlq_main(args: Namespace) -> None:
+    DlqContext(args).run()
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+
+from argparse import Namespace
+
+from osom_api.args import DlqArgs, RedisArgs
+
+
+class DlqConfig(RedisArgs, DlqArgs):
+    def __init__(self, args: Namespace):
+        super().__init__(**self.namespace_to_dict(args))
+        self.assert_common_properties()
+        self.assert_redis_properties()
+        self.assert_dlq_properties()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+from argparse import Namespace
+
+from osom_api.aio.run import aio_run
+from osom_api.apps.dlq.config import DlqConfig
+from osom_api.arguments import DLQ_ACTION_LIST, DLQ_ACTION_PURGE, DLQ_ACTION_REDRIVE
+from osom_api.context.mq import MqClient
+from osom_api.context.mq.dead_letter import MqDeadLetterQueue
+from osom_api.context.mq.queue import create_mq_queue
+from osom_api.utils.path.mq import make_request_path
+
+
+class DlqContext:
+    def __init__(self, args: Namespace):
+        self._config = DlqConfig(args)
+        self._mq = MqClient.from_args(self._config)
+        self._queue = create_mq_queue(self._mq, self._config)
+        self._dead_letters = MqDeadLetterQueue(self._mq)
+        self._path = make_request_path(self._config.dlq_worker)
+
+    async def list(self) -> None:
+        count = await self._dead_letters.count(self._path)
+        self._config.print(f"Dead letters of '{self._path}': {count}")
+
+        letters = await self._dead_letters.peek(self._path, self._config.dlq_count)
+        for letter in letters:
+            self._config.print(
+                f"[{letter.failed_at.isoformat()}] Msg({letter.msg_uuid}) "
+                f"attempts={letter.attempts} key={letter.key} error={letter.error}"
+            )
+
+    async def redrive(self) -> None:
+        count = self._config.dlq_count
+        result = await self._dead_letters.redrive(self._queue, self._path, count)
+        self._config.print(f"Re-driven {result} dead letters to '{self._path}'")
+
+    async def purge(self) -> None:
+        result = await self._dead_letters.purge(self._path)
+        self._config.print(f"Purged {result} dead letters of '{self._path}'")
+
+    async def main(self) -> None:
+        await self._mq.open()
+        try:
+            action = self._config.dlq_action
+            if action == DLQ_ACTION_LIST:
+                await self.list()
+            elif action == DLQ_ACTION_REDRIVE:
+                await self.redrive()
+            elif action == DLQ_ACTION_PURGE:
+                await self.purge()
+            else:
+                raise ValueError(f"Unknown dead letter queue action: {action}")
+        finally:
+            await self._mq.close()
+
+    def run(self) -> None:
+        aio_run(self.main(), self._config.use_uvloop)
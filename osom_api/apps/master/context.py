@@ -15,6 +15,7 @@ from osom_api.apps.master.middlewares.authorization import add_authorization_mid
 from osom_api.arguments import version
 from osom_api.context.base import BaseContext
 from osom_api.logging.logging import logger
+from osom_api.metrics.registry import default_registry
 from osom_api.msg import MsgProvider
 
 
@@ -26,6 +27,7 @@ class MasterContext(BaseContext):
 
         self._router = APIRouter()
         self._router.add_api_route("/health", self.health, methods=["GET"])
+        self._router.add_api_route("/metrics", self.metrics, methods=["GET"])
         self._router.add_api_websocket_route("/ws", self.ws)
 
         self._app = FastAPI(
@@ -51,6 +53,10 @@ class MasterContext(BaseContext):
     async def health(self):
         return {"mq": await self.mq.ping(1.0)}
 
+    async def metrics(self):
+        assert self
+        return default_registry().as_dict()
+
     async def ws(self, websocket: WebSocket) -> None:
         assert self
         await websocket.accept()
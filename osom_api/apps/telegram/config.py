@@ -3,10 +3,10 @@
 from argparse import Namespace
 
 from osom_api.args import TelegramArgs
-from osom_api.context.base import BaseContextConfig
+from osom_api.context.endpoint import EndpointContextConfig
 
 
-class TelegramConfig(BaseContextConfig, TelegramArgs):
+class TelegramConfig(EndpointContextConfig, TelegramArgs):
     def __init__(self, args: Namespace):
         super().__init__(**self.namespace_to_dict(args))
         self.assert_common_properties()
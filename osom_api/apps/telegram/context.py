@@ -79,7 +79,7 @@ class TelegramContext(EndpointContext):
         )
 
         response = await self.do_message(msg)
-        if response is None:
+        if response is None or response.cancelled:
             return
 
         await message.reply(response.reply_content)
@@ -2,11 +2,12 @@
 
 from argparse import Namespace
 
-from osom_api.args import ModuleArgs
+from osom_api.args import ModuleArgs, WorkerArgs
 from osom_api.context.base import BaseContextConfig
 
 
-class WorkerConfig(BaseContextConfig, ModuleArgs):
+class WorkerConfig(BaseContextConfig, ModuleArgs, WorkerArgs):
     def __init__(self, args: Namespace):
         super().__init__(**self.namespace_to_dict(args))
         self.assert_module_properties()
+        self.assert_worker_properties()
@@ -1,16 +1,33 @@
 # -*- coding: utf-8 -*-
 
 from argparse import Namespace
-from io import BytesIO
+from asyncio import (
+    Semaphore,
+    Task,
+    create_task,
+    current_task,
+    gather,
+    shield,
+    sleep,
+    wait,
+)
+from asyncio.exceptions import CancelledError
 from math import floor
-from typing import Iterable
+from typing import Dict, List, Optional, Set
+from uuid import uuid4
 
 from overrides import override
+from redis.exceptions import RedisError
 
 from osom_api.aio.run import aio_run
 from osom_api.apps.worker.config import WorkerConfig
 from osom_api.arguments import VERBOSE_LEVEL_1
 from osom_api.context.base import BaseContext
+from osom_api.context.direct import DirectServer
+from osom_api.context.mq.dead_letter import MqDeadLetterQueue
+from osom_api.context.mq.lanes import LaneSelector, parse_priority_weights
+from osom_api.context.mq.queue import MqFlow, MqPacket
+from osom_api.context.mq.registry import MqWorkerRegistry
 from osom_api.exceptions import (
     CommandRuntimeError,
     InvalidMessageIdError,
@@ -18,29 +35,44 @@ from osom_api.exceptions import (
     OsomApiError,
     PacketDumpError,
     PacketLoadError,
+    PacketQuarantinedError,
     PollingTimeoutError,
+    RequestExpiredError,
 )
 from osom_api.logging.logging import logger
+from osom_api.metrics.registry import default_registry
 from osom_api.msg import (
-    MsgFile,
-    MsgFlow,
+    MsgDeadLetter,
+    MsgHeartbeat,
     MsgProvider,
     MsgRequest,
     MsgResponse,
-    MsgStorage,
     MsgWorker,
 )
+from osom_api.msg.enums.priority import MSG_PRIORITIES
 from osom_api.paths import (
     MQ_BROADCAST_PATH,
+    MQ_CANCEL_PATH,
+    MQ_HEARTBEAT_WORKER_PATH,
     MQ_REGISTER_WORKER_PATH,
     MQ_REGISTER_WORKER_REQUEST_PATH,
     MQ_UNREGISTER_WORKER_PATH,
 )
-from osom_api.utils.path.mq import encode_path
+from osom_api.utils.path.mq import (
+    PATH_ENCODING,
+    encode_path,
+    make_done_path,
+    make_lane_path,
+)
 from osom_api.worker.module import Module
 
 
 class WorkerContext(BaseContext):
+    _inflight: Set[Task[None]]
+    _dequeuer: Optional[Task[None]]
+    _heartbeat: Optional[Task[None]]
+    _running: Dict[str, Task[MsgResponse]]
+
     def __init__(self, args: Namespace):
         self._config = WorkerConfig(args)
         super().__init__(
@@ -48,6 +80,7 @@ class WorkerContext(BaseContext):
             config=self._config,
             subscribers={
                 MQ_BROADCAST_PATH: self.on_broadcast,
+                MQ_CANCEL_PATH: self.on_cancel,
                 MQ_REGISTER_WORKER_REQUEST_PATH: self.on_register_worker_request,
             },
         )
@@ -59,22 +92,130 @@ class WorkerContext(BaseContext):
         )
         self._module.init()
 
+        self._instance = str(uuid4())
         self._register = MsgWorker(
             name=self._module.name,
             version=self._module.version,
             doc=self._module.doc,
             path=self._module.path,
             cmds=self._module.cmds,
+            instance=self._instance,
+            direct_address=self._config.worker_direct_address,
+            heartbeat_interval=self._config.worker_heartbeat_interval,
         )
         self._register_packet = self._register.encode()
+        self._registry = MqWorkerRegistry(self._mq)
+
+        self._direct: Optional[DirectServer] = None
+        if self._config.worker_direct_address:
+            self._direct = DirectServer(
+                self._config.worker_direct_address,
+                self.on_direct_request,
+                ring_size=self._config.worker_direct_ring_size,
+                concurrency=self._config.worker_concurrency,
+            )
+
+        self._lanes = LaneSelector(
+            parse_priority_weights(self._config.worker_priority_weights)
+        )
+        self._lane_keys = {
+            encode_path(make_lane_path(self._module.path, priority))
+            for priority in MSG_PRIORITIES
+        }
+
+        self._inflight = set()
+        self._dequeuer = None
+        self._heartbeat = None
+        self._running = dict()
+        self._queue_lag = 0.0
+
+        metrics = default_registry()
+        self._expired = metrics.counter("worker.request.expired")
+        self._budget = metrics.summary("worker.request.budget")
+        self._cancelled = metrics.counter("worker.request.cancelled")
+        self._dead_lettered = metrics.counter("worker.request.dead_lettered")
+        self._retried = metrics.counter("worker.request.retried")
+        self._quarantined = metrics.counter("worker.request.quarantined")
+        self._duplicates = metrics.counter("worker.request.duplicates")
+
+        self._dead_letters = MqDeadLetterQueue(
+            self._mq,
+            self._config.worker_dead_letter_maxlen,
+        )
 
     async def publish_register_worker(self) -> None:
+        # [IMPORTANT]
+        # Without heartbeats nothing could expire the registry entry of a crashed
+        # instance, so such an instance is announced by the packet only.
+        if self._config.worker_heartbeat_interval <= 0:
+            logger.warning("Worker registry is skipped without heartbeats")
+        else:
+            await self.register_to_registry()
+
         await self._mq.publish(MQ_REGISTER_WORKER_PATH, self._register_packet)
         logger.info("Published register worker packet!")
 
+    async def register_to_registry(self) -> None:
+        try:
+            version = await self._registry.register(self._register)
+        except BaseException as e:
+            logger.error(f"Worker registry update failed: {e}")
+        else:
+            logger.info(f"Registered to the worker registry (v{version})")
+
     async def publish_unregister_worker(self) -> None:
-        await self._mq.publish(MQ_UNREGISTER_WORKER_PATH, self._module.name.encode())
-        logger.info("Published register worker packet!")
+        try:
+            await self._registry.unregister(self._module.name, self._instance)
+        except BaseException as e:
+            logger.error(f"Worker registry update failed: {e}")
+
+        await self._mq.publish(
+            MQ_UNREGISTER_WORKER_PATH, self.make_heartbeat().encode()
+        )
+        logger.info("Published unregister worker packet!")
+
+    @property
+    def instance(self):
+        return self._instance
+
+    def make_heartbeat(self) -> MsgHeartbeat:
+        return MsgHeartbeat(
+            name=self._module.name,
+            instance=self._instance,
+            inflight=self.inflight_count,
+            concurrency=max(self._config.worker_concurrency, 1),
+            lag=self._queue_lag,
+        )
+
+    async def publish_heartbeat(self) -> None:
+        await self._mq.publish(MQ_HEARTBEAT_WORKER_PATH, self.make_heartbeat().encode())
+
+    async def _heartbeat_main(self) -> None:
+        interval = self._config.worker_heartbeat_interval
+        logger.info(f"Start publishing heartbeats every {interval:.2f}s ...")
+
+        while True:
+            await sleep(interval)
+            try:
+                await self.publish_heartbeat()
+            except CancelledError:
+                raise
+            except BaseException as e:
+                logger.error(f"Heartbeat publish failed: {e}")
+
+    def start_heartbeat(self) -> None:
+        assert self._heartbeat is None
+        if self._config.worker_heartbeat_interval <= 0:
+            return
+        self._heartbeat = create_task(self._heartbeat_main(), name="WorkerHeartbeat")
+
+    async def stop_heartbeat(self) -> None:
+        if self._heartbeat is None:
+            return
+
+        self._heartbeat.cancel()
+        await gather(self._heartbeat, return_exceptions=True)
+        self._heartbeat = None
 
     @override
     async def on_mq_connect(self) -> None:
@@ -92,90 +233,14 @@ class WorkerContext(BaseContext):
     async def on_register_worker_request(self, _: bytes) -> None:
         await self.publish_register_worker()
 
-    async def upload_msg_file(
-        self,
-        file: MsgFile,
-        msg_uuid: str,
-        flow: MsgFlow,
-        storage=MsgStorage.r2,
-    ) -> None:
-        if file.content is None:
-            raise BufferError("Empty file content")
+    async def on_cancel(self, data: bytes) -> None:
+        msg_uuid = data.decode()
+        task = self._running.get(msg_uuid)
+        if task is None or task.done():
+            return
 
-        await self._s3.upload_data(
-            data=BytesIO(file.content),
-            key=file.path,
-            content_type=file.content_type,
-        )
-        logger.info(f"Successfully uploaded file to S3: '{file.path}'")
-
-        await self._db.insert_file(
-            file_uuid=file.file_uuid,
-            provider=file.provider,
-            storage=storage,
-            name=file.name,
-            content_type=file.content_type,
-            native_id=file.native_id,
-            created_at=file.created_at.isoformat(),
-        )
-        logger.info(
-            "Successfully inserted file info to DB: "
-            f"'{file.file_uuid}' -> '{file.path}'"
-        )
-
-        await self._db.insert_msg2file(
-            msg_uuid=msg_uuid,
-            file_uuid=file.file_uuid,
-            flow=flow,
-        )
-        logger.info(
-            "Successfully inserted msg2file info to DB: "
-            f"'{msg_uuid}' -> {file.file_uuid}"
-        )
-
-    async def upload_msg_files(
-        self,
-        files: Iterable[MsgFile],
-        msg_uuid: str,
-        flow: MsgFlow,
-        storage=MsgStorage.r2,
-    ) -> None:
-        for file in files:
-            await self.upload_msg_file(file, msg_uuid, flow, storage)
-
-    async def upload_msg_request(self, message: MsgRequest) -> None:
-        await self._db.insert_msg(
-            msg_uuid=message.msg_uuid,
-            provider=message.provider,
-            message_id=message.message_id,
-            channel_id=message.channel_id,
-            username=message.username,
-            nickname=message.nickname,
-            content=message.content,
-            created_at=message.created_at.isoformat(),
-        )
-        logger.info(f"Successfully inserted msg_request to DB: '{message.msg_uuid}'")
-
-        await self.upload_msg_files(
-            files=message.files,
-            msg_uuid=message.msg_uuid,
-            flow=MsgFlow.request,
-        )
-
-    async def upload_msg_response(self, message: MsgResponse) -> None:
-        await self._db.insert_reply(
-            msg=message.msg_uuid,
-            content=message.content,
-            error=message.error,
-            created_at=message.created_at.isoformat(),
-        )
-        logger.info(f"Successfully inserted msg_response to DB: '{message.msg_uuid}'")
-
-        await self.upload_msg_files(
-            files=message.files,
-            msg_uuid=message.msg_uuid,
-            flow=MsgFlow.response,
-        )
+        logger.warning(f"Msg({msg_uuid}) Cancel the running command")
+        task.cancel()
 
     async def open_module(self) -> None:
         logger.debug("Open modules ...")
@@ -187,25 +252,115 @@ class WorkerContext(BaseContext):
         await self._module.close()
         logger.info("Closed modules")
 
-    async def polling_iter(self) -> None:
+    @property
+    def inflight_count(self) -> int:
+        direct = self._direct.active_count if self._direct is not None else 0
+        return len(self._inflight) + direct
+
+    async def fetch_packet(self) -> MqPacket:
         timeout = floor(self._config.redis_blocking_timeout)
-        packet = await self._mq.brpop_bytes(self._module.path, timeout)
+        priorities = self._lanes.order()
+        packet = await self._queue.pop(self._module.path, timeout, priorities)
         if packet is None:
             raise PollingTimeoutError("Blocking Right POP operation timeout")
 
         logger.info(f"Received packet: {packet!r}")
-        assert isinstance(packet, tuple)
-        assert len(packet) == 2
-        assert isinstance(packet[0], bytes)
-        assert isinstance(packet[1], bytes)
+        assert packet.key in self._lane_keys
+        return packet
+
+    async def fetch_packets(self, count: int) -> List[MqPacket]:
+        if count <= 1:
+            return [await self.fetch_packet()]
+
+        timeout = floor(self._config.redis_blocking_timeout)
+        priorities = self._lanes.order()
+        path = self._module.path
+        packets = await self._queue.pop_batch(path, count, timeout, priorities)
+        if not packets:
+            raise PollingTimeoutError("Blocking Right POP operation timeout")
+
+        logger.info(f"Received {len(packets)} packets (batch: {count})")
+        for packet in packets:
+            assert packet.key in self._lane_keys
+        return packets
+
+    @staticmethod
+    def count_attempts(packet: MqPacket, request: Optional[MsgRequest] = None) -> int:
+        """
+        The deliveries of the packet, added to the attempts made before
+        the request was re-driven from the dead letter queue.
+        """
+
+        return (request.attempts if request is not None else 0) + packet.attempts
+
+    async def dead_letter(
+        self,
+        packet: MqPacket,
+        error: BaseException,
+        request: Optional[MsgRequest] = None,
+    ) -> None:
+        key = str(packet.key, encoding=PATH_ENCODING)
+        letter = MsgDeadLetter.from_packet(
+            key=key,
+            data=packet.data,
+            error=f"{type(error).__name__}: {error}",
+            attempts=self.count_attempts(packet, request),
+            msg_uuid=request.msg_uuid if request is not None else None,
+        )
+        try:
+            await self._dead_letters.push(self._module.path, letter)
+        except BaseException as e:
+            logger.error(f"Dead letter push failed: {e}")
+        else:
+            self._dead_lettered.inc()
+            logger.warning(f"Dead letter: {letter!r}")
 
-        recv_key = packet[0]
-        recv_data = packet[1]
-        assert recv_key == encode_path(self._module.path)
+    @staticmethod
+    def peek_request(packet: MqPacket) -> Optional[MsgRequest]:
+        try:
+            return MsgRequest.decode(packet.data)
+        except BaseException:  # noqa
+            return None
+
+    async def handle_packet(self, packet: MqPacket) -> None:
+        max_attempts = self._config.worker_max_attempts
+        request = self.peek_request(packet) if max_attempts > 0 else None
+        attempts = self.count_attempts(packet, request)
+        if 0 < max_attempts < attempts:
+            error = PacketQuarantinedError(
+                f"Request was attempted {attempts} times (limit: {max_attempts})"
+            )
+            self._quarantined.inc()
+            await self.dead_letter(packet, error, request)
+            await self._queue.ack(packet)
+            raise error
 
+        try:
+            await self.process_packet(packet)
+        except (PacketLoadError, NoMessageIdError) as e:
+            # A broken packet will never succeed, so it is quarantined at once.
+            self._quarantined.inc()
+            await self.dead_letter(packet, e)
+            await self._queue.ack(packet)
+            raise
+        except OsomApiError:
+            # A broken packet will never succeed, so it is not redelivered.
+            await self._queue.ack(packet)
+            raise
+
+        # [IMPORTANT]
+        # Acknowledge only after the response has been pushed,
+        # so that a crashed worker leaves the packet to be reclaimed.
+        await self._queue.ack(packet)
+
+    async def polling_iter(self) -> None:
+        packet = await self.fetch_packet()
+        await self.handle_packet(packet)
+
+    async def process_packet(self, packet: MqPacket) -> None:
         request: MsgRequest
         try:
-            request = MsgRequest.decode(recv_data)
+            request = MsgRequest.decode(packet.data)
         except BaseException as e:
             logger.exception(e)
             raise PacketLoadError("Packet decoding fail") from e
@@ -213,6 +368,35 @@ class WorkerContext(BaseContext):
         if not request.msg_uuid:
             raise NoMessageIdError("Message UUID does not exist")
 
+        # [IMPORTANT]
+        # Check the deadline first, since it does not need a round trip.
+        remaining = request.remaining()
+        if remaining is not None:
+            if remaining <= 0:
+                raise RequestExpiredError(
+                    f"Msg({request.msg_uuid}) Request has passed its deadline "
+                    f"{-remaining:.3f}s ago"
+                )
+            self._budget.observe(remaining)
+
+        waited = request.waited()
+        if waited is not None:
+            self._queue_lag = waited
+
+        # [IMPORTANT]
+        # A completed request has no marker any longer,
+        # so the completed responses are looked up before the marker.
+        done_packet = await self.load_done_response(request.msg_uuid)
+        if done_packet is not None:
+            self._duplicates.inc()
+            logger.warning(f"Msg({request.msg_uuid}) Reply to a duplicate request")
+            await self.push_response(request, done_packet)
+            return
+
+        path = self._module.path
+        if not await self._queue.consume_packet_marker(path, packet, request.msg_uuid):
+            raise RequestExpiredError(f"Msg({request.msg_uuid}) Request has expired")
+
         if self._config.verbose >= VERBOSE_LEVEL_1:
             logger.info(f"Request[{request.msg_uuid}] {request.content}")
         else:
@@ -220,11 +404,18 @@ class WorkerContext(BaseContext):
 
         response: MsgResponse
         try:
-            response = await self.on_message(request)
+            response = await self.execute_request(request)
+        except CancelledError:
+            raise
         except BaseException as e:
             logger.error(f"Msg({request.msg_uuid}) Request message upload failed: {e}")
             if self._config.debug:
                 logger.exception(e)
+            if self.retryable(e):
+                if await self.retry_request(packet, request):
+                    # The reply is pushed by the next attempt.
+                    return
+                await self.dead_letter(packet, e, request)
             response = MsgResponse(request.msg_uuid, error=str(e))
 
         try:
@@ -234,10 +425,184 @@ class WorkerContext(BaseContext):
             raise PacketDumpError("Response packet encoding fail")
 
         assert isinstance(response_packet, bytes)
-        response_path = request.get_response_path()
+        await self.push_response(request, response_packet)
+
+        if not response.has_error and not response.cancelled:
+            await self.store_done_response(request.msg_uuid, response_packet)
+
+    @staticmethod
+    def retryable(error: BaseException) -> bool:
+        """
+        Errors of the request itself, such as invalid arguments,
+        fail the same way on every attempt, so they are not retried.
+        """
+
+        cause: Optional[BaseException] = error
+        while cause is not None:
+            if isinstance(cause, OsomApiError):
+                if not isinstance(cause, CommandRuntimeError):
+                    return False
+            cause = cause.__cause__
+        return True
+
+    def can_retry(self, attempts: int, request: MsgRequest) -> bool:
+        max_attempts = self._config.worker_max_attempts
+        if max_attempts <= 0 or attempts >= max_attempts:
+            return False
+
+        remaining = request.remaining()
+        return remaining is None or remaining > 0
+
+    async def retry_request(self, packet: MqPacket, request: MsgRequest) -> bool:
+        """
+        Push the failed request back to the queue with its failed attempts,
+        unless it has reached the attempt limit or its deadline.
+
+        :return: False if the request is not retried.
+        """
+
+        attempts = self.count_attempts(packet, request)
+        if not self.can_retry(attempts, request):
+            return False
+
+        request.attempts = attempts
+        try:
+            await self._queue.push(
+                self._module.path,
+                request.encode(),
+                request.msg_uuid,
+                expire=request.remaining(),
+                priority=request.priority,
+                flow=MqFlow.from_request(request),
+            )
+        except BaseException as e:
+            logger.error(f"Msg({request.msg_uuid}) Retry push failed: {e}")
+            return False
+
+        self._retried.inc()
+        max_attempts = self._config.worker_max_attempts
+        logger.warning(
+            f"Msg({request.msg_uuid}) Retry the request "
+            f"(attempts: {attempts}/{max_attempts})"
+        )
+        return True
+
+    async def execute_request(self, request: MsgRequest) -> MsgResponse:
+        # [IMPORTANT]
+        # The command runs in its own task, so that a cancellation from the endpoint
+        # stops only the command and the cancelled reply can still be returned.
+        msg_uuid = request.msg_uuid
+        task = create_task(self.on_message(request), name=f"Msg({msg_uuid})")
+        self._running[msg_uuid] = task
+
+        try:
+            return await task
+        except CancelledError:
+            current = current_task()
+            assert current is not None
+            if not task.cancelled() or current.cancelling():
+                raise
+            self._cancelled.inc()
+            response = MsgResponse.from_cancelled(msg_uuid, "Cancelled by the endpoint")
+            await self.record_cancelled_response(response)
+            return response
+        finally:
+            self._running.pop(msg_uuid, None)
+
+    async def on_direct_request(self, request: MsgRequest) -> MsgResponse:
+        msg_uuid = request.msg_uuid
+        remaining = request.remaining()
+        if remaining is not None:
+            if remaining <= 0:
+                self._expired.inc()
+                error = f"Request has passed its deadline {-remaining:.3f}s ago"
+                logger.warning(f"Msg({msg_uuid}) {error}")
+                return MsgResponse(msg_uuid, error=error)
+            self._budget.observe(remaining)
+
+        # [IMPORTANT]
+        # Direct and queued requests share the completed responses,
+        # so a request that has already run through either is not run again.
+        done_packet = await self.load_done_response(msg_uuid)
+        if done_packet is not None:
+            self._duplicates.inc()
+            logger.warning(f"Msg({msg_uuid}) Reply to a duplicate direct request")
+            return MsgResponse.decode(done_packet)
+
+        if self._config.verbose >= VERBOSE_LEVEL_1:
+            logger.info(f"Direct request[{msg_uuid}] {request.content}")
+        else:
+            logger.info(f"Direct request[{msg_uuid}]")
+
+        # [IMPORTANT]
+        # A failed direct request is retried in place,
+        # since there is no queue to push it back to.
+        packet: Optional[MqPacket] = None
+        while True:
+            try:
+                response = await self.execute_request(request)
+                break
+            except CancelledError:
+                raise
+            except BaseException as e:
+                logger.error(f"Msg({msg_uuid}) Direct request failed: {e}")
+                if self._config.debug:
+                    logger.exception(e)
+                if not self.retryable(e):
+                    return MsgResponse(msg_uuid, error=str(e))
+
+                if packet is None:
+                    key = make_lane_path(self._module.path, request.priority)
+                    packet = MqPacket(encode_path(key), request.encode())
+                attempts = self.count_attempts(packet, request)
+                if not self.can_retry(attempts, request):
+                    await self.dead_letter(packet, e, request)
+                    return MsgResponse(msg_uuid, error=str(e))
+
+                request.attempts = attempts
+                self._retried.inc()
+                logger.warning(f"Msg({msg_uuid}) Retry the direct request")
+
+        if not response.has_error and not response.cancelled:
+            await self.store_done_response(msg_uuid, response.encode())
+        return response
 
+    async def open_direct_server(self) -> None:
+        if self._direct is not None:
+            await self._direct.open()
+
+    async def close_direct_server(self) -> None:
+        if self._direct is not None:
+            await self._direct.close()
+
+    async def push_response(self, request: MsgRequest, response_packet: bytes) -> None:
+        response_path = request.get_response_path()
         expire = floor(self._config.redis_expire_medium)
-        await self._mq.lpush_bytes(response_path, response_packet, expire)
+        await self._mq.push_reply_bytes(response_path, response_packet, expire)
+
+    async def load_done_response(self, msg_uuid: str) -> Optional[bytes]:
+        if self._config.worker_idempotency_ttl <= 0:
+            return None
+
+        done_path = make_done_path(self._module.path, msg_uuid)
+        return await self._mq.get_optional_bytes(done_path)
+
+    async def store_done_response(self, msg_uuid: str, response_packet: bytes) -> None:
+        ttl = self._config.worker_idempotency_ttl
+        if ttl <= 0:
+            return
+
+        done_path = make_done_path(self._module.path, msg_uuid)
+        try:
+            await self._mq.set_bytes(done_path, response_packet, ttl)
+        except BaseException as e:
+            logger.error(f"Msg({msg_uuid}) Completed response store failed: {e}")
+
+    async def record_cancelled_response(self, response: MsgResponse) -> None:
+        try:
+            await self.upload_msg_response(response)
+        except BaseException as e:
+            logger.error(f"Msg({response.msg_uuid}) Cancelled reply upload failed: {e}")
 
     async def on_message(self, request: MsgRequest) -> MsgResponse:
         await self.upload_msg_request(request)
@@ -257,25 +622,127 @@ class WorkerContext(BaseContext):
 
         return response
 
-    async def start_polling(self) -> None:
+    async def run_packet(self, packet: MqPacket) -> None:
+        try:
+            await self.handle_packet(packet)
+        except NoMessageIdError:
+            pass
+        except RequestExpiredError as e:
+            self._expired.inc()
+            logger.warning(e)
+        except PacketQuarantinedError as e:
+            logger.error(e)
+        except CommandRuntimeError as e:
+            logger.error(e)
+        except OsomApiError as e:
+            logger.debug(e)
+        except CancelledError:
+            logger.warning(f"The packet task was cancelled: {packet.key!r}")
+            raise
+        except BaseException as e:
+            logger.error(f"Unexpected error occurred while handling a packet: {e}")
+            if self._config.debug:
+                logger.exception(e)
+
+    async def _dequeue_main(self) -> None:
+        concurrency = max(self._config.worker_concurrency, 1)
+        batch_size = max(self._config.worker_batch_size, 1)
+        semaphore = Semaphore(concurrency)
+        logger.info(
+            f"Start dequeuing (concurrency: {concurrency}, batch: {batch_size}) ..."
+        )
+
+        def _packet_done(task: Task) -> None:
+            self._inflight.discard(task)
+            semaphore.release()
+
+        failures = 0
         while True:
+            # [IMPORTANT]
+            # Wait for a free slot *before* popping,
+            # so that no packet is taken out of Redis without a slot to run in.
+            await semaphore.acquire()
+            slots = 1
+
+            # Take the remaining free slots without waiting.
+            while slots < batch_size and not semaphore.locked():
+                await semaphore.acquire()
+                slots += 1
+
             try:
-                await self.polling_iter()
-            except NoMessageIdError:
-                pass
-            except CommandRuntimeError as e:
-                logger.error(e)
-            except OsomApiError as e:
+                packets = await self.fetch_packets(slots)
+            except PollingTimeoutError as e:
+                for _ in range(slots):
+                    semaphore.release()
                 logger.debug(e)
+                failures = 0
+                self._queue_lag = 0.0
+                continue
+            except (RedisError, OSError) as e:
+                for _ in range(slots):
+                    semaphore.release()
+                delay = self._mq.reconnect_delay(failures)
+                failures += 1
+                logger.error(f"Dequeue error: {e}")
+                logger.warning(f"Retry dequeuing in {delay:.2f}s (#{failures}) ...")
+                await sleep(delay)
+                continue
+            except BaseException:
+                for _ in range(slots):
+                    semaphore.release()
+                raise
+
+            failures = 0
+            assert 1 <= len(packets) <= slots
+            for _ in range(slots - len(packets)):
+                semaphore.release()
+
+            for packet in packets:
+                task = create_task(self.run_packet(packet))
+                self._inflight.add(task)
+                task.add_done_callback(_packet_done)
+
+    async def cancel_inflight(self) -> None:
+        if not self._inflight:
+            return
+
+        tasks = list(self._inflight)
+        timeout = self._config.worker_shutdown_timeout
+        logger.warning(f"Waiting for {len(tasks)} in-flight requests ({timeout:.1f}s)")
+
+        _, pending = await wait(tasks, timeout=timeout)
+        if not pending:
+            return
+
+        logger.warning(f"Cancel {len(pending)} in-flight requests")
+        for task in pending:
+            task.cancel()
+        await gather(*pending, return_exceptions=True)
+
+    async def start_polling(self) -> None:
+        assert self._dequeuer is None
+        self._dequeuer = create_task(self._dequeue_main(), name="WorkerDequeueTask")
+        try:
+            await self._dequeuer
+        finally:
+            if not self._dequeuer.done():
+                self._dequeuer.cancel()
+                await gather(self._dequeuer, return_exceptions=True)
+            self._dequeuer = None
+            await shield(self.cancel_inflight())
 
     async def main(self) -> None:
         await self.open_base_context()
         await self.open_module()
+        await self.open_direct_server()
+        self.start_heartbeat()
         try:
             logger.info("Start polling ...")
             await self.start_polling()
         finally:
             logger.info("Polling is done...")
+            await self.stop_heartbeat()
+            await self.close_direct_server()
             await self.close_module()
             await self.close_base_context()
 
@@ -2,18 +2,24 @@
 
 from osom_api.args.api import ApiArgs
 from osom_api.args.discord import DiscordArgs
+from osom_api.args.dlq import DlqArgs
+from osom_api.args.endpoint import EndpointArgs
 from osom_api.args.module import ModuleArgs
 from osom_api.args.redis import RedisArgs
 from osom_api.args.s3 import S3Args
 from osom_api.args.supabase import SupabaseArgs
 from osom_api.args.telegram import TelegramArgs
+from osom_api.args.worker import WorkerArgs
 
 __all__ = [
     "ApiArgs",
     "DiscordArgs",
+    "DlqArgs",
+    "EndpointArgs",
     "ModuleArgs",
     "RedisArgs",
     "S3Args",
     "SupabaseArgs",
     "TelegramArgs",
+    "WorkerArgs",
 ]
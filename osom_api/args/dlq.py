@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+
+from osom_api.args._common import CommonArgs
+
+
+class DlqArgs(CommonArgs):
+    dlq_action: str
+    dlq_worker: str
+    dlq_count: int
+
+    def assert_dlq_properties(self) -> None:
+        assert isinstance(self.dlq_action, str)
+        assert isinstance(self.dlq_worker, str)
+        assert isinstance(self.dlq_count, int)
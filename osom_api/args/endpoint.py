@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+from typing import Optional
+
+from osom_api.args._common import CommonArgs
+
+
+class EndpointArgs(CommonArgs):
+    endpoint_max_queue_depth: int
+    endpoint_max_queue_wait: float
+    endpoint_queue_limits: Optional[str]
+    endpoint_priorities: Optional[str]
+    endpoint_request_timeout: float
+    endpoint_single_flight: bool
+    endpoint_heartbeat_timeout: float
+    endpoint_local_worker: Optional[str]
+    endpoint_direct: bool
+    endpoint_direct_ring_size: int
+
+    def assert_endpoint_properties(self) -> None:
+        assert isinstance(self.endpoint_max_queue_depth, int)
+        assert isinstance(self.endpoint_max_queue_wait, float)
+        assert isinstance(self.endpoint_queue_limits, (type(None), str))
+        assert isinstance(self.endpoint_priorities, (type(None), str))
+        assert isinstance(self.endpoint_request_timeout, float)
+        assert isinstance(self.endpoint_single_flight, bool)
+        assert isinstance(self.endpoint_heartbeat_timeout, float)
+        assert isinstance(self.endpoint_local_worker, (type(None), str))
+        assert isinstance(self.endpoint_direct, bool)
+        assert isinstance(self.endpoint_direct_ring_size, int)
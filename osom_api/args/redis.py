@@ -7,22 +7,64 @@ from osom_api.args._common import CommonArgs
 
 class RedisArgs(CommonArgs):
     redis_url: Optional[str]
+    redis_mode: str
+    redis_sentinel_service: str
     redis_connection_timeout: Optional[float]
     redis_subscribe_timeout: Optional[float]
+    redis_subscribe_concurrency: int
+    redis_subscribe_queue_size: int
+    redis_subscribe_unordered: bool
+    redis_publish_window: float
+    redis_publish_batch_size: int
+    redis_cache_size: int
+    redis_cache_prefixes: Optional[str]
+    redis_reconnect_delay: float
+    redis_reconnect_max_delay: float
     redis_blocking_timeout: float
     redis_close_timeout: float
+    redis_max_command_connections: int
+    redis_max_blocking_connections: int
+    redis_max_pubsub_connections: int
+    redis_pool_timeout: float
     redis_expire_short: float
     redis_expire_medium: float
     redis_expire_long: float
     redis_ssl_cert_reqs: str
+    redis_queue_type: str
+    redis_stream_group: str
+    redis_stream_consumer: Optional[str]
+    redis_stream_claim_idle: float
+    redis_stream_maxlen: int
+    redis_fair_weights: Optional[str]
 
     def assert_redis_properties(self) -> None:
         assert isinstance(self.redis_url, (type(None), str))
+        assert isinstance(self.redis_mode, str)
+        assert isinstance(self.redis_sentinel_service, str)
         assert isinstance(self.redis_connection_timeout, (type(None), float))
         assert isinstance(self.redis_subscribe_timeout, (type(None), float))
+        assert isinstance(self.redis_subscribe_concurrency, int)
+        assert isinstance(self.redis_subscribe_queue_size, int)
+        assert isinstance(self.redis_subscribe_unordered, bool)
+        assert isinstance(self.redis_publish_window, float)
+        assert isinstance(self.redis_publish_batch_size, int)
+        assert isinstance(self.redis_cache_size, int)
+        assert isinstance(self.redis_cache_prefixes, (type(None), str))
+        assert isinstance(self.redis_reconnect_delay, float)
+        assert isinstance(self.redis_reconnect_max_delay, float)
         assert isinstance(self.redis_blocking_timeout, float)
         assert isinstance(self.redis_close_timeout, float)
+        assert isinstance(self.redis_max_command_connections, int)
+        assert isinstance(self.redis_max_blocking_connections, int)
+        assert isinstance(self.redis_max_pubsub_connections, int)
+        assert isinstance(self.redis_pool_timeout, float)
         assert isinstance(self.redis_expire_short, float)
         assert isinstance(self.redis_expire_medium, float)
         assert isinstance(self.redis_expire_long, float)
         assert isinstance(self.redis_ssl_cert_reqs, str)
+        assert isinstance(self.redis_queue_type, str)
+        assert isinstance(self.redis_stream_group, str)
+        assert isinstance(self.redis_stream_consumer, (type(None), str))
+        assert isinstance(self.redis_stream_claim_idle, float)
+        assert isinstance(self.redis_stream_maxlen, int)
+        assert isinstance(self.redis_fair_weights, (type(None), str))
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+from typing import Optional
+
+from osom_api.args._common import CommonArgs
+
+
+class WorkerArgs(CommonArgs):
+    worker_concurrency: int
+    worker_batch_size: int
+    worker_shutdown_timeout: float
+    worker_priority_weights: Optional[str]
+    worker_max_attempts: int
+    worker_dead_letter_maxlen: int
+    worker_idempotency_ttl: float
+    worker_heartbeat_interval: float
+    worker_direct_address: Optional[str]
+    worker_direct_ring_size: int
+
+    def assert_worker_properties(self) -> None:
+        assert isinstance(self.worker_concurrency, int)
+        assert isinstance(self.worker_batch_size, int)
+        assert isinstance(self.worker_shutdown_timeout, float)
+        assert isinstance(self.worker_priority_weights, (type(None), str))
+        assert isinstance(self.worker_max_attempts, int)
+        assert isinstance(self.worker_dead_letter_maxlen, int)
+        assert isinstance(self.worker_idempotency_ttl, float)
+        assert isinstance(self.worker_heartbeat_interval, float)
+        assert isinstance(self.worker_direct_address, (type(None), str))
+        assert isinstance(self.worker_direct_ring_size, int)
@@ -13,6 +13,7 @@ from osom_api.logging.logging import (
     SEVERITY_NAME_INFO,
     TIMED_ROTATING_WHEN,
 )
+from osom_api.paths import MQ_REGISTRY_PATH
 from osom_api.random.hex import generate_hexdigits
 from osom_api.system.environ import get_typed_environ_value as get_eval
 
@@ -53,7 +54,15 @@ Simply usage:
   {PROG} {CMD_WORKER}
 """
 
-CMDS = (CMD_DISCORD, CMD_TELEGRAM, CMD_MASTER, CMD_WORKER)
+CMD_DLQ: Final[str] = "dlq"
+CMD_DLQ_HELP: Final[str] = "Inspect and re-drive the dead letters of workers"
+CMD_DLQ_EPILOG = f"""
+Simply usage:
+  {PROG} {CMD_DLQ} list {{worker_name}}
+  {PROG} {CMD_DLQ} redrive {{worker_name}} --dlq-count 10
+"""
+
+CMDS = (CMD_DISCORD, CMD_TELEGRAM, CMD_MASTER, CMD_WORKER, CMD_DLQ)
 
 DEFAULT_DOTENV_FILENAME: Final[str] = ".env.local"
 TEST_DOTENV_FILENAME: Final[str] = ".env.test"
@@ -67,6 +76,40 @@ RedisSslCertReqsLiteral = Literal["none", "optional", "required"]
 REDIS_SSL_CERT_REQS: Final[Sequence[str]] = get_args(RedisSslCertReqsLiteral)
 DEFAULT_REDIS_SSL_CERT_REQS: Final[str] = "none"
 
+RedisModeLiteral = Literal["standalone", "sentinel", "cluster", "shards"]
+REDIS_MODES: Final[Sequence[str]] = get_args(RedisModeLiteral)
+REDIS_MODE_STANDALONE: Final[str] = "standalone"
+REDIS_MODE_SENTINEL: Final[str] = "sentinel"
+REDIS_MODE_CLUSTER: Final[str] = "cluster"
+REDIS_MODE_SHARDS: Final[str] = "shards"
+DEFAULT_REDIS_MODE: Final[str] = REDIS_MODE_STANDALONE
+DEFAULT_REDIS_SENTINEL_SERVICE: Final[str] = "mymaster"
+
+RedisQueueTypeLiteral = Literal["list", "stream", "fair"]
+REDIS_QUEUE_TYPES: Final[Sequence[str]] = get_args(RedisQueueTypeLiteral)
+REDIS_QUEUE_TYPE_LIST: Final[str] = "list"
+REDIS_QUEUE_TYPE_STREAM: Final[str] = "stream"
+REDIS_QUEUE_TYPE_FAIR: Final[str] = "fair"
+DEFAULT_REDIS_QUEUE_TYPE: Final[str] = REDIS_QUEUE_TYPE_LIST
+
+DEFAULT_REDIS_STREAM_GROUP: Final[str] = "osom"
+DEFAULT_REDIS_STREAM_CLAIM_IDLE: Final[float] = 60.0
+DEFAULT_REDIS_STREAM_MAXLEN: Final[int] = 0
+
+DEFAULT_REDIS_MAX_COMMAND_CONNECTIONS: Final[int] = 32
+DEFAULT_REDIS_MAX_BLOCKING_CONNECTIONS: Final[int] = 16
+DEFAULT_REDIS_MAX_PUBSUB_CONNECTIONS: Final[int] = 2
+DEFAULT_REDIS_POOL_TIMEOUT: Final[float] = 8.0
+
+DEFAULT_REDIS_SUBSCRIBE_CONCURRENCY: Final[int] = 4
+DEFAULT_REDIS_SUBSCRIBE_QUEUE_SIZE: Final[int] = 1024
+DEFAULT_REDIS_PUBLISH_WINDOW: Final[float] = 0.0
+DEFAULT_REDIS_PUBLISH_BATCH_SIZE: Final[int] = 64
+DEFAULT_REDIS_CACHE_SIZE: Final[int] = 0
+
+DEFAULT_REDIS_RECONNECT_DELAY: Final[float] = 0.5
+DEFAULT_REDIS_RECONNECT_MAX_DELAY: Final[float] = 30.0
+
 DEFAULT_REDIS_BLOCKING_TIMEOUT: Final[float] = 0.0
 DEFAULT_REDIS_CLOSE_TIMEOUT: Final[float] = 4.0
 DEFAULT_REDIS_EXPIRE_SHORT: Final[float] = 4.0
@@ -78,6 +121,28 @@ DEFAULT_SUPABASE_STORAGE_TIMEOUT: Final[float] = 24.0
 
 DEFAULT_MODULE_PATH: Final[str] = "osom_api.worker.modules.default"
 
+DEFAULT_ENDPOINT_MAX_QUEUE_DEPTH: Final[int] = 0
+DEFAULT_ENDPOINT_MAX_QUEUE_WAIT: Final[float] = 0.0
+DEFAULT_ENDPOINT_REQUEST_TIMEOUT: Final[float] = 10.0
+DEFAULT_ENDPOINT_HEARTBEAT_TIMEOUT: Final[float] = 10.0
+DEFAULT_ENDPOINT_DIRECT_RING_SIZE: Final[int] = 0
+
+DEFAULT_WORKER_CONCURRENCY: Final[int] = 1
+DEFAULT_WORKER_BATCH_SIZE: Final[int] = 1
+DEFAULT_WORKER_SHUTDOWN_TIMEOUT: Final[float] = 8.0
+DEFAULT_WORKER_MAX_ATTEMPTS: Final[int] = 3
+DEFAULT_WORKER_DEAD_LETTER_MAXLEN: Final[int] = 1000
+DEFAULT_WORKER_IDEMPOTENCY_TTL: Final[float] = 0.0
+DEFAULT_WORKER_HEARTBEAT_INTERVAL: Final[float] = 2.0
+DEFAULT_WORKER_DIRECT_RING_SIZE: Final[int] = 0
+
+DlqActionLiteral = Literal["list", "redrive", "purge"]
+DLQ_ACTIONS: Final[Sequence[str]] = get_args(DlqActionLiteral)
+DLQ_ACTION_LIST: Final[str] = "list"
+DLQ_ACTION_REDRIVE: Final[str] = "redrive"
+DLQ_ACTION_PURGE: Final[str] = "purge"
+DEFAULT_DLQ_COUNT: Final[int] = 10
+
 OSOM_WEB_LINK: Final[str] = "https://www.osom.run/"
 NOT_REGISTERED_MSG: Final[str] = f"Not registered. Go to {OSOM_WEB_LINK} and sign up!"
 
@@ -179,6 +244,253 @@ def add_module_arguments(parser: ArgumentParser) -> None:
     )
 
 
+def add_endpoint_arguments(
+    parser: ArgumentParser,
+    max_queue_depth=DEFAULT_ENDPOINT_MAX_QUEUE_DEPTH,
+    max_queue_wait=DEFAULT_ENDPOINT_MAX_QUEUE_WAIT,
+    request_timeout=DEFAULT_ENDPOINT_REQUEST_TIMEOUT,
+    heartbeat_timeout=DEFAULT_ENDPOINT_HEARTBEAT_TIMEOUT,
+    direct_ring_size=DEFAULT_ENDPOINT_DIRECT_RING_SIZE,
+) -> None:
+    parser.add_argument(
+        "--endpoint-max-queue-depth",
+        default=get_eval("ENDPOINT_MAX_QUEUE_DEPTH", max_queue_depth),
+        metavar="num",
+        type=int,
+        help=(
+            "Requests are rejected as busy when the worker queue is this deep. "
+            f"0 is unlimited (default: {max_queue_depth})"
+        ),
+    )
+    parser.add_argument(
+        "--endpoint-max-queue-wait",
+        default=get_eval("ENDPOINT_MAX_QUEUE_WAIT", max_queue_wait),
+        metavar="sec",
+        type=float,
+        help=(
+            "Requests are rejected as busy when the estimated waiting time "
+            "in the worker queue exceeds this. "
+            f"0 is unlimited (default: {max_queue_wait:.2f})"
+        ),
+    )
+    parser.add_argument(
+        "--endpoint-queue-limits",
+        default=get_eval("ENDPOINT_QUEUE_LIMITS"),
+        metavar="limits",
+        help="Per-worker thresholds formatted as 'name=depth[:wait],...'",
+    )
+    parser.add_argument(
+        "--endpoint-priorities",
+        default=get_eval("ENDPOINT_PRIORITIES"),
+        metavar="priorities",
+        help=(
+            "Per-command priorities formatted as 'command=high|normal|low,...'. "
+            "Requests of the other commands have the normal priority"
+        ),
+    )
+    parser.add_argument(
+        "--endpoint-request-timeout",
+        default=get_eval("ENDPOINT_REQUEST_TIMEOUT", request_timeout),
+        metavar="sec",
+        type=float,
+        help=(
+            "Deadline of the requests sent to workers. "
+            "Workers drop the requests that expired before execution "
+            f"(default: {request_timeout:.2f})"
+        ),
+    )
+    parser.add_argument(
+        "--endpoint-single-flight",
+        action="store_true",
+        default=get_eval("ENDPOINT_SINGLE_FLIGHT", False),
+        help=(
+            "Identical concurrent worker commands share a single execution "
+            "across the endpoint instances"
+        ),
+    )
+    parser.add_argument(
+        "--endpoint-local-worker",
+        default=get_eval("ENDPOINT_LOCAL_WORKER"),
+        metavar="path",
+        help=(
+            "Import path of a worker module that runs inside the endpoint process. "
+            "Its commands are called directly, without going through Redis"
+        ),
+    )
+    parser.add_argument(
+        "--endpoint-direct",
+        action="store_true",
+        default=get_eval("ENDPOINT_DIRECT", False),
+        help=(
+            "Send the worker commands straight to the workers "
+            "that advertise a direct address, instead of the Redis queue"
+        ),
+    )
+    parser.add_argument(
+        "--endpoint-direct-ring-size",
+        default=get_eval("ENDPOINT_DIRECT_RING_SIZE", direct_ring_size),
+        metavar="bytes",
+        type=int,
+        help=(
+            "Size of the shared memory ring for the large requests sent to the workers "
+            "on the same host over a Unix domain socket. "
+            f"0 is disabled (default: {direct_ring_size})"
+        ),
+    )
+    parser.add_argument(
+        "--endpoint-heartbeat-timeout",
+        default=get_eval("ENDPOINT_HEARTBEAT_TIMEOUT", heartbeat_timeout),
+        metavar="sec",
+        type=float,
+        help=(
+            "Worker instances that have not sent a heartbeat for this long "
+            "are removed from the routing. "
+            f"0 is never removed (default: {heartbeat_timeout:.2f})"
+        ),
+    )
+
+
+def add_worker_arguments(
+    parser: ArgumentParser,
+    concurrency=DEFAULT_WORKER_CONCURRENCY,
+    batch_size=DEFAULT_WORKER_BATCH_SIZE,
+    shutdown_timeout=DEFAULT_WORKER_SHUTDOWN_TIMEOUT,
+    max_attempts=DEFAULT_WORKER_MAX_ATTEMPTS,
+    dead_letter_maxlen=DEFAULT_WORKER_DEAD_LETTER_MAXLEN,
+    idempotency_ttl=DEFAULT_WORKER_IDEMPOTENCY_TTL,
+    heartbeat_interval=DEFAULT_WORKER_HEARTBEAT_INTERVAL,
+    direct_ring_size=DEFAULT_WORKER_DIRECT_RING_SIZE,
+) -> None:
+    parser.add_argument(
+        "--worker-concurrency",
+        default=get_eval("WORKER_CONCURRENCY", concurrency),
+        metavar="num",
+        type=int,
+        help=(
+            "Maximum number of in-flight requests, "
+            "counted separately for the queued and the direct requests "
+            f"(default: {concurrency})"
+        ),
+    )
+    parser.add_argument(
+        "--worker-batch-size",
+        default=get_eval("WORKER_BATCH_SIZE", batch_size),
+        metavar="num",
+        type=int,
+        help=(
+            "Maximum number of requests dequeued in a single round trip. "
+            f"Limited by free concurrency slots (default: {batch_size})"
+        ),
+    )
+    parser.add_argument(
+        "--worker-shutdown-timeout",
+        default=get_eval("WORKER_SHUTDOWN_TIMEOUT", shutdown_timeout),
+        metavar="sec",
+        type=float,
+        help=(
+            "Waiting time for in-flight requests before cancelling them at shutdown "
+            f"(default: {shutdown_timeout:.2f})"
+        ),
+    )
+    parser.add_argument(
+        "--worker-priority-weights",
+        default=get_eval("WORKER_PRIORITY_WEIGHTS"),
+        metavar="weights",
+        help=(
+            "Weights of the priority lanes formatted as 'high=8,normal=4,low=1'. "
+            "If not specified, the lanes are dequeued in strict priority order"
+        ),
+    )
+    parser.add_argument(
+        "--worker-max-attempts",
+        default=get_eval("WORKER_MAX_ATTEMPTS", max_attempts),
+        metavar="num",
+        type=int,
+        help=(
+            "Requests that fail with a retryable error are retried "
+            "until they have been attempted this many times, "
+            "and then moved to the dead letter queue. "
+            "Requests delivered more than this are quarantined without running. "
+            "Errors of the request itself, such as invalid arguments, "
+            "are replied at once. "
+            f"0 disables the retries and the quarantine (default: {max_attempts})"
+        ),
+    )
+    parser.add_argument(
+        "--worker-dead-letter-maxlen",
+        default=get_eval("WORKER_DEAD_LETTER_MAXLEN", dead_letter_maxlen),
+        metavar="num",
+        type=int,
+        help=(
+            "Maximum number of dead letters kept for each worker. "
+            f"0 is unlimited (default: {dead_letter_maxlen})"
+        ),
+    )
+    parser.add_argument(
+        "--worker-idempotency-ttl",
+        default=get_eval("WORKER_IDEMPOTENCY_TTL", idempotency_ttl),
+        metavar="sec",
+        type=float,
+        help=(
+            "Responses of the completed requests are kept for this long, "
+            "and a redelivered request is answered with it without running. "
+            f"0 is disabled (default: {idempotency_ttl:.2f})"
+        ),
+    )
+    parser.add_argument(
+        "--worker-heartbeat-interval",
+        default=get_eval("WORKER_HEARTBEAT_INTERVAL", heartbeat_interval),
+        metavar="sec",
+        type=float,
+        help=(
+            "Interval of the heartbeats that report the load of the instance. "
+            "0 is disabled, and endpoints then keep the instance until it "
+            "unregisters, but it is left out of the worker registry "
+            f"(default: {heartbeat_interval:.2f})"
+        ),
+    )
+    parser.add_argument(
+        "--worker-direct-address",
+        default=get_eval("WORKER_DIRECT_ADDRESS"),
+        metavar="uri",
+        help=(
+            "Address to serve the requests sent straight from the endpoints. "
+            "e.g. 'unix:/tmp/worker.sock' or 'ipv4:127.0.0.1:9000'"
+        ),
+    )
+    parser.add_argument(
+        "--worker-direct-ring-size",
+        default=get_eval("WORKER_DIRECT_RING_SIZE", direct_ring_size),
+        metavar="bytes",
+        type=int,
+        help=(
+            "Size of the shared memory ring for the large responses sent to each "
+            "endpoint that connects over a Unix domain socket with its own ring. "
+            f"0 is disabled (default: {direct_ring_size})"
+        ),
+    )
+
+
+def add_dlq_arguments(parser: ArgumentParser, count=DEFAULT_DLQ_COUNT) -> None:
+    parser.add_argument(
+        "dlq_action",
+        choices=DLQ_ACTIONS,
+        help="Action to run on the dead letter queue",
+    )
+    parser.add_argument(
+        "dlq_worker",
+        metavar="worker_name",
+        help="Name of the worker that owns the dead letter queue",
+    )
+    parser.add_argument(
+        "--dlq-count",
+        default=get_eval("DLQ_COUNT", count),
+        metavar="num",
+        type=int,
+        help=f"Number of dead letters to list or re-drive (default: {count})",
+    )
+
+
 def add_redis_arguments(
     parser: ArgumentParser,
     blocking_timeout=DEFAULT_REDIS_BLOCKING_TIMEOUT,
@@ -187,6 +499,23 @@ def add_redis_arguments(
     expire_long=DEFAULT_REDIS_EXPIRE_LONG,
     close_timeout=DEFAULT_REDIS_CLOSE_TIMEOUT,
     ssl_cert_reqs=DEFAULT_REDIS_SSL_CERT_REQS,
+    mode=DEFAULT_REDIS_MODE,
+    sentinel_service=DEFAULT_REDIS_SENTINEL_SERVICE,
+    queue_type=DEFAULT_REDIS_QUEUE_TYPE,
+    stream_group=DEFAULT_REDIS_STREAM_GROUP,
+    stream_claim_idle=DEFAULT_REDIS_STREAM_CLAIM_IDLE,
+    stream_maxlen=DEFAULT_REDIS_STREAM_MAXLEN,
+    max_command_connections=DEFAULT_REDIS_MAX_COMMAND_CONNECTIONS,
+    max_blocking_connections=DEFAULT_REDIS_MAX_BLOCKING_CONNECTIONS,
+    max_pubsub_connections=DEFAULT_REDIS_MAX_PUBSUB_CONNECTIONS,
+    pool_timeout=DEFAULT_REDIS_POOL_TIMEOUT,
+    subscribe_concurrency=DEFAULT_REDIS_SUBSCRIBE_CONCURRENCY,
+    subscribe_queue_size=DEFAULT_REDIS_SUBSCRIBE_QUEUE_SIZE,
+    publish_window=DEFAULT_REDIS_PUBLISH_WINDOW,
+    publish_batch_size=DEFAULT_REDIS_PUBLISH_BATCH_SIZE,
+    cache_size=DEFAULT_REDIS_CACHE_SIZE,
+    reconnect_delay=DEFAULT_REDIS_RECONNECT_DELAY,
+    reconnect_max_delay=DEFAULT_REDIS_RECONNECT_MAX_DELAY,
 ) -> None:
     parser.add_argument(
         "--redis-url",
@@ -194,6 +523,28 @@ def add_redis_arguments(
         metavar="url",
         help="Redis URL",
     )
+    parser.add_argument(
+        "--redis-mode",
+        choices=REDIS_MODES,
+        default=get_eval("REDIS_MODE", mode),
+        help=(
+            "Deployment of the Redis server. In 'sentinel' mode, the URL lists "
+            "the Sentinel nodes separated by commas. In 'shards' mode, the URL "
+            "lists independent Redis servers separated by commas, "
+            "and the keys are placed on them by consistent hashing. "
+            "The 'cluster' mode requires redis-py 8.0 or later "
+            f"(default: '{mode}')"
+        ),
+    )
+    parser.add_argument(
+        "--redis-sentinel-service",
+        default=get_eval("REDIS_SENTINEL_SERVICE", sentinel_service),
+        metavar="name",
+        help=(
+            "Master service name monitored by Sentinel "
+            f"(default: '{sentinel_service}')"
+        ),
+    )
 
     parser.add_argument(
         "--redis-connection-timeout",
@@ -209,6 +560,93 @@ def add_redis_arguments(
         type=float,
         help="Redis subscribe timeout in seconds",
     )
+    parser.add_argument(
+        "--redis-reconnect-delay",
+        default=get_eval("REDIS_RECONNECT_DELAY", reconnect_delay),
+        metavar="sec",
+        type=float,
+        help=(
+            "Initial delay of the exponential reconnection backoff "
+            f"(default: {reconnect_delay:.2f})"
+        ),
+    )
+    parser.add_argument(
+        "--redis-reconnect-max-delay",
+        default=get_eval("REDIS_RECONNECT_MAX_DELAY", reconnect_max_delay),
+        metavar="sec",
+        type=float,
+        help=(
+            "Maximum delay of the exponential reconnection backoff "
+            f"(default: {reconnect_max_delay:.2f})"
+        ),
+    )
+    parser.add_argument(
+        "--redis-subscribe-concurrency",
+        default=get_eval("REDIS_SUBSCRIBE_CONCURRENCY", subscribe_concurrency),
+        metavar="num",
+        type=int,
+        help=(
+            "Number of tasks handling subscription messages "
+            f"(default: {subscribe_concurrency})"
+        ),
+    )
+    parser.add_argument(
+        "--redis-subscribe-queue-size",
+        default=get_eval("REDIS_SUBSCRIBE_QUEUE_SIZE", subscribe_queue_size),
+        metavar="num",
+        type=int,
+        help=(
+            "Maximum number of pending subscription messages. "
+            f"Messages beyond this are dropped (default: {subscribe_queue_size})"
+        ),
+    )
+    parser.add_argument(
+        "--redis-subscribe-unordered",
+        action="store_true",
+        default=get_eval("REDIS_SUBSCRIBE_UNORDERED", False),
+        help="Do not keep the order of subscription messages within a channel",
+    )
+    parser.add_argument(
+        "--redis-publish-window",
+        default=get_eval("REDIS_PUBLISH_WINDOW", publish_window),
+        metavar="sec",
+        type=float,
+        help=(
+            "Messages published within this window are sent in a single pipeline. "
+            f"0 sends each message at once (default: {publish_window:.3f})"
+        ),
+    )
+    parser.add_argument(
+        "--redis-publish-batch-size",
+        default=get_eval("REDIS_PUBLISH_BATCH_SIZE", publish_batch_size),
+        metavar="num",
+        type=int,
+        help=(
+            "The pipeline is sent before the window expires "
+            "once this many messages are buffered. "
+            f"0 is unlimited (default: {publish_batch_size})"
+        ),
+    )
+    parser.add_argument(
+        "--redis-cache-size",
+        default=get_eval("REDIS_CACHE_SIZE", cache_size),
+        metavar="num",
+        type=int,
+        help=(
+            "Maximum number of replies kept in the client-side cache, "
+            "which Redis keeps coherent by tracking the cached keys. "
+            f"0 disables the cache (default: {cache_size})"
+        ),
+    )
+    parser.add_argument(
+        "--redis-cache-prefixes",
+        default=get_eval("REDIS_CACHE_PREFIXES"),
+        metavar="prefixes",
+        help=(
+            "Key prefixes of the client-side cache separated by commas "
+            f"(default: '{MQ_REGISTRY_PATH}')"
+        ),
+    )
     parser.add_argument(
         "--redis-blocking-timeout",
         default=get_eval("REDIS_BLOCKING_TIMEOUT", blocking_timeout),
@@ -224,6 +662,47 @@ def add_redis_arguments(
         help=f"Redis close timeout in seconds (default: {close_timeout:.2f})",
     )
 
+    parser.add_argument(
+        "--redis-max-command-connections",
+        default=get_eval("REDIS_MAX_COMMAND_CONNECTIONS", max_command_connections),
+        metavar="num",
+        type=int,
+        help=(
+            "Size of the connection pool for short commands "
+            f"(default: {max_command_connections})"
+        ),
+    )
+    parser.add_argument(
+        "--redis-max-blocking-connections",
+        default=get_eval("REDIS_MAX_BLOCKING_CONNECTIONS", max_blocking_connections),
+        metavar="num",
+        type=int,
+        help=(
+            "Size of the connection pool for blocking pops "
+            f"(default: {max_blocking_connections})"
+        ),
+    )
+    parser.add_argument(
+        "--redis-max-pubsub-connections",
+        default=get_eval("REDIS_MAX_PUBSUB_CONNECTIONS", max_pubsub_connections),
+        metavar="num",
+        type=int,
+        help=(
+            "Size of the connection pool for subscriptions "
+            f"(default: {max_pubsub_connections})"
+        ),
+    )
+    parser.add_argument(
+        "--redis-pool-timeout",
+        default=get_eval("REDIS_POOL_TIMEOUT", pool_timeout),
+        metavar="sec",
+        type=float,
+        help=(
+            "Waiting time for a free connection in the pool "
+            f"(default: {pool_timeout:.2f})"
+        ),
+    )
+
     parser.add_argument(
         "--redis-expire-short",
         default=get_eval("REDIS_EXPIRE_SHORT", expire_short),
@@ -253,6 +732,56 @@ def add_redis_arguments(
         help=f"Verify mode of SSL Context (default: '{ssl_cert_reqs}')",
     )
 
+    parser.add_argument(
+        "--redis-queue-type",
+        choices=REDIS_QUEUE_TYPES,
+        default=get_eval("REDIS_QUEUE_TYPE", queue_type),
+        help=(
+            "Transport of the worker request queue. "
+            f"The '{REDIS_QUEUE_TYPE_FAIR}' queue is not available "
+            f"in '{REDIS_MODE_CLUSTER}' mode (default: '{queue_type}')"
+        ),
+    )
+    parser.add_argument(
+        "--redis-stream-group",
+        default=get_eval("REDIS_STREAM_GROUP", stream_group),
+        metavar="name",
+        help=f"Consumer group name of the stream queue (default: '{stream_group}')",
+    )
+    parser.add_argument(
+        "--redis-stream-consumer",
+        default=get_eval("REDIS_STREAM_CONSUMER"),
+        metavar="name",
+        help="Consumer name of the stream queue (default: '{hostname}-{pid}')",
+    )
+    parser.add_argument(
+        "--redis-stream-claim-idle",
+        default=get_eval("REDIS_STREAM_CLAIM_IDLE", stream_claim_idle),
+        metavar="sec",
+        type=float,
+        help=(
+            "Pending stream entries idle for longer than this are reclaimed "
+            f"(default: {stream_claim_idle:.2f})"
+        ),
+    )
+    parser.add_argument(
+        "--redis-stream-maxlen",
+        default=get_eval("REDIS_STREAM_MAXLEN", stream_maxlen),
+        metavar="len",
+        type=int,
+        help=f"Approximate maximum length of stream queue (default: {stream_maxlen})",
+    )
+    parser.add_argument(
+        "--redis-fair-weights",
+        default=get_eval("REDIS_FAIR_WEIGHTS"),
+        metavar="weights",
+        help=(
+            "Weights of the flows of the fair queue formatted as "
+            "'provider=weight,provider:channel=weight,...'. "
+            "Flows that are not listed have a weight of 1"
+        ),
+    )
+
 
 def add_s3_arguments(parser: ArgumentParser) -> None:
     parser.add_argument(
@@ -364,6 +893,7 @@ def add_discord_parser(subparsers) -> None:
     )
     assert isinstance(parser, ArgumentParser)
     _add_base_context_arguments(parser)
+    add_endpoint_arguments(parser)
     add_discord_arguments(parser)
 
 
@@ -377,6 +907,7 @@ def add_telegram_parser(subparsers) -> None:
     )
     assert isinstance(parser, ArgumentParser)
     _add_base_context_arguments(parser)
+    add_endpoint_arguments(parser)
     add_telegram_arguments(parser)
 
 
@@ -403,9 +934,23 @@ def add_worker_parser(subparsers) -> None:
     )
     assert isinstance(parser, ArgumentParser)
     _add_base_context_arguments(parser)
+    add_worker_arguments(parser)
     add_module_arguments(parser)
 
 
+def add_dlq_parser(subparsers) -> None:
+    # noinspection SpellCheckingInspection
+    parser = subparsers.add_parser(
+        name=CMD_DLQ,
+        help=CMD_DLQ_HELP,
+        formatter_class=RawDescriptionHelpFormatter,
+        epilog=CMD_DLQ_EPILOG,
+    )
+    assert isinstance(parser, ArgumentParser)
+    add_redis_arguments(parser)
+    add_dlq_arguments(parser)
+
+
 def default_argument_parser() -> ArgumentParser:
     parser = ArgumentParser(
         prog=PROG,
@@ -504,6 +1049,7 @@ def default_argument_parser() -> ArgumentParser:
     add_telegram_parser(subparsers)
     add_master_parser(subparsers)
     add_worker_parser(subparsers)
+    add_dlq_parser(subparsers)
     return parser
 
 
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+from math import inf, isinf
+from time import monotonic
+from typing import Dict, NamedTuple, Optional
+
+from osom_api.metrics.registry import MetricsRegistry, default_registry
+
+DEFAULT_DRAIN_RATE_ALPHA = 0.2
+DEFAULT_STALE_TIMEOUT = 1.0
+
+
+class QueueLimit(NamedTuple):
+    max_depth: int = 0
+    """Maximum depth of the queue. 0 is unlimited."""
+
+    max_wait: float = 0.0
+    """Maximum estimated waiting time in seconds. 0 is unlimited."""
+
+
+def parse_queue_limits(text: Optional[str]) -> Dict[str, QueueLimit]:
+    """
+    Parse per-worker thresholds formatted as 'name=depth[:wait],...'.
+    """
+
+    result: Dict[str, QueueLimit] = dict()
+    if not text:
+        return result
+
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+
+        name, sep, value = item.partition("=")
+        if not sep or not name:
+            raise ValueError(f"Invalid queue limit: '{item}'")
+
+        depth, _, wait = value.partition(":")
+        result[name.strip()] = QueueLimit(
+            max_depth=int(depth) if depth else 0,
+            max_wait=float(wait) if wait else 0.0,
+        )
+    return result
+
+
+class DrainRateEstimator:
+    """
+    Estimate the rate at which a queue is consumed from the depths observed on push.
+
+    Requests pushed by other endpoints in the meantime are seen as a slower drain,
+    so the estimate errs on the side of shedding.
+    """
+
+    _rate: Optional[float]
+    _observed_at: Optional[float]
+
+    def __init__(self, alpha=DEFAULT_DRAIN_RATE_ALPHA):
+        self._alpha = alpha
+        self._rate = None
+        self._depth = 0
+        self._observed_at = None
+
+    @property
+    def rate(self) -> Optional[float]:
+        return self._rate
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    @property
+    def observed_at(self) -> Optional[float]:
+        return self._observed_at
+
+    def observe(self, depth: int, now: Optional[float] = None) -> None:
+        """
+        :param depth: The queue depth right after pushing one request.
+        """
+
+        now = now if now is not None else monotonic()
+        if self._observed_at is not None and now > self._observed_at:
+            drained = max(self._depth + 1 - depth, 0)
+            sample = drained / (now - self._observed_at)
+            if self._rate is None:
+                self._rate = sample
+            else:
+                self._rate = self._alpha * sample + (1.0 - self._alpha) * self._rate
+
+        self._depth = depth
+        self._observed_at = now
+
+    def estimate_depth(self, now: Optional[float] = None) -> float:
+        if self._observed_at is None:
+            return 0.0
+        if not self._rate:
+            return float(self._depth)
+
+        now = now if now is not None else monotonic()
+        elapsed = max(now - self._observed_at, 0.0)
+        return max(self._depth - self._rate * elapsed, 0.0)
+
+    def estimate_wait(self, now: Optional[float] = None) -> Optional[float]:
+        """
+        :return: None until the rate is known, and infinity for a stalled queue.
+        """
+
+        if self._rate is None:
+            return None
+
+        depth = self.estimate_depth(now)
+        if depth <= 0:
+            return 0.0
+        if self._rate <= 0:
+            return inf
+        return depth / self._rate
+
+
+class AdmissionController:
+    """
+    Sheds requests for workers whose queue cannot serve them in time.
+
+    The depth limit is enforced atomically by the enqueue script,
+    and the waiting time limit is checked locally without a round trip.
+    An estimate older than ``stale_timeout`` is not trusted,
+    so that a worker is probed again once it may have recovered.
+    """
+
+    _names: Dict[str, str]
+    _estimators: Dict[str, DrainRateEstimator]
+
+    def __init__(
+        self,
+        max_depth=0,
+        max_wait=0.0,
+        limits: Optional[Dict[str, QueueLimit]] = None,
+        stale_timeout=DEFAULT_STALE_TIMEOUT,
+        registry: Optional[MetricsRegistry] = None,
+    ):
+        self._default = QueueLimit(max_depth, max_wait)
+        self._limits = dict(limits) if limits else dict()
+        self._stale_timeout = stale_timeout
+        self._names = dict()
+        self._estimators = dict()
+
+        metrics = registry if registry is not None else default_registry()
+        self._admitted = metrics.counter("endpoint.admission.admitted")
+        self._rejected = metrics.counter("endpoint.admission.rejected")
+
+    def register(self, path: str, name: str) -> None:
+        self._names[path] = name
+
+    def unregister(self, path: str) -> None:
+        self._names.pop(path, None)
+        prefix = path + "/"
+        for lane in [k for k in self._estimators if k == path or k.startswith(prefix)]:
+            self._estimators.pop(lane)
+
+    def limit(self, path: str) -> QueueLimit:
+        name = self._names.get(path)
+        if name is None:
+            return self._default
+        return self._limits.get(name, self._default)
+
+    def estimator(self, lane: str) -> DrainRateEstimator:
+        estimator = self._estimators.get(lane)
+        if estimator is None:
+            estimator = self._estimators[lane] = DrainRateEstimator()
+        return estimator
+
+    def check(
+        self,
+        path: str,
+        lane: Optional[str] = None,
+        now: Optional[float] = None,
+    ) -> Optional[str]:
+        """
+        :param path: The request path of the worker, which selects the limits.
+        :param lane: The priority lane, which has its own drain rate.
+        :return: The reason for rejection, or None if the request is admitted.
+        """
+
+        max_wait = self.limit(path).max_wait
+        if max_wait <= 0:
+            return None
+
+        estimator = self._estimators.get(lane if lane else path)
+        if estimator is None or estimator.observed_at is None:
+            return None
+
+        now = now if now is not None else monotonic()
+        if now - estimator.observed_at >= self._stale_timeout:
+            return None
+
+        wait = estimator.estimate_wait(now)
+        if wait is None or wait <= max_wait:
+            return None
+
+        if isinf(wait):
+            return f"Queue is not drained (limit: {max_wait:.1f}s)"
+        return f"Estimated waiting time is {wait:.1f}s (limit: {max_wait:.1f}s)"
+
+    def admit(self, lane: str, depth: int, now: Optional[float] = None) -> None:
+        self._admitted.inc()
+        self.estimator(lane).observe(depth, now)
+
+    def reject(self) -> None:
+        self._rejected.inc()
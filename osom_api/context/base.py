@@ -1,16 +1,25 @@
 # -*- coding: utf-8 -*-
 
 from inspect import iscoroutinefunction
-from typing import Awaitable, Callable, Dict, Optional, Union
+from io import BytesIO
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Union
 
 from overrides import override
 
 from osom_api.args import RedisArgs, S3Args, SupabaseArgs
 from osom_api.context.db import DbClient
 from osom_api.context.mq import MqClient, MqClientCallback
+from osom_api.context.mq.queue import create_mq_queue
 from osom_api.context.s3 import S3Client
 from osom_api.logging.logging import logger
-from osom_api.msg import MsgProvider
+from osom_api.msg import (
+    MsgFile,
+    MsgFlow,
+    MsgProvider,
+    MsgRequest,
+    MsgResponse,
+    MsgStorage,
+)
 from osom_api.utils.path.mq import encode_path
 
 SubscriberCallable = Callable[[bytes], Union[None, Awaitable[None]]]
@@ -44,6 +53,7 @@ class BaseContext(MqClientCallback):
             mq_callback=self,
             mq_subscribe_paths=list(self._subscribers.keys()),
         )
+        self._queue = create_mq_queue(self._mq, config)
         self._db = DbClient.from_args(config)
         self._s3 = S3Client.from_args(config)
 
@@ -92,6 +102,10 @@ class BaseContext(MqClientCallback):
     def mq(self):
         return self._mq
 
+    @property
+    def queue(self):
+        return self._queue
+
     @property
     def s3(self):
         return self._s3
@@ -99,3 +113,88 @@ class BaseContext(MqClientCallback):
     @property
     def db(self):
         return self._db
+
+    async def upload_msg_file(
+        self,
+        file: MsgFile,
+        msg_uuid: str,
+        flow: MsgFlow,
+        storage=MsgStorage.r2,
+    ) -> None:
+        if file.content is None:
+            raise BufferError("Empty file content")
+
+        await self._s3.upload_data(
+            data=BytesIO(file.content),
+            key=file.path,
+            content_type=file.content_type,
+        )
+        logger.info(f"Successfully uploaded file to S3: '{file.path}'")
+
+        await self._db.insert_file(
+            file_uuid=file.file_uuid,
+            provider=file.provider,
+            storage=storage,
+            name=file.name,
+            content_type=file.content_type,
+            native_id=file.native_id,
+            created_at=file.created_at.isoformat(),
+        )
+        logger.info(
+            "Successfully inserted file info to DB: "
+            f"'{file.file_uuid}' -> '{file.path}'"
+        )
+
+        await self._db.insert_msg2file(
+            msg_uuid=msg_uuid,
+            file_uuid=file.file_uuid,
+            flow=flow,
+        )
+        logger.info(
+            "Successfully inserted msg2file info to DB: "
+            f"'{msg_uuid}' -> {file.file_uuid}"
+        )
+
+    async def upload_msg_files(
+        self,
+        files: Iterable[MsgFile],
+        msg_uuid: str,
+        flow: MsgFlow,
+        storage=MsgStorage.r2,
+    ) -> None:
+        for file in files:
+            await self.upload_msg_file(file, msg_uuid, flow, storage)
+
+    async def upload_msg_request(self, message: MsgRequest) -> None:
+        await self._db.insert_msg(
+            msg_uuid=message.msg_uuid,
+            provider=message.provider,
+            message_id=message.message_id,
+            channel_id=message.channel_id,
+            username=message.username,
+            nickname=message.nickname,
+            content=message.content,
+            created_at=message.created_at.isoformat(),
+        )
+        logger.info(f"Successfully inserted msg_request to DB: '{message.msg_uuid}'")
+
+        await self.upload_msg_files(
+            files=message.files,
+            msg_uuid=message.msg_uuid,
+            flow=MsgFlow.request,
+        )
+
+    async def upload_msg_response(self, message: MsgResponse) -> None:
+        await self._db.insert_reply(
+            msg=message.msg_uuid,
+            content=message.content,
+            error=message.error,
+            created_at=message.created_at.isoformat(),
+        )
+        logger.info(f"Successfully inserted msg_response to DB: '{message.msg_uuid}'")
+
+        await self.upload_msg_files(
+            files=message.files,
+            msg_uuid=message.msg_uuid,
+            flow=MsgFlow.response,
+        )
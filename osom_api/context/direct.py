@@ -0,0 +1,515 @@
+# -*- coding: utf-8 -*-
+
+from asyncio import (
+    Future,
+    Lock,
+    Semaphore,
+    StreamReader,
+    StreamWriter,
+    Task,
+    create_task,
+    current_task,
+    gather,
+    get_running_loop,
+    open_connection,
+    open_unix_connection,
+    start_server,
+    start_unix_server,
+    wait_for,
+)
+from asyncio.base_events import Server
+from asyncio.exceptions import CancelledError, IncompleteReadError, TimeoutError
+from enum import IntEnum, unique
+from os import path, remove, stat
+from stat import S_ISSOCK
+from struct import Struct
+from typing import Awaitable, Callable, Dict, Final, Optional, Set, Tuple
+
+from osom_api.exceptions import ResponseTimeoutError, TransportError
+from osom_api.logging.logging import logger
+from osom_api.memory.shared_memory_ring import RingSlot, SharedMemoryRing
+from osom_api.msg import MsgRequest, MsgResponse
+from osom_api.uri.host_port import CLOSING_IPV6, OPENING_IPV6
+from osom_api.uri.rpc_uri import RpcAddress, parse_rpc_address_as_class
+
+FRAME_HEADER: Final = Struct(">IB")
+"""
+Size of the frame body and the kind of the frame.
+"""
+
+RING_SLOT: Final = Struct(">QQ")
+
+DEFAULT_MAX_FRAME_SIZE: Final[int] = 64 * 1024 * 1024
+"""
+Requests carry the contents of the attached files, so frames can be large.
+"""
+
+DEFAULT_RING_THRESHOLD: Final[int] = 64 * 1024
+"""
+Smaller messages are cheaper to send through the socket.
+"""
+
+
+@unique
+class FrameKind(IntEnum):
+    inline = 0
+    """The body is the message."""
+
+    ring = 1
+    """The body is the slot of the message in the ring of the sender."""
+
+    attach = 2
+    """The body is the name of the ring of the sender."""
+
+
+DirectHandler = Callable[[MsgRequest], Awaitable[MsgResponse]]
+
+
+def _host_port(address: RpcAddress) -> Tuple[str, int]:
+    if address.is_dns:
+        host, port = address.host, address.port
+    else:
+        first = address.addresses[0]
+        host, port = first.address, first.port
+
+    if host.startswith(OPENING_IPV6) and host.endswith(CLOSING_IPV6):
+        host = host[1:-1]
+    if port is None:
+        raise ValueError(f"Direct transport requires a port: '{address}'")
+    return host, port
+
+
+def _unix_path(address: RpcAddress) -> str:
+    if address.is_unix:
+        return address.path
+    else:
+        assert address.is_unix_abstract
+        return "\0" + address.abstract_path
+
+
+def is_local_address(uri: str) -> bool:
+    """
+    Only the peers of a Unix domain socket are sure to share the memory.
+    """
+
+    address = parse_rpc_address_as_class(uri)
+    return address.is_unix or address.is_unix_abstract
+
+
+async def open_direct_connection(uri: str) -> Tuple[StreamReader, StreamWriter]:
+    address = parse_rpc_address_as_class(uri)
+    if address.is_unix or address.is_unix_abstract:
+        return await open_unix_connection(_unix_path(address))
+    else:
+        host, port = _host_port(address)
+        return await open_connection(host, port)
+
+
+async def start_direct_server(uri: str, callback) -> Server:
+    address = parse_rpc_address_as_class(uri)
+    if address.is_unix:
+        # A socket file left by a crashed process would fail the bind.
+        if path.exists(address.path) and S_ISSOCK(stat(address.path).st_mode):
+            remove(address.path)
+        return await start_unix_server(callback, address.path)
+    elif address.is_unix_abstract:
+        return await start_unix_server(callback, _unix_path(address))
+    else:
+        host, port = _host_port(address)
+        return await start_server(callback, host, port)
+
+
+def encode_frame_header(kind: FrameKind, size: int) -> bytes:
+    return FRAME_HEADER.pack(size, kind)
+
+
+async def read_frame(
+    reader: StreamReader,
+    max_size=DEFAULT_MAX_FRAME_SIZE,
+) -> Tuple[FrameKind, bytes]:
+    """
+    :raise IncompleteReadError: The connection was closed.
+    """
+
+    header = await reader.readexactly(FRAME_HEADER.size)
+    size, kind = FRAME_HEADER.unpack(header)
+    if size > max_size:
+        raise TransportError(f"Frame is too large ({size} > {max_size} bytes)")
+
+    try:
+        frame_kind = FrameKind(kind)
+    except ValueError as e:
+        raise TransportError(f"Unknown frame kind: {kind}") from e
+
+    return frame_kind, await reader.readexactly(size)
+
+
+class DirectChannel:
+    """
+    Messages sent in either direction of a direct connection.
+
+    When both peers have a ring, large messages are written to the ring of the sender
+    and only their slots go through the socket, which keeps the order of the
+    messages and wakes up the receiver. If the ring is full, the message is sent
+    through the socket instead.
+    """
+
+    _local_ring: Optional[SharedMemoryRing]
+    _peer_ring: Optional[SharedMemoryRing]
+
+    def __init__(
+        self,
+        reader: StreamReader,
+        writer: StreamWriter,
+        ring_size=0,
+        ring_threshold=DEFAULT_RING_THRESHOLD,
+        max_frame_size=DEFAULT_MAX_FRAME_SIZE,
+    ):
+        self._reader = reader
+        self._writer = writer
+        self._ring_size = ring_size
+        self._ring_threshold = ring_threshold
+        self._max_frame_size = max_frame_size
+        self._local_ring = None
+        self._peer_ring = None
+        self._lock = Lock()
+
+    @property
+    def closing(self) -> bool:
+        return self._writer.is_closing()
+
+    @property
+    def shared(self) -> bool:
+        return self._local_ring is not None and self._peer_ring is not None
+
+    async def _write(self, kind: FrameKind, data: bytes) -> None:
+        self._writer.write(encode_frame_header(kind, len(data)))
+        self._writer.write(data)
+        await self._writer.drain()
+
+    async def attach_ring(self) -> None:
+        """
+        Create the ring of this side and announce it to the peer.
+        """
+
+        if self._ring_size <= 0 or self._local_ring is not None:
+            return
+
+        self._local_ring = SharedMemoryRing.create(self._ring_size)
+        async with self._lock:
+            await self._write(FrameKind.attach, self._local_ring.name.encode())
+
+    def _on_attach(self, data: bytes) -> None:
+        if self._peer_ring is not None:
+            self._peer_ring.close()
+        self._peer_ring = SharedMemoryRing.attach(data.decode())
+
+    async def send(self, data: bytes) -> None:
+        async with self._lock:
+            if self._local_ring is not None and self._peer_ring is not None:
+                if len(data) >= self._ring_threshold:
+                    slot = self._local_ring.write(data)
+                    if slot is not None:
+                        await self._write(FrameKind.ring, RING_SLOT.pack(*slot))
+                        return
+
+            await self._write(FrameKind.inline, data)
+
+    async def recv(self) -> bytes:
+        """
+        :raise IncompleteReadError: The connection was closed.
+        """
+
+        while True:
+            kind, data = await read_frame(self._reader, self._max_frame_size)
+            if kind == FrameKind.inline:
+                return data
+            elif kind == FrameKind.ring:
+                if self._peer_ring is None:
+                    raise TransportError("Ring frame before the ring is attached")
+                # [IMPORTANT]
+                # The slots are read in the order they arrive,
+                # since the tail of the ring only moves forward.
+                return self._peer_ring.read(RingSlot(*RING_SLOT.unpack(data)))
+            elif kind == FrameKind.attach:
+                self._on_attach(data)
+                # The peer that accepts a ring answers with its own.
+                await self.attach_ring()
+            else:
+                assert False, "Inaccessible section"
+
+    def close(self) -> None:
+        self._writer.close()
+        if self._local_ring is not None:
+            self._local_ring.close()
+            self._local_ring = None
+        if self._peer_ring is not None:
+            self._peer_ring.close()
+            self._peer_ring = None
+
+
+class DirectServer:
+    """
+    Serves requests sent straight from the endpoints, without the message queue.
+
+    Each frame is one encoded request, and requests on a connection run concurrently.
+    The responses are written back in the order they complete,
+    and the endpoint matches them by the message UUID.
+
+    At most ``concurrency`` requests run at once over all connections,
+    and the next frame of a connection is left unread until a slot is free.
+    """
+
+    _server: Optional[Server]
+    _tasks: Set[Task[None]]
+    _channels: Dict[DirectChannel, Task]
+
+    def __init__(
+        self,
+        uri: str,
+        handler: DirectHandler,
+        ring_size=0,
+        max_frame_size=DEFAULT_MAX_FRAME_SIZE,
+        concurrency=1,
+    ):
+        self._uri = uri
+        self._handler = handler
+        self._ring_size = ring_size if is_local_address(uri) else 0
+        self._max_frame_size = max_frame_size
+        self._concurrency = max(concurrency, 1)
+        self._slots = Semaphore(self._concurrency)
+        self._server = None
+        self._tasks = set()
+        self._channels = dict()
+
+    @property
+    def uri(self):
+        return self._uri
+
+    @property
+    def concurrency(self) -> int:
+        return self._concurrency
+
+    @property
+    def active_count(self) -> int:
+        return len(self._tasks)
+
+    def _request_done(self, task: Task) -> None:
+        self._tasks.discard(task)
+        self._slots.release()
+
+    async def open(self) -> None:
+        assert self._server is None
+        self._server = await start_direct_server(self._uri, self._on_connection)
+        logger.info(f"Direct server is listening on '{self._uri}'")
+
+    async def close(self) -> None:
+        if self._server is None:
+            return
+
+        self._server.close()
+        for task in list(self._tasks):
+            task.cancel()
+        await gather(*self._tasks, return_exceptions=True)
+
+        # [IMPORTANT]
+        # The server does not close the accepted connections by itself,
+        # and the endpoints notice the shutdown only by the closed connections.
+        handlers = list(self._channels.values())
+        for channel in list(self._channels.keys()):
+            channel.close()
+        await gather(*handlers, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+        address = parse_rpc_address_as_class(self._uri)
+        if address.is_unix and path.exists(address.path):
+            remove(address.path)
+        logger.info(f"Direct server is closed: '{self._uri}'")
+
+    async def _on_connection(self, reader: StreamReader, writer: StreamWriter):
+        channel = DirectChannel(
+            reader,
+            writer,
+            ring_size=self._ring_size,
+            max_frame_size=self._max_frame_size,
+        )
+        handler = current_task()
+        assert handler is not None
+        self._channels[channel] = handler
+        try:
+            while True:
+                data = await channel.recv()
+                # [IMPORTANT]
+                # Wait for a free slot before reading the next frame,
+                # so that a flood of requests is held back in the socket.
+                await self._slots.acquire()
+                task = create_task(self._on_request(data, channel))
+                self._tasks.add(task)
+                task.add_done_callback(self._request_done)
+        except IncompleteReadError:
+            pass
+        except CancelledError:
+            raise
+        except BaseException as e:
+            logger.error(f"Direct connection error: {e}")
+        finally:
+            self._channels.pop(channel, None)
+            channel.close()
+
+    async def _on_request(self, data: bytes, channel: DirectChannel) -> None:
+        try:
+            request = MsgRequest.decode(data)
+        except BaseException as e:
+            logger.error(f"Direct request decoding fail: {e}")
+            return
+
+        response = await self._handler(request)
+        if channel.closing:
+            logger.warning(f"Msg({request.msg_uuid}) Direct connection is closed")
+            return
+        await channel.send(response.encode())
+
+
+class DirectClient:
+    """
+    A single reused connection to a worker, shared by all in-flight requests.
+
+    A broken connection fails the requests waiting on it,
+    and the next request opens a new one.
+    """
+
+    _channel: Optional[DirectChannel]
+    _reader_task: Optional[Task[None]]
+    _pending: Dict[str, Future[MsgResponse]]
+
+    def __init__(
+        self,
+        uri: str,
+        ring_size=0,
+        max_frame_size=DEFAULT_MAX_FRAME_SIZE,
+    ):
+        self._uri = uri
+        self._ring_size = ring_size if is_local_address(uri) else 0
+        self._max_frame_size = max_frame_size
+        self._channel = None
+        self._reader_task = None
+        self._pending = dict()
+        self._connect_lock = Lock()
+
+    @property
+    def uri(self):
+        return self._uri
+
+    @property
+    def connected(self) -> bool:
+        return self._channel is not None and not self._channel.closing
+
+    @property
+    def shared(self) -> bool:
+        return self._channel is not None and self._channel.shared
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    async def connect(self) -> DirectChannel:
+        async with self._connect_lock:
+            if self._channel is not None and not self._channel.closing:
+                return self._channel
+
+            reader, writer = await open_direct_connection(self._uri)
+            channel = DirectChannel(
+                reader,
+                writer,
+                ring_size=self._ring_size,
+                max_frame_size=self._max_frame_size,
+            )
+            try:
+                await channel.attach_ring()
+            except BaseException:
+                channel.close()
+                raise
+
+            self._channel = channel
+            self._reader_task = create_task(self._reader_main(channel))
+            logger.info(f"Direct connection to '{self._uri}' is opened")
+            return channel
+
+    async def _reader_main(self, channel: DirectChannel):
+        error: BaseException
+        try:
+            while True:
+                data = await channel.recv()
+                self._on_response(data)
+        except CancelledError:
+            error = TransportError(f"Direct connection to '{self._uri}' is closed")
+            raise
+        except IncompleteReadError:
+            error = TransportError(f"Direct connection to '{self._uri}' was lost")
+        except BaseException as e:
+            error = TransportError(f"Direct connection to '{self._uri}' failed: {e}")
+        finally:
+            channel.close()
+            if self._channel is channel:
+                self._channel = None
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+
+    def _on_response(self, data: bytes) -> None:
+        try:
+            response = MsgResponse.decode(data)
+        except BaseException as e:
+            logger.error(f"Direct response decoding fail: {e}")
+            return
+
+        future = self._pending.pop(response.msg_uuid, None)
+        if future is None:
+            logger.warning(f"Msg({response.msg_uuid}) No one is waiting for a reply")
+            return
+
+        if not future.done():
+            future.set_result(response)
+
+    async def request(
+        self,
+        request: MsgRequest,
+        timeout: Optional[float] = None,
+    ) -> MsgResponse:
+        """
+        :raise TransportError: The request could not be delivered,
+            or the connection was lost before the response arrived.
+        """
+
+        msg_uuid = request.msg_uuid
+        data = request.encode()
+
+        try:
+            channel = await self.connect()
+        except OSError as e:
+            raise TransportError(f"Direct connection to '{self._uri}' failed") from e
+
+        future = get_running_loop().create_future()
+        self._pending[msg_uuid] = future
+        try:
+            await channel.send(data)
+            return await wait_for(future, timeout=timeout)
+        except TimeoutError as e:
+            raise ResponseTimeoutError(
+                f"Msg({msg_uuid}) Response timeout from '{self._uri}'"
+            ) from e
+        except (OSError, ConnectionError) as e:
+            raise TransportError(f"Direct request to '{self._uri}' failed") from e
+        finally:
+            self._pending.pop(msg_uuid, None)
+
+    async def close(self) -> None:
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            await gather(self._reader_task, return_exceptions=True)
+            self._reader_task = None
+        if self._channel is not None:
+            self._channel.close()
+            self._channel = None
@@ -1,25 +1,57 @@
 # -*- coding: utf-8 -*-
 
+from asyncio import Future, Task, create_task, get_running_loop, sleep, wait_for
+from asyncio.exceptions import CancelledError, TimeoutError
+from functools import partial
 from io import StringIO
-from typing import Awaitable, Callable, Dict, Optional
+from math import floor
+from time import monotonic
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional
+from uuid import uuid4
 
 from overrides import override
 
-from osom_api.arguments import VERBOSE_LEVEL_1
+from osom_api.args import EndpointArgs
+from osom_api.arguments import DEFAULT_ENDPOINT_HEARTBEAT_TIMEOUT, VERBOSE_LEVEL_1
 from osom_api.arguments import version as osom_version
+from osom_api.chrono.datetime import tznow
 from osom_api.commands import EndpointCommands
+from osom_api.context.admission import AdmissionController, parse_queue_limits
 from osom_api.context.base import BaseContext, BaseContextConfig
-from osom_api.exceptions import MsgError
+from osom_api.context.direct import DirectClient
+from osom_api.context.flight import SingleFlight
+from osom_api.context.mq.lanes import parse_command_priorities
+from osom_api.context.mq.queue import MqFlow
+from osom_api.context.mq.registry import MqWorkerRegistry
+from osom_api.context.routing import WorkerRouter
+from osom_api.exceptions import (
+    InvalidMessageIdError,
+    MsgError,
+    QueueFullError,
+    ResponseTimeoutError,
+    TransportError,
+)
 from osom_api.logging.logging import logger
-from osom_api.msg import MsgProvider, MsgRequest, MsgResponse
+from osom_api.metrics.registry import default_registry
+from osom_api.msg import MsgHeartbeat, MsgProvider, MsgRequest, MsgResponse
 from osom_api.msg.worker import MsgWorker
 from osom_api.paths import (
     MQ_BROADCAST_PATH,
+    MQ_CANCEL_PATH,
+    MQ_FLIGHT_PATH,
+    MQ_HEARTBEAT_WORKER_PATH,
     MQ_REGISTER_WORKER_PATH,
     MQ_REGISTER_WORKER_REQUEST_PATH,
     MQ_UNREGISTER_WORKER_PATH,
 )
-from osom_api.utils.path.mq import encode_path, make_response_path
+from osom_api.utils.path.mq import encode_path, make_lane_path, make_reply_path
+from osom_api.worker.module import Module
+
+
+class EndpointContextConfig(BaseContextConfig, EndpointArgs):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.assert_endpoint_properties()
 
 
 class CommandCallable:
@@ -39,26 +71,208 @@ class CommandCallable:
         return await self.callback(request, self.request_path)
 
 
+class PendingRequest(NamedTuple):
+    request: MsgRequest
+    path: str
+
+
 class EndpointContext(BaseContext):
-    _workers: Dict[str, MsgWorker]
     _commands: Dict[str, CommandCallable]
+    _direct: Dict[str, DirectClient]
+    _pending: Dict[str, PendingRequest]
+    _replies: Dict[str, Future[MsgResponse]]
+    _reply_task: Optional[Task[None]]
 
-    def __init__(self, provider: MsgProvider, config: BaseContextConfig):
+    def __init__(self, provider: MsgProvider, config: EndpointContextConfig):
         super().__init__(
             provider=provider,
             config=config,
             subscribers={
                 MQ_BROADCAST_PATH: self.on_broadcast,
+                MQ_FLIGHT_PATH: self.on_flight,
+                MQ_HEARTBEAT_WORKER_PATH: self.on_heartbeat_worker,
                 MQ_REGISTER_WORKER_PATH: self.on_register_worker,
                 MQ_UNREGISTER_WORKER_PATH: self.on_unregister_worker,
             },
         )
 
-        self._workers = dict()
+        self._worker_router = WorkerRouter(config.endpoint_heartbeat_timeout)
+        self._register_requested_at: Optional[float] = None
+        self._registry = MqWorkerRegistry(self._mq)
+        self._registry_version = 0
         self._commands = dict()
         self._commands[EndpointCommands.version] = CommandCallable(self.on_cmd_version)
         self._commands[EndpointCommands.help] = CommandCallable(self.on_cmd_help)
 
+        self._blocking_timeout = floor(config.redis_blocking_timeout)
+        self._endpoint_uuid = str(uuid4())
+        self._reply_path = make_reply_path(self._endpoint_uuid)
+        self._replies = dict()
+        self._pending = dict()
+        self._reply_task = None
+        self._request_timeout = config.endpoint_request_timeout
+        self._metrics = default_registry()
+        self._cancelled = self._metrics.counter("endpoint.request.cancelled")
+        self._admission = AdmissionController(
+            max_depth=config.endpoint_max_queue_depth,
+            max_wait=config.endpoint_max_queue_wait,
+            limits=parse_queue_limits(config.endpoint_queue_limits),
+        )
+        self._priorities = parse_command_priorities(config.endpoint_priorities)
+        self._local: Optional[Module]
+        self._local_worker: Optional[MsgWorker]
+        if config.endpoint_local_worker:
+            self._local = Module(config.endpoint_local_worker)
+            self._local.init()
+            self._local_worker = MsgWorker(
+                name=self._local.name,
+                version=self._local.version,
+                doc=self._local.doc,
+                path=self._local.path,
+                cmds=self._local.cmds,
+            )
+            self._local_commands = {cmd.key for cmd in self._local.cmds}
+        else:
+            self._local = None
+            self._local_worker = None
+            self._local_commands = set()
+
+        self._direct_enabled = config.endpoint_direct
+        self._direct_ring_size = config.endpoint_direct_ring_size
+        self._direct = dict()
+
+        self._flight: Optional[SingleFlight]
+        if config.endpoint_single_flight:
+            self._flight = SingleFlight(self._mq, self._request_timeout)
+        else:
+            self._flight = None
+
+    @property
+    def endpoint_uuid(self):
+        return self._endpoint_uuid
+
+    @property
+    def reply_path(self):
+        return self._reply_path
+
+    @override
+    async def open_base_context(self) -> None:
+        await super().open_base_context()
+        if self._local is not None:
+            await self._local.open(self)
+            logger.info(f"Opened the local worker: '{self._local.name}'")
+
+        if not self._mq.has_redis:
+            return
+
+        assert self._reply_task is None
+        self._reply_task = create_task(self._reply_main(), name="EndpointReplyTask")
+
+    @override
+    async def close_base_context(self) -> None:
+        if self._reply_task is not None:
+            self._reply_task.cancel()
+            try:
+                await self._reply_task
+            except CancelledError:
+                pass
+            self._reply_task = None
+
+        # Workers stop the requests nobody is going to read.
+        for msg_uuid in list(self._pending.keys()):
+            await self.cancel_request(msg_uuid, "Endpoint is shutting down")
+
+        for future in self._replies.values():
+            if not future.done():
+                future.cancel()
+        self._replies.clear()
+
+        for client in self._direct.values():
+            await client.close()
+        self._direct.clear()
+
+        if self._local is not None and self._local.opened:
+            await self._local.close()
+            logger.info(f"Closed the local worker: '{self._local.name}'")
+
+        await super().close_base_context()
+
+    async def _reply_main(self) -> None:
+        timeout = self._blocking_timeout
+        logger.info(f"Start reading replies from '{self._reply_path}' ...")
+
+        failures = 0
+        while True:
+            try:
+                packet = await self._mq.brpop_bytes(self._reply_path, timeout)
+            except CancelledError:
+                raise
+            except BaseException as e:
+                delay = self._mq.reconnect_delay(failures)
+                failures += 1
+                logger.error(f"Reply reading error: {e}")
+                logger.warning(f"Retry reading replies in {delay:.2f}s (#{failures})")
+                await sleep(delay)
+                continue
+
+            failures = 0
+
+            if packet is None:
+                continue
+
+            assert isinstance(packet, tuple)
+            assert len(packet) == 2
+            assert packet[0] == encode_path(self._reply_path)
+            self.on_reply(packet[1])
+
+    def on_reply(self, data: bytes) -> None:
+        try:
+            response = MsgResponse.decode(data)
+        except BaseException as e:
+            logger.error(f"Reply packet decoding fail: {e}")
+            return
+
+        future = self._replies.pop(response.msg_uuid, None)
+        if future is None:
+            logger.warning(f"Msg({response.msg_uuid}) No one is waiting for a reply")
+            return
+
+        if not future.done():
+            future.set_result(response)
+
+    async def publish_cancel(self, pending: PendingRequest) -> None:
+        msg_uuid = pending.request.msg_uuid
+        try:
+            # [IMPORTANT]
+            # Consuming the marker drops the request if it is still in the queue,
+            # and the channel reaches the worker if it is already running.
+            await self._queue.consume_marker(pending.path, msg_uuid)
+            await self._mq.publish(MQ_CANCEL_PATH, msg_uuid.encode(), flush=True)
+        except BaseException as e:
+            logger.error(f"Msg({msg_uuid}) Cancellation publish failed: {e}")
+
+    async def cancel_request(self, msg_uuid: str, reason: str) -> bool:
+        pending = self._pending.pop(msg_uuid, None)
+        if pending is None:
+            return False
+
+        logger.warning(f"Msg({msg_uuid}) Cancel request to '{pending.path}': {reason}")
+        self._cancelled.inc()
+
+        future = self._replies.get(msg_uuid)
+        if future is not None and not future.done():
+            future.set_result(MsgResponse.from_cancelled(msg_uuid, reason))
+
+        await self.publish_cancel(pending)
+        return True
+
+    async def cancel_message(self, channel_id: int, message_id: int) -> bool:
+        for msg_uuid, pending in list(self._pending.items()):
+            request = pending.request
+            if request.channel_id == channel_id and request.message_id == message_id:
+                return await self.cancel_request(msg_uuid, "Message was deleted")
+        return False
+
     async def publish_register_worker_request(self) -> None:
         await self._mq.publish(
             key=MQ_REGISTER_WORKER_REQUEST_PATH,
@@ -66,14 +280,75 @@ class EndpointContext(BaseContext):
         )
         logger.info("Published a packet requesting worker information ...")
 
+    async def load_worker_registry(self) -> bool:
+        """
+        :return: False if the registry is empty or could not be loaded.
+        """
+
+        try:
+            snapshot = await self._registry.snapshot()
+        except BaseException as e:
+            logger.error(f"Worker registry loading failed: {e}")
+            return False
+
+        self._registry_version = snapshot.version
+        count = 0
+        for worker in snapshot.workers:
+            if worker.heartbeat_interval <= 0:
+                # [IMPORTANT]
+                # An entry that never heartbeats could not be expired after a crash,
+                # so it is pruned instead of routing to a possibly dead instance.
+                await self.prune_worker_registry(worker)
+                continue
+            self.register_worker(worker)
+            count += 1
+
+        logger.info(f"Loaded {count} worker instances (v{snapshot.version})")
+        return count >= 1
+
+    async def prune_worker_registry(self, worker: MsgWorker) -> None:
+        try:
+            await self._registry.unregister(worker.name, worker.instance)
+        except BaseException as e:
+            logger.error(f"Worker registry pruning failed: {e}")
+        else:
+            logger.warning(f"Pruned worker without heartbeats: {worker.instance}")
+
+    async def reload_worker_registry(self) -> bool:
+        """
+        :return: True if the registry has changed since it was loaded.
+        """
+
+        try:
+            version = await self._registry.version()
+        except BaseException as e:
+            logger.error(f"Worker registry version check failed: {e}")
+            return False
+
+        if version == self._registry_version:
+            return False
+
+        await self.load_worker_registry()
+        return True
+
     @override
     async def on_mq_connect(self) -> None:
         logger.info("Connection to redis was successful in the endpoint context")
+
+        # [IMPORTANT]
+        # Asking every worker to register again is left for an empty registry,
+        # so that endpoints restarting together do not flood the workers.
+        if await self.load_worker_registry():
+            return
         await self.publish_register_worker_request()
 
     async def on_broadcast(self, data: bytes) -> None:
         pass
 
+    async def on_flight(self, data: bytes) -> None:
+        if self._flight is not None:
+            self._flight.on_done(data)
+
     async def on_register_worker(self, data: bytes) -> None:
         try:
             worker = MsgWorker.decode(data)
@@ -81,39 +356,92 @@ class EndpointContext(BaseContext):
             logger.error(e)
             return
 
-        if worker.name in self._workers:
-            logger.warning(f"Overwrite and register a new worker: '{worker.name}'")
-            self.unregister_worker(worker.name)
-        else:
-            logger.info(f"Register a new worker: '{worker.name}'")
-
+        logger.info(f"Register a worker instance: {worker}")
         self.register_worker(worker)
 
     async def on_unregister_worker(self, data: bytes) -> None:
         try:
-            name = str(data, encoding="utf-8")
+            heartbeat = MsgHeartbeat.decode(data)
         except BaseException as e:
             logger.error(e)
             return
 
-        if name in self._workers:
-            logger.info(f"Unregister worker: '{name}'")
-            self.unregister_worker(name)
-        else:
-            logger.warning(f"Unregister worker: '{name}' (but does not exist)")
+        logger.info(f"Unregister a worker instance: {heartbeat}")
+        self.unregister_worker(heartbeat.name, heartbeat.instance)
 
-    def register_worker(self, worker: MsgWorker) -> None:
-        self._workers[worker.name] = worker
-        for cmd in worker.cmds:
-            self._commands[cmd.key] = CommandCallable(self.on_cmd_worker, worker.path)
+    async def on_heartbeat_worker(self, data: bytes) -> None:
+        try:
+            heartbeat = MsgHeartbeat.decode(data)
+        except BaseException as e:
+            logger.error(e)
+            return
+
+        if self._worker_router.heartbeat(heartbeat):
+            return
+
+        if await self.reload_worker_registry() and self._worker_router.heartbeat(
+            heartbeat
+        ):
+            return
+
+        # [IMPORTANT]
+        # The registration of the instance was missed or has expired,
+        # so the workers are asked to register again, at most once a timeout.
+        logger.warning(f"Heartbeat from an unregistered worker instance: {heartbeat}")
+        now = monotonic()
+        interval = self._worker_router.timeout or DEFAULT_ENDPOINT_HEARTBEAT_TIMEOUT
+        last = self._register_requested_at
+        if last is None or now - last >= interval:
+            self._register_requested_at = now
+            await self.publish_register_worker_request()
 
-    def unregister_worker(self, worker_name: str) -> None:
-        if worker_name not in self._workers:
+    def register_worker(self, worker: MsgWorker) -> None:
+        if self._worker_router.register(worker):
+            logger.info(f"Open a new worker pool: '{worker.name}'")
+            self._admission.register(worker.path, worker.name)
+
+    def unregister_worker(self, worker_name: str, instance: str) -> None:
+        pool = self._worker_router.get(worker_name)
+        if pool is None:
+            logger.warning(f"Unregister worker: '{worker_name}' (but does not exist)")
             return
 
-        for cmd in self._workers.pop(worker_name).cmds:
-            if cmd.key in self._commands:
-                self._commands.pop(cmd.key)
+        if self._worker_router.unregister(worker_name, instance):
+            logger.info(f"Close the worker pool: '{worker_name}'")
+            self._admission.unregister(pool.path)
+
+    async def expire_workers(self) -> None:
+        for pool, instance in self._worker_router.expire():
+            logger.warning(
+                f"Remove the worker instance without heartbeats: {pool.name}:{instance}"
+            )
+            if pool.refcount == 0:
+                self._admission.unregister(pool.path)
+
+            try:
+                await self._registry.unregister(pool.name, instance)
+            except BaseException as e:
+                logger.error(f"Worker registry update failed: {e}")
+
+    async def find_command(self, command: str) -> Optional[CommandCallable]:
+        builtin = self._commands.get(command)
+        if builtin is not None:
+            return builtin
+
+        if command in self._local_commands:
+            return CommandCallable(self.on_cmd_local)
+
+        await self.expire_workers()
+        pool = self._worker_router.route(command)
+        if pool is None:
+            return None
+
+        if self._direct_enabled:
+            address = pool.direct_address()
+            if address:
+                return CommandCallable(partial(self.on_cmd_direct, address), pool.path)
+
+        return CommandCallable(self.on_cmd_worker, pool.path)
 
     @property
     def version(self):
@@ -129,7 +457,9 @@ class EndpointContext(BaseContext):
         buffer.write(f"{version_command} - Show help message\n")
         buffer.write(f"{help_command} - Show version number\n")
 
-        workers = list(self._workers.values())
+        workers = [pool.worker for pool in self._worker_router.pools]
+        if self._local_worker is not None:
+            workers.insert(0, self._local_worker)
         if len(workers) >= 1:
             buffer.write(workers[0].as_help(self.command_prefix).strip())
         for worker in workers[1:]:
@@ -145,23 +475,138 @@ class EndpointContext(BaseContext):
         assert not path
         return MsgResponse(request.msg_uuid, self.help)
 
-    async def on_cmd_worker(self, request: MsgRequest, path: str) -> MsgResponse:
-        request_data = request.encode()
-        await self._mq.lpush_bytes(path, request_data, expire=30)
+    async def on_cmd_local(self, request: MsgRequest, path: str) -> MsgResponse:
+        """
+        Run the command of the local worker with a direct call.
 
-        response_path = make_response_path(request.msg_uuid)
-        response_datas = await self._mq.brpop_bytes(response_path, timeout=10)
+        The request and response are recorded the same way as in the worker process,
+        and failures are replied as errors, as the worker does.
+        """
 
-        assert isinstance(response_datas, tuple)
-        assert len(response_datas) == 2
+        assert not path
+        assert self._local is not None
 
-        recv_key = response_datas[0]
-        recv_data = response_datas[1]
-        assert isinstance(recv_key, bytes)
-        assert isinstance(recv_data, bytes)
-        assert recv_key == encode_path(response_path)
+        try:
+            await self.upload_msg_request(request)
+            response = await self._local.run(request)
+            await self.upload_msg_response(response)
+
+            if response.msg_uuid != request.msg_uuid:
+                raise InvalidMessageIdError(
+                    "The UUID in the request message and "
+                    "the UUID in the response message must be the same"
+                )
+        except BaseException as e:
+            logger.error(f"Msg({request.msg_uuid}) Local worker failed: {e}")
+            if self.debug:
+                logger.exception(e)
+            return MsgResponse(request.msg_uuid, error=str(e))
+
+        return response
+
+    async def on_cmd_worker(self, request: MsgRequest, path: str) -> MsgResponse:
+        lane = make_lane_path(path, request.priority)
+        reason = self._admission.check(path, lane)
+        if reason is not None:
+            self._admission.reject()
+            logger.warning(
+                f"Msg({request.msg_uuid}) Shed request to '{path}': {reason}"
+            )
+            return MsgResponse.from_busy(request.msg_uuid, reason)
+
+        timeout = self._request_timeout
+        request.reply_path = self._reply_path
+        now = tznow()
+        request.queued_at = now
+        request.set_timeout(timeout, now)
+        request_data = request.encode()
+        max_depth = self._admission.limit(path).max_depth
 
-        return MsgResponse.decode(recv_data)
+        future = get_running_loop().create_future()
+        self._replies[request.msg_uuid] = future
+        self._pending[request.msg_uuid] = PendingRequest(request, path)
+        try:
+            try:
+                depth = await self._queue.push(
+                    path,
+                    request_data,
+                    request.msg_uuid,
+                    expire=timeout,
+                    maxdepth=max_depth,
+                    priority=request.priority,
+                    flow=MqFlow.from_request(request),
+                )
+            except QueueFullError as e:
+                self._admission.reject()
+                logger.warning(f"Msg({request.msg_uuid}) Shed request: {e}")
+                return MsgResponse.from_busy(request.msg_uuid, str(e))
+
+            self._admission.admit(lane, depth)
+            self._metrics.gauge(f"mq.queue.{lane}.depth").set(depth)
+            return await wait_for(future, timeout=timeout)
+        except TimeoutError as e:
+            await self.cancel_request(request.msg_uuid, "Response timeout")
+            raise ResponseTimeoutError(
+                f"Msg({request.msg_uuid}) Response timeout from '{path}'"
+            ) from e
+        finally:
+            self._replies.pop(request.msg_uuid, None)
+            self._pending.pop(request.msg_uuid, None)
+
+    def get_direct_client(self, address: str) -> DirectClient:
+        client = self._direct.get(address)
+        if client is None:
+            client = DirectClient(address, ring_size=self._direct_ring_size)
+            self._direct[address] = client
+        return client
+
+    async def on_cmd_direct(
+        self,
+        address: str,
+        request: MsgRequest,
+        path: str,
+    ) -> MsgResponse:
+        """
+        Send the request straight to a worker instance, skipping the Redis queue.
+
+        If the worker cannot be reached, the request falls back to the queue.
+        Once the request has been sent, it is not resent,
+        since the worker may already be running it.
+        """
+
+        client = self.get_direct_client(address)
+        try:
+            await client.connect()
+        except OSError as e:
+            logger.warning(
+                f"Msg({request.msg_uuid}) Direct connection to '{address}' failed, "
+                f"fall back to the queue: {e}"
+            )
+            return await self.on_cmd_worker(request, path)
+
+        timeout = self._request_timeout
+        now = tznow()
+        request.queued_at = now
+        request.set_timeout(timeout, now)
+
+        # Registered as pending, so that the cancellation is published to the worker
+        # and the cancelled response comes back through the connection.
+        self._pending[request.msg_uuid] = PendingRequest(request, path)
+        try:
+            return await client.request(request, timeout)
+        except ResponseTimeoutError:
+            await self.cancel_request(request.msg_uuid, "Response timeout")
+            raise
+        except TransportError as e:
+            logger.error(f"Msg({request.msg_uuid}) {e}")
+            return MsgResponse(request.msg_uuid, error=str(e))
+        finally:
+            self._pending.pop(request.msg_uuid, None)
+
+    def prioritize(self, request: MsgRequest) -> None:
+        priority = self._priorities.get(request.command)
+        if priority is not None:
+            request.priority = priority
 
     async def do_message(self, request: MsgRequest) -> Optional[MsgResponse]:
         msg_uuid = request.msg_uuid
@@ -171,15 +616,22 @@ class EndpointContext(BaseContext):
             logger.debug(f"Msg({msg_uuid}) is not commandable")
             return None
 
-        coro = self._commands.get(request.command)
+        coro = await self.find_command(request.command)
         if coro is None:
             logger.warning(f"Msg({msg_uuid}) Unregistered command: {request.command}")
             return None
 
+        self.prioritize(request)
         if self.verbose >= VERBOSE_LEVEL_1:
             logger.info(f"Msg({msg_uuid}) Run '{request.command}' command")
 
         try:
+            if (
+                self._flight is not None
+                and not coro.builtin
+                and self._flight.coalescible(request)
+            ):
+                return await self._flight.run(request, lambda: coro(request))
             return await coro(request)
         except MsgError as e:
             logger.error(f"Msg({e.msg_uuid}) {e}")
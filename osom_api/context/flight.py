@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+from asyncio import Future, get_running_loop, shield, wait_for
+from asyncio.exceptions import CancelledError, TimeoutError
+from hashlib import sha256
+from json import dumps
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from osom_api.context.mq import MqClient
+from osom_api.exceptions import MsgError, ResponseTimeoutError
+from osom_api.logging.logging import logger
+from osom_api.metrics.registry import MetricsRegistry, default_registry
+from osom_api.msg import MsgRequest, MsgResponse
+from osom_api.paths import MQ_FLIGHT_PATH
+from osom_api.utils.path.mq import make_flight_path, make_flight_result_path
+
+DEFAULT_FLIGHT_RESULT_EXPIRE = 4.0
+DEFAULT_FLIGHT_ATTEMPTS = 3
+
+FlightCallback = Callable[[], Awaitable[Optional[MsgResponse]]]
+
+
+def flight_digest(request: MsgRequest) -> str:
+    payload = [request.command, sorted(request.kwargs.items()), request.body]
+    return sha256(dumps(payload, ensure_ascii=False).encode("utf8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent requests across the endpoint instances.
+
+    The first request takes the lock of its digest and runs as the leader,
+    and the others wait for the response that the leader publishes.
+    A cancelled leader does not stand for its followers,
+    so they try again and one of them becomes the next leader.
+    """
+
+    _waiters: Dict[str, List[Future[MsgResponse]]]
+
+    def __init__(
+        self,
+        mq: MqClient,
+        timeout: float,
+        result_expire=DEFAULT_FLIGHT_RESULT_EXPIRE,
+        attempts=DEFAULT_FLIGHT_ATTEMPTS,
+        registry: Optional[MetricsRegistry] = None,
+    ):
+        self._mq = mq
+        self._timeout = timeout
+        self._result_expire = result_expire
+        self._attempts = attempts
+        self._waiters = dict()
+
+        metrics = registry if registry is not None else default_registry()
+        self._leaders = metrics.counter("endpoint.single_flight.leaders")
+        self._coalesced = metrics.counter("endpoint.single_flight.coalesced")
+
+    @property
+    def waiting_count(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    @staticmethod
+    def coalescible(request: MsgRequest) -> bool:
+        # Attached files are not part of the digest.
+        return request.commandable and not request.files
+
+    def on_done(self, data: bytes) -> None:
+        try:
+            response = MsgResponse.decode(data)
+        except BaseException as e:
+            logger.error(f"Flight packet decoding fail: {e}")
+            return
+
+        for future in self._waiters.pop(response.msg_uuid, list()):
+            if not future.done():
+                future.set_result(response)
+
+    async def run(
+        self,
+        request: MsgRequest,
+        callback: FlightCallback,
+    ) -> Optional[MsgResponse]:
+        msg_uuid = request.msg_uuid
+        path = make_flight_path(flight_digest(request))
+        lock_expire = self._timeout + self._result_expire
+
+        for _ in range(self._attempts):
+            if await self._mq.acquire_lock(path, msg_uuid, lock_expire):
+                self._leaders.inc()
+                return await self.lead(path, msg_uuid, callback)
+
+            leader = await self._mq.get_optional_bytes(path)
+            if leader is None:
+                # The leader has just finished, so try to take the lock again.
+                continue
+
+            response = await self.follow(path, leader.decode())
+            if not response.cancelled:
+                self._coalesced.inc()
+                logger.info(f"Msg({msg_uuid}) Coalesced into Msg({response.msg_uuid})")
+                return response.with_msg_uuid(msg_uuid)
+
+        logger.warning(f"Msg({msg_uuid}) Could not be coalesced, so it runs alone")
+        return await callback()
+
+    async def lead(
+        self,
+        path: str,
+        msg_uuid: str,
+        callback: FlightCallback,
+    ) -> Optional[MsgResponse]:
+        response: Optional[MsgResponse] = None
+        try:
+            response = await callback()
+            return response
+        except CancelledError:
+            # The followers try again, instead of taking over the cancellation.
+            response = MsgResponse.from_cancelled(msg_uuid, "The leader was cancelled")
+            raise
+        except MsgError as e:
+            response = MsgResponse(msg_uuid, error=str(e))
+            raise
+        finally:
+            if response is None:
+                response = MsgResponse(msg_uuid, error="No response to the request")
+            await shield(self.land(path, msg_uuid, response))
+
+    async def land(self, path: str, msg_uuid: str, response: MsgResponse) -> None:
+        data = response.encode()
+        try:
+            # [IMPORTANT]
+            # The result is stored before the lock is released,
+            # so that a follower who missed the publication can still find it.
+            await self._mq.set_bytes(
+                make_flight_result_path(path),
+                data,
+                self._result_expire,
+            )
+            await self._mq.release_lock(path, msg_uuid)
+            await self._mq.publish(MQ_FLIGHT_PATH, data, flush=True)
+        except BaseException as e:
+            logger.error(f"Msg({msg_uuid}) Flight landing failed: {e}")
+
+    async def follow(self, path: str, leader_uuid: str) -> MsgResponse:
+        future = get_running_loop().create_future()
+        waiters = self._waiters.setdefault(leader_uuid, list())
+        waiters.append(future)
+        try:
+            data = await self._mq.get_optional_bytes(make_flight_result_path(path))
+            if data is not None:
+                response = MsgResponse.decode(data)
+                if response.msg_uuid == leader_uuid:
+                    return response
+
+            return await wait_for(future, timeout=self._timeout)
+        except TimeoutError as e:
+            raise ResponseTimeoutError(
+                f"Msg({leader_uuid}) Coalesced response timeout"
+            ) from e
+        finally:
+            waiters = self._waiters.get(leader_uuid, list())
+            if future in waiters:
+                waiters.remove(future)
+            if not waiters:
+                self._waiters.pop(leader_uuid, None)
@@ -1,37 +1,122 @@
 # -*- coding: utf-8 -*-
 
 from abc import ABCMeta, abstractmethod
-from asyncio import Event, Task, create_task, get_running_loop, run_coroutine_threadsafe
+from asyncio import (
+    FIRST_EXCEPTION,
+    Event,
+    Task,
+    create_task,
+    gather,
+    get_running_loop,
+    run_coroutine_threadsafe,
+    wait,
+)
 from asyncio.exceptions import CancelledError, TimeoutError
 from asyncio.timeouts import timeout as async_timeout
 from datetime import datetime
+from enum import StrEnum, auto, unique
 from os import R_OK, access, path
-from typing import Any, Dict, Literal, Optional, Sequence, Union
+from time import monotonic
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Final,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
-from redis.asyncio import from_url
-from redis.asyncio.client import PubSub, Redis
-from redis.exceptions import RedisError
+from redis.asyncio.client import PubSub
+from redis.commands.core import AsyncScript
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import RedisError, ResponseError
 
+from osom_api.aio.backoff import exponential_backoff
 from osom_api.aio.shield_any import shield_any
 from osom_api.args.redis import RedisArgs
 from osom_api.arguments import (
+    DEFAULT_REDIS_CACHE_SIZE,
     DEFAULT_REDIS_CLOSE_TIMEOUT,
     DEFAULT_REDIS_EXPIRE_LONG,
     DEFAULT_REDIS_EXPIRE_MEDIUM,
     DEFAULT_REDIS_EXPIRE_SHORT,
+    DEFAULT_REDIS_MAX_BLOCKING_CONNECTIONS,
+    DEFAULT_REDIS_MAX_COMMAND_CONNECTIONS,
+    DEFAULT_REDIS_MAX_PUBSUB_CONNECTIONS,
+    DEFAULT_REDIS_MODE,
+    DEFAULT_REDIS_POOL_TIMEOUT,
+    DEFAULT_REDIS_PUBLISH_BATCH_SIZE,
+    DEFAULT_REDIS_PUBLISH_WINDOW,
+    DEFAULT_REDIS_RECONNECT_DELAY,
+    DEFAULT_REDIS_RECONNECT_MAX_DELAY,
+    DEFAULT_REDIS_SENTINEL_SERVICE,
     DEFAULT_REDIS_SSL_CERT_REQS,
+    DEFAULT_REDIS_SUBSCRIBE_CONCURRENCY,
+    DEFAULT_REDIS_SUBSCRIBE_QUEUE_SIZE,
+    REDIS_MODE_CLUSTER,
+    REDIS_MODE_SENTINEL,
+    REDIS_MODE_SHARDS,
+    REDIS_MODE_STANDALONE,
+    REDIS_MODES,
     REDIS_SSL_CERT_REQS,
 )
 from osom_api.arguments import VERBOSE_LEVEL_1 as VL1
 from osom_api.arguments import VERBOSE_LEVEL_2 as VL2
+from osom_api.context.mq.cache import (
+    CACHE_MISSING,
+    DEFAULT_CACHE_PREFIXES,
+    TRACKING_INVALIDATE_CHANNEL,
+    CacheEntry,
+    MqCache,
+    parse_cache_prefixes,
+)
+from osom_api.context.mq.connection import (
+    ClusterPubSub,
+    RedisClient,
+    close_redis_client,
+    create_cluster_redis,
+    create_sentinel_redis,
+    create_standalone_redis,
+)
+from osom_api.context.mq.dispatcher import MqDispatcher
 from osom_api.context.mq.message import Message
-from osom_api.exceptions import NotInitializedError
+from osom_api.context.mq.publisher import MqPublisher, PublishItem
+from osom_api.context.mq.ring import HashRing, MqShard, parse_shard_urls
+from osom_api.context.mq.scripts import (
+    ENQUEUE_LIST_SCRIPT,
+    ENQUEUE_STREAM_SCRIPT,
+    FAIR_DEQUEUE_SCRIPT,
+    FAIR_ENQUEUE_SCRIPT,
+    PUSH_REPLY_SCRIPT,
+    QUEUE_FULL,
+    RELEASE_LOCK_SCRIPT,
+    TOUCH_PENDING_SCRIPT,
+    VERSIONED_HDEL_SCRIPT,
+    VERSIONED_HSET_SCRIPT,
+)
+from osom_api.exceptions import NotInitializedError, QueueFullError
 from osom_api.logging.logging import logger
+from osom_api.metrics.registry import default_registry
 from osom_api.paths import MQ_BROADCAST_PATH
-from osom_api.utils.path.mq import encode_path
+from osom_api.utils.path.mq import PATH_ENCODING, encode_path
 
 SslCertReqs = Literal["none", "optional", "required"]
 
+STREAM_DATA_FIELD: Final[bytes] = b"data"
+STREAM_CLAIM_START: Final[bytes] = b"0-0"
+BUSYGROUP_ERROR_PREFIX: Final[str] = "BUSYGROUP"
+
+SHARDED_SUBSCRIBE_TIMEOUT: Final[float] = 1.0
+"""
+Sharded subscriptions poll the connection of each node in turn,
+so a single poll must not block forever.
+"""
+
 
 def validation_redis_file(name: str, file: Optional[str] = None) -> None:
     if not file:
@@ -44,6 +129,14 @@ def validation_redis_file(name: str, file: Optional[str] = None) -> None:
         raise PermissionError(f"Redis TLS {name} file is not readable")
 
 
+@unique
+class MqConnectionState(StrEnum):
+    connecting = auto()
+    connected = auto()
+    disconnected = auto()
+    closed = auto()
+
+
 class MqClientCallback(metaclass=ABCMeta):
     @abstractmethod
     async def on_mq_connect(self) -> None:
@@ -63,13 +156,28 @@ class MqClientCallback(metaclass=ABCMeta):
 
 
 class MqClient:
-    _redis: Optional[Redis]
+    _redis: Optional[RedisClient]
+    _blocking_redis: Optional[RedisClient]
+    _pubsub_redis: Optional[RedisClient]
+    _shards: List[MqShard]
+    _ring: Optional[HashRing]
+    _enqueue_list: Optional[AsyncScript]
+    _enqueue_stream: Optional[AsyncScript]
+    _fair_enqueue: Optional[AsyncScript]
+    _fair_dequeue: Optional[AsyncScript]
+    _push_reply: Optional[AsyncScript]
+    _release_lock: Optional[AsyncScript]
+    _touch_pending: Optional[AsyncScript]
+    _versioned_hset: Optional[AsyncScript]
+    _versioned_hdel: Optional[AsyncScript]
     _task: Optional[Task[None]]
     _subscribe_begin: Optional[datetime]
 
     def __init__(
         self,
         url: Optional[str] = None,
+        mode=DEFAULT_REDIS_MODE,
+        sentinel_service=DEFAULT_REDIS_SENTINEL_SERVICE,
         connection_timeout: Optional[float] = None,
         subscribe_timeout: Optional[float] = None,
         close_timeout: Optional[float] = DEFAULT_REDIS_CLOSE_TIMEOUT,
@@ -81,6 +189,19 @@ class MqClient:
         task_name: Optional[str] = None,
         ssl_cert_reqs: Optional[str] = DEFAULT_REDIS_SSL_CERT_REQS,
         subscribe_paths: Optional[Sequence[Union[str, bytes]]] = None,
+        max_command_connections=DEFAULT_REDIS_MAX_COMMAND_CONNECTIONS,
+        max_blocking_connections=DEFAULT_REDIS_MAX_BLOCKING_CONNECTIONS,
+        max_pubsub_connections=DEFAULT_REDIS_MAX_PUBSUB_CONNECTIONS,
+        pool_timeout: Optional[float] = DEFAULT_REDIS_POOL_TIMEOUT,
+        subscribe_concurrency=DEFAULT_REDIS_SUBSCRIBE_CONCURRENCY,
+        subscribe_queue_size=DEFAULT_REDIS_SUBSCRIBE_QUEUE_SIZE,
+        subscribe_unordered=False,
+        publish_window=DEFAULT_REDIS_PUBLISH_WINDOW,
+        publish_batch_size=DEFAULT_REDIS_PUBLISH_BATCH_SIZE,
+        cache_size=DEFAULT_REDIS_CACHE_SIZE,
+        cache_prefixes: Sequence[str] = DEFAULT_CACHE_PREFIXES,
+        reconnect_delay=DEFAULT_REDIS_RECONNECT_DELAY,
+        reconnect_max_delay=DEFAULT_REDIS_RECONNECT_MAX_DELAY,
         debug=False,
         verbose=0,
     ):
@@ -94,10 +215,89 @@ class MqClient:
                         f"Invalid SSL certificate requirements flag: {ssl_cert_reqs}"
                     )
                 options["ssl_cert_reqs"] = ssl_cert_reqs
-            self._redis = from_url(url, **options)
+
+            if mode == REDIS_MODE_SHARDS:
+                node_urls = parse_shard_urls(url)
+                node_mode = REDIS_MODE_STANDALONE
+            else:
+                node_urls = [url]
+                node_mode = mode
+
+            self._shards = list()
+            for index, node_url in enumerate(node_urls):
+                suffix = f".{index}" if mode == REDIS_MODE_SHARDS else ""
+
+                # [IMPORTANT]
+                # Each traffic class has its own pool,
+                # so that long blocking pops cannot starve short commands.
+                shard = MqShard(
+                    url=node_url,
+                    command=self._create_redis(
+                        node_url,
+                        node_mode,
+                        sentinel_service,
+                        f"command{suffix}",
+                        max_command_connections,
+                        pool_timeout,
+                        **options,
+                    ),
+                    blocking=self._create_redis(
+                        node_url,
+                        node_mode,
+                        sentinel_service,
+                        f"blocking{suffix}",
+                        max_blocking_connections,
+                        pool_timeout,
+                        **options,
+                    ),
+                    pubsub=self._create_redis(
+                        node_url,
+                        node_mode,
+                        sentinel_service,
+                        f"pubsub{suffix}",
+                        max_pubsub_connections,
+                        pool_timeout,
+                        **options,
+                    ),
+                )
+                self._shards.append(shard)
+
+            self._redis = self._shards[0].command
+            self._blocking_redis = self._shards[0].blocking
+            self._pubsub_redis = self._shards[0].pubsub
+            if mode == REDIS_MODE_SHARDS:
+                self._ring = HashRing(node_urls)
+            else:
+                self._ring = None
+
+            # Scripts are loaded by SHA, so they can be called on any shard.
+            self._enqueue_list = self._redis.register_script(ENQUEUE_LIST_SCRIPT)
+            self._enqueue_stream = self._redis.register_script(ENQUEUE_STREAM_SCRIPT)
+            self._fair_enqueue = self._redis.register_script(FAIR_ENQUEUE_SCRIPT)
+            self._fair_dequeue = self._redis.register_script(FAIR_DEQUEUE_SCRIPT)
+            self._push_reply = self._redis.register_script(PUSH_REPLY_SCRIPT)
+            self._release_lock = self._redis.register_script(RELEASE_LOCK_SCRIPT)
+            self._touch_pending = self._redis.register_script(TOUCH_PENDING_SCRIPT)
+            self._versioned_hset = self._redis.register_script(VERSIONED_HSET_SCRIPT)
+            self._versioned_hdel = self._redis.register_script(VERSIONED_HDEL_SCRIPT)
         else:
             self._redis = None
+            self._blocking_redis = None
+            self._pubsub_redis = None
+            self._shards = list()
+            self._ring = None
+            self._enqueue_list = None
+            self._enqueue_stream = None
+            self._fair_enqueue = None
+            self._fair_dequeue = None
+            self._push_reply = None
+            self._release_lock = None
+            self._touch_pending = None
+            self._versioned_hset = None
+            self._versioned_hdel = None
 
+        self._mode = mode
+        self._sharded = mode == REDIS_MODE_CLUSTER
         self._subscribe_timeout = subscribe_timeout
         self._close_timeout = close_timeout
         self._expire_short = expire_short
@@ -111,6 +311,34 @@ class MqClient:
         self._task = None
         self._task_name = task_name if task_name else self.__class__.__name__
 
+        self._reconnect_delay = reconnect_delay
+        self._reconnect_max_delay = reconnect_max_delay
+        self._state = MqConnectionState.closed
+        self._disconnected_at: Optional[float] = None
+
+        metrics = default_registry()
+        self._state_connected = metrics.gauge("mq.connection.connected")
+        self._connection_failures = metrics.counter("mq.connection.failures")
+        self._reconnects = metrics.counter("mq.connection.reconnects")
+        self._downtime = metrics.summary("mq.connection.downtime")
+
+        self._dispatcher = MqDispatcher(
+            handler=self._on_subscribe,
+            concurrency=subscribe_concurrency,
+            queue_size=subscribe_queue_size,
+            ordered=not subscribe_unordered,
+        )
+        self._publisher = MqPublisher(
+            flush=self._publish_batch,
+            window=publish_window,
+            batch_size=publish_batch_size,
+        )
+
+        if cache_size > 0 and self._sharded:
+            logger.warning("Client-side cache is not supported in cluster mode")
+            cache_size = 0
+        self._cache = MqCache(max_size=cache_size, prefixes=cache_prefixes)
+
         self._subscribe_begin = None
         self._subscribe_paths = set()
         if subscribe_paths:
@@ -136,6 +364,8 @@ class MqClient:
     ):
         return cls(
             url=args.redis_url,
+            mode=args.redis_mode,
+            sentinel_service=args.redis_sentinel_service,
             connection_timeout=args.redis_connection_timeout,
             subscribe_timeout=args.redis_subscribe_timeout,
             close_timeout=args.redis_close_timeout,
@@ -147,16 +377,136 @@ class MqClient:
             task_name=mq_task_name,
             ssl_cert_reqs=args.redis_ssl_cert_reqs,
             subscribe_paths=mq_subscribe_paths,
+            max_command_connections=args.redis_max_command_connections,
+            max_blocking_connections=args.redis_max_blocking_connections,
+            max_pubsub_connections=args.redis_max_pubsub_connections,
+            pool_timeout=args.redis_pool_timeout,
+            subscribe_concurrency=args.redis_subscribe_concurrency,
+            subscribe_queue_size=args.redis_subscribe_queue_size,
+            subscribe_unordered=args.redis_subscribe_unordered,
+            publish_window=args.redis_publish_window,
+            publish_batch_size=args.redis_publish_batch_size,
+            cache_size=args.redis_cache_size,
+            cache_prefixes=parse_cache_prefixes(args.redis_cache_prefixes),
+            reconnect_delay=args.redis_reconnect_delay,
+            reconnect_max_delay=args.redis_reconnect_max_delay,
             debug=args.debug,
             verbose=args.verbose,
         )
 
+    @staticmethod
+    def _create_redis(
+        url: str,
+        mode: str,
+        sentinel_service: str,
+        pool_name: str,
+        max_connections: int,
+        timeout: Optional[float],
+        **options,
+    ) -> RedisClient:
+        if mode == REDIS_MODE_STANDALONE:
+            return create_standalone_redis(
+                url, pool_name, max_connections, timeout, **options
+            )
+        elif mode == REDIS_MODE_SENTINEL:
+            return create_sentinel_redis(
+                url, sentinel_service, max_connections, **options
+            )
+        elif mode == REDIS_MODE_CLUSTER:
+            return create_cluster_redis(url, max_connections, **options)
+        else:
+            raise ValueError(f"Unknown Redis mode: {mode}, expected {REDIS_MODES}")
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    @property
+    def sharded(self) -> bool:
+        return self._sharded
+
+    @property
+    def shard_count(self) -> int:
+        return len(self._ring) if self._ring is not None else 1
+
+    def shard_index(self, key: Union[str, bytes]) -> int:
+        return self._ring.index(key) if self._ring is not None else 0
+
+    def _shard_index(self, keys: Sequence[Union[str, bytes]]) -> int:
+        assert keys
+        index = self.shard_index(keys[0])
+        if any(self.shard_index(k) != index for k in keys[1:]):
+            raise ValueError(f"Keys are placed on different shards: {list(keys)}")
+        return index
+
+    def command_redis(self, *keys: Union[str, bytes]):
+        """
+        :return: The command client of the shard where the keys are placed.
+        """
+
+        if self._ring is None:
+            return self.redis
+        return self._shards[self._shard_index(keys)].command
+
+    def _blocking_redis_for(self, keys: Sequence[Union[str, bytes]]):
+        if self._ring is None:
+            return self.blocking_redis
+        return self._shards[self._shard_index(keys)].blocking
+
+    @property
+    def cache(self) -> MqCache:
+        return self._cache
+
+    @property
+    def state(self) -> MqConnectionState:
+        return self._state
+
+    @property
+    def connected(self) -> bool:
+        return self._state == MqConnectionState.connected
+
+    def reconnect_delay(self, attempt: int) -> float:
+        return exponential_backoff(
+            attempt,
+            self._reconnect_delay,
+            self._reconnect_max_delay,
+        )
+
+    @property
+    def has_redis(self) -> bool:
+        return self._redis is not None
+
     @property
     def redis(self):
         if self._redis is None:
             raise NotInitializedError("Redis is not initialized")
         return self._redis
 
+    @property
+    def blocking_redis(self):
+        if self._blocking_redis is None:
+            raise NotInitializedError("Redis is not initialized")
+        return self._blocking_redis
+
+    @property
+    def pubsub_redis(self):
+        if self._pubsub_redis is None:
+            raise NotInitializedError("Redis is not initialized")
+        return self._pubsub_redis
+
+    async def _ping_shards(self) -> None:
+        if not self._shards:
+            raise NotInitializedError("Redis is not initialized")
+        await gather(*(shard.command.ping() for shard in self._shards))
+
+    async def _close_redis(self) -> None:
+        for shard in self._shards:
+            for client in (shard.command, shard.blocking, shard.pubsub):
+                try:
+                    await close_redis_client(client)
+                except BaseException as e:
+                    logger.error(f"Redis connection pool disconnect error: {e}")
+
     async def open(self) -> None:
         if self._redis is None:
             logger.warning("Redis is not initialized. Cancels the open operation.")
@@ -213,44 +563,210 @@ class MqClient:
         except BaseException as e:  # noqa
             logger.exception(e)
 
+    def _set_state(self, state: MqConnectionState) -> None:
+        if self._state == state:
+            return
+
+        logger.info(f"Redis connection state: {self._state} -> {state}")
+        self._state = state
+        self._state_connected.set(1 if state == MqConnectionState.connected else 0)
+
+    async def _wait_reconnect(self, delay: float) -> None:
+        try:
+            async with async_timeout(delay):
+                await self._done.wait()
+        except TimeoutError:
+            pass
+
     async def _redis_main(self) -> None:
         assert self._redis is not None
 
+        self._dispatcher.start()
+        try:
+            await self._redis_supervisor_main()
+        except CancelledError:
+            logger.warning("A cancellation signal was detected in a Redis Task")
+        except BaseException as e:
+            logger.error(e)
+        finally:
+            self._set_state(MqConnectionState.closed)
+            await self._dispatcher.stop()
+            await self._publisher.close()
+            await self._close_redis()
+
+    async def _redis_supervisor_main(self) -> None:
+        attempt = 0
+
+        while not self._done.is_set():
+            self._set_state(MqConnectionState.connecting)
+            try:
+                await self._redis_session_main()
+            except (RedisError, OSError) as e:
+                if self._state == MqConnectionState.connected:
+                    # A connection that was established once resets the backoff.
+                    attempt = 0
+                    self._disconnected_at = monotonic()
+
+                self._set_state(MqConnectionState.disconnected)
+                self._connection_failures.inc()
+
+                delay = self.reconnect_delay(attempt)
+                attempt += 1
+                logger.error(f"Redis connection error: {e}")
+                logger.warning(f"Reconnect to Redis in {delay:.2f}s (#{attempt}) ...")
+                await self._wait_reconnect(delay)
+            else:
+                # The session ends normally only when closing.
+                assert self._done.is_set()
+
+    async def _redis_session_main(self) -> None:
+        assert self._redis is not None
+
         try:
             logger.debug("Redis PING ...")
-            await self._redis.ping()
+            await self._ping_shards()
         except BaseException as e:
             logger.error(f"Redis PING error: {e}")
             raise
         else:
             logger.info("Redis PING->PONG!")
 
-        if self._callback is not None:
-            await self._callback.on_mq_connect()
+        # [IMPORTANT]
+        # Publishers send each channel to the shard of the channel,
+        # so every shard is subscribed to receive them all.
+        pubsubs = [shard.pubsub.pubsub() for shard in self._shards]
+        trackings: List[PubSub] = list()
+        try:
+            if self._cache.enabled:
+                for shard in self._shards:
+                    tracking = shard.pubsub.pubsub()
+                    trackings.append(tracking)
+                    await self._open_tracking(tracking)
+                # Replies are cached only once no invalidation can be missed.
+                self._cache.activate()
+                logger.info(f"Client-side cache tracking: {self._cache.prefixes}")
+
+            logger.debug("Requesting a subscription ...")
+            for pubsub in pubsubs:
+                if self._sharded:
+                    await pubsub.ssubscribe(*self._subscribe_paths)
+                else:
+                    await pubsub.subscribe(*self._subscribe_paths)
+            logger.info("Subscription completed!")
+
+            if self._debug:
+                logger.info(f"Subscription paths: {self._subscribe_paths}")
+
+            if self._disconnected_at is not None:
+                self._reconnects.inc()
+                self._downtime.observe(monotonic() - self._disconnected_at)
+                self._disconnected_at = None
+            self._set_state(MqConnectionState.connected)
+
+            # [IMPORTANT]
+            # The callback is called after subscribing,
+            # so that replies to the packets published here are not missed.
+            if self._callback is not None:
+                await shield_any(self._callback.on_mq_connect(), logger)
+
+            await self._redis_subscribe_shards(pubsubs, trackings)
+        finally:
+            self._cache.deactivate()
+            if self._done.is_set() and self._callback is not None:
+                await shield_any(self._callback.on_mq_closing(), logger)
+            for tracking in trackings:
+                if tracking.connection is not None:
+                    tracking.connection.deregister_connect_callback(
+                        self._on_tracking_connect
+                    )
+            for pubsub in (*pubsubs, *trackings):
+                try:
+                    await pubsub.close()
+                except BaseException as e:
+                    logger.warning(f"Redis PubSub close error: {e}")
+
+    async def _open_tracking(self, pubsub: PubSub) -> None:
+        """
+        Enable the tracking of the cached prefixes on the connection of the PubSub,
+        and redirect the invalidation messages to the connection itself.
+        """
+
+        await pubsub.connect()
+        connection = pubsub.connection
+        assert connection is not None
+
+        await connection.send_command("CLIENT", "ID")
+        client_id = await connection.read_response()
 
+        args: List[Any] = ["CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST"]
+        for prefix in self._cache.prefixes:
+            args.extend(("PREFIX", prefix))
+        await connection.send_command(*args)
+        await connection.read_response()
+
+        # [IMPORTANT]
+        # Invalidations are dropped until the connection is in the subscribed state,
+        # so wait for the confirmation of the subscription.
+        await pubsub.subscribe(TRACKING_INVALIDATE_CHANNEL)
+        while True:
+            msg = await pubsub.get_message(timeout=self._subscribe_timeout)
+            if msg is None:
+                raise RedisConnectionError("Tracking subscription was not confirmed")
+            if msg["type"] == "subscribe":
+                break
+
+        connection.register_connect_callback(self._on_tracking_connect)
+
+    async def _on_tracking_connect(self, connection) -> None:
+        # A reconnected connection is no longer tracked,
+        # so the session ends to enable the tracking again.
+        self._cache.deactivate()
+        raise RedisConnectionError("Tracking connection was reconnected")
+
+    async def _redis_subscribe_shards(
+        self,
+        pubsubs: Sequence[PubSub],
+        trackings: Sequence[PubSub] = (),
+    ) -> None:
+        coros = [self._redis_subscribe_main(p) for p in pubsubs]
+        coros.extend(self._redis_tracking_main(t) for t in trackings)
+        if len(coros) == 1:
+            await coros[0]
+            return
+
+        tasks = [create_task(c) for c in coros]
         try:
-            pubsub = self._redis.pubsub()
-            try:
-                await self._redis_subscribe_main(pubsub)
-            finally:
-                if self._callback is not None:
-                    await shield_any(self._callback.on_mq_closing(), logger)
-                await pubsub.close()
-        except CancelledError:
-            logger.warning("A cancellation signal was detected in a Redis Task")
-        except BaseException as e:
-            logger.error(e)
+            done, _ = await wait(tasks, return_when=FIRST_EXCEPTION)
+            for task in done:
+                # The first connection error ends the session of every shard.
+                task.result()
         finally:
-            await self._redis.close()
+            for task in tasks:
+                task.cancel()
+            await gather(*tasks, return_exceptions=True)
 
-    async def _redis_subscribe_main(self, pubsub: PubSub) -> None:
-        logger.debug("Requesting a subscription ...")
-        await pubsub.subscribe(*self._subscribe_paths)
-        logger.info("Subscription completed!")
+    async def _on_subscribe(self, channel: bytes, data: bytes) -> None:
+        if self._callback is not None:
+            await self._callback.on_mq_subscribe(channel, data)
 
-        if self._debug:
-            logger.info(f"Subscription paths: {self._subscribe_paths}")
+    async def _get_message(self, pubsub: PubSub) -> Optional[Dict[str, Any]]:
+        if self._sharded:
+            assert isinstance(pubsub, ClusterPubSub)
+            if self._subscribe_timeout is not None:
+                timeout = min(self._subscribe_timeout, SHARDED_SUBSCRIBE_TIMEOUT)
+            else:
+                timeout = SHARDED_SUBSCRIBE_TIMEOUT
+            return await pubsub.get_sharded_message(
+                ignore_subscribe_messages=True,
+                timeout=timeout,
+            )
+        else:
+            return await pubsub.get_message(
+                ignore_subscribe_messages=True,
+                timeout=self._subscribe_timeout,
+            )
 
+    async def _redis_subscribe_main(self, pubsub: PubSub) -> None:
         while not self._done.is_set():
             if self._debug and self._verbose >= VL2:
                 if self._subscribe_timeout is not None:
@@ -261,10 +777,7 @@ class MqClient:
 
             try:
                 self._subscribe_begin = datetime.now()
-                msg = await pubsub.get_message(
-                    ignore_subscribe_messages=True,
-                    timeout=self._subscribe_timeout,
-                )
+                msg = await self._get_message(pubsub)
             finally:
                 self._subscribe_begin = None
 
@@ -277,7 +790,7 @@ class MqClient:
                 logger.debug(f"Recv subscription message: {msg}")
 
             msg = Message.from_message(msg)
-            if not msg.is_message:
+            if not msg.is_message and not msg.is_smessage:
                 continue
 
             channel = msg.channel
@@ -285,36 +798,212 @@ class MqClient:
             if self._debug:
                 logger.debug(f"Data was received on channel {channel} -> {data}")
 
-            if self._callback is not None:
-                await shield_any(self._callback.on_mq_subscribe(channel, data), logger)
+            self._dispatcher.dispatch(channel, data)
+
+    async def _redis_tracking_main(self, pubsub: PubSub) -> None:
+        while not self._done.is_set():
+            msg = await pubsub.get_message(
+                ignore_subscribe_messages=True,
+                timeout=self._subscribe_timeout,
+            )
+            if msg is None or msg["type"] != "message":
+                continue
+
+            # The data is the list of modified keys, or None if flushed.
+            keys = msg["data"]
+            if self._debug and self._verbose >= VL1:
+                logger.debug(f"Client-side cache invalidation: {keys}")
+            self._cache.invalidate(keys)
+
+    async def publish(self, key: str, data: bytes, flush=False) -> None:
+        """
+        :param flush: Send the message without waiting for the publish window,
+            along with the messages buffered so far.
+        """
 
-    async def publish(self, key: str, data: bytes) -> None:
         logger.info(f"Publish '{key}' -> {data!r}")
-        await self.redis.publish(key, data)
+        if self._publisher.enabled:
+            await self._publisher.publish(key, data, flush)
+        elif self._sharded:
+            await self.redis.spublish(key, data)
+        else:
+            await self.command_redis(key).publish(key, data)
+
+    async def _publish_batch(self, items: List[PublishItem]) -> List[Any]:
+        if self._sharded:
+            # The channels of a cluster are spread over the nodes by their slots.
+            coros = [self.redis.spublish(key, data) for key, data in items]
+            return await gather(*coros, return_exceptions=True)
+
+        positions: Dict[int, List[int]] = dict()
+        for position, (key, _) in enumerate(items):
+            positions.setdefault(self.shard_index(key), list()).append(position)
+
+        results: List[Any] = [None] * len(items)
+
+        async def _execute(index: int, shard_positions: List[int]) -> None:
+            pipe = self._shards[index].command.pipeline(transaction=False)
+            for position in shard_positions:
+                pipe.publish(*items[position])
+
+            replies: List[Any]
+            try:
+                replies = await pipe.execute(raise_on_error=False)
+            except (RedisError, OSError) as e:
+                replies = [e] * len(shard_positions)
+
+            for position, reply in zip(shard_positions, replies):
+                results[position] = reply
+
+        await gather(*(_execute(i, p) for i, p in positions.items()))
+        return results
 
     async def ping(self, timeout: Optional[float] = None) -> bool:
         try:
             async with async_timeout(timeout):
-                await self.redis.ping()
+                await self._ping_shards()
         except:  # noqa
             return False
         else:
             return True
 
     async def exists(self, key: str) -> bool:
-        exists = 1 == await self.redis.exists(key)
+        exists = 1 == await self.command_redis(key).exists(key)
         logger.info(f"Exists '{key}' -> {exists}")
         return exists
 
+    async def _cached_read(
+        self,
+        entry: CacheEntry,
+        read: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        key = entry[1]
+        assert isinstance(key, str)
+        if not self._cache.cacheable(key):
+            return await read()
+
+        value = self._cache.get(entry)
+        if value is CACHE_MISSING:
+            epoch = self._cache.epoch
+            value = await read()
+            self._cache.put(entry, value, epoch)
+        return value
+
     async def get_bytes(self, key: str) -> bytes:
-        value = await self.redis.get(key)
+        value = await self._cached_read(
+            ("get", key),
+            lambda: self.command_redis(key).get(key),
+        )
         assert isinstance(value, bytes)
         logger.info(f"Get '{key}' -> {value!r}")
         return value
 
-    async def set_bytes(self, key: str, value: bytes) -> None:
-        logger.info(f"Set '{key}' -> {value!r}")
-        await self.redis.set(key, value)
+    async def set_bytes(
+        self, key: str, value: bytes, expire: Optional[float] = None
+    ) -> None:
+        if expire is not None:
+            logger.info(f"Set '{key}' -> {len(value)} bytes (expire: {expire}s)")
+            await self.command_redis(key).set(key, value, px=round(expire * 1000))
+        else:
+            logger.info(f"Set '{key}' -> {value!r}")
+            await self.command_redis(key).set(key, value)
+
+    async def get_optional_bytes(self, key: str) -> Optional[bytes]:
+        value = await self._cached_read(
+            ("get", key),
+            lambda: self.command_redis(key).get(key),
+        )
+        assert isinstance(value, (type(None), bytes))
+        logger.debug(f"Get '{key}' -> {value is not None}")
+        return value
+
+    async def acquire_lock(self, key: str, token: str, expire: float) -> bool:
+        """
+        :return: If another owner holds the lock, it returns False.
+        """
+
+        redis = self.command_redis(key)
+        result = await redis.set(key, token, nx=True, px=round(expire * 1000))
+        acquired = bool(result)
+        logger.info(f"Acquire lock '{key}' ({token}) -> {acquired}")
+        return acquired
+
+    async def release_lock(self, key: str, token: str) -> bool:
+        """
+        The lock is deleted only if it is still held by the given owner.
+        """
+
+        if self._release_lock is None:
+            raise NotInitializedError("Redis is not initialized")
+
+        result = await self._release_lock(
+            keys=[key],
+            args=[token],
+            client=self.command_redis(key),
+        )
+        released = result == 1
+        logger.info(f"Release lock '{key}' ({token}) -> {released}")
+        return released
+
+    async def hset_versioned(
+        self,
+        key: str,
+        field: str,
+        value: bytes,
+        version_field: str,
+    ) -> int:
+        """
+        Set the field and increase the version of the hash at once.
+
+        :return: The version of the hash after setting.
+        """
+
+        if self._versioned_hset is None:
+            raise NotInitializedError("Redis is not initialized")
+
+        version = await self._versioned_hset(
+            keys=[key],
+            args=[field, value, version_field],
+            client=self.command_redis(key),
+        )
+        logger.info(f"Hash SET '{key}' ({field}) -> {len(value)} bytes (v{version})")
+        return int(version)
+
+    async def hdel_versioned(self, key: str, field: str, version_field: str) -> int:
+        """
+        Delete the field and increase the version, only if the field existed.
+
+        :return: The version of the hash after deleting.
+        """
+
+        if self._versioned_hdel is None:
+            raise NotInitializedError("Redis is not initialized")
+
+        version = await self._versioned_hdel(
+            keys=[key],
+            args=[field, version_field],
+            client=self.command_redis(key),
+        )
+        logger.info(f"Hash DEL '{key}' ({field}) (v{version})")
+        return int(version)
+
+    async def hget_optional_bytes(self, key: str, field: str) -> Optional[bytes]:
+        value = await self._cached_read(
+            ("hget", key, field),
+            lambda: self.command_redis(key).hget(key, field),
+        )
+        assert isinstance(value, (type(None), bytes))
+        return value
+
+    async def hgetall_bytes(self, key: str) -> Dict[bytes, bytes]:
+        value = await self._cached_read(
+            ("hgetall", key),
+            lambda: self.command_redis(key).hgetall(key),
+        )
+        assert isinstance(value, dict)
+        logger.debug(f"Hash GETALL '{key}' -> {len(value)} fields")
+        # The cached reply is shared, so the caller receives a copy.
+        return dict(value)
 
     async def get_str(self, key: str) -> str:
         return str(await self.get_bytes(key), encoding="utf8")
@@ -327,26 +1016,455 @@ class MqClient:
     ) -> None:
         if expire is not None:
             logger.info(f"Left PUSH '{key}' -> {value!r} (expire: {expire}s)")
-            async with self.redis.pipeline(transaction=True) as pipeline:
+            redis = self.command_redis(key)
+            async with redis.pipeline(transaction=True) as pipeline:
                 # noinspection PyUnresolvedReferences
                 await pipeline.lpush(key, value).expire(key, expire).execute()
         else:
             logger.info(f"Left PUSH '{key}' -> {value!r}")
-            await self.redis.lpush(key, value)
+            await self.command_redis(key).lpush(key, value)
 
-    async def brpop_bytes(
+    async def push_reply_bytes(self, key: str, value: bytes, expire: int) -> int:
+        """
+        Left PUSH to a reply list that expires ``expire`` seconds after its creation.
+
+        The expiry is not extended by later pushes,
+        so the list of an endpoint that stopped draining it does not live forever.
+        """
+
+        if self._push_reply is None:
+            raise NotInitializedError("Redis is not initialized")
+
+        logger.info(f"Left PUSH '{key}' -> {len(value)} bytes (expire: {expire}s)")
+        result = await self._push_reply(
+            keys=[key],
+            args=[value, expire],
+            client=self.command_redis(key),
+        )
+        assert isinstance(result, int)
+        return result
+
+    async def lpush_trim_bytes(self, key: str, value: bytes, maxlen: int) -> None:
+        """
+        Left PUSH and keep only the latest ``maxlen`` items. 0 is unlimited.
+        """
+
+        logger.info(f"Left PUSH '{key}' -> {len(value)} bytes (maxlen: {maxlen})")
+        async with self.command_redis(key).pipeline(transaction=True) as pipeline:
+            pipeline.lpush(key, value)
+            if maxlen > 0:
+                pipeline.ltrim(key, 0, maxlen - 1)
+            await pipeline.execute()
+
+    async def lrange_bytes(self, key: str, start: int, stop: int) -> List[bytes]:
+        value = await self.command_redis(key).lrange(key, start, stop)
+        assert isinstance(value, list)
+        logger.debug(f"List RANGE '{key}' [{start}:{stop}] -> {len(value)} items")
+        return value
+
+    async def lrem_bytes(self, key: str, value: bytes, count=1) -> int:
+        removed = await self.command_redis(key).lrem(key, count, value)
+        logger.info(f"List REMOVE '{key}' -> {removed} items")
+        return removed
+
+    async def llen(self, key: str) -> int:
+        return await self.command_redis(key).llen(key)
+
+    async def delete(self, key: str) -> int:
+        return await self.command_redis(key).delete(key)
+
+    async def enqueue_bytes(
+        self,
+        key: str,
+        value: bytes,
+        marker: str,
+        expire: Optional[float] = None,
+        maxdepth=0,
+    ) -> int:
+        """
+        Atomically check the depth, set the expiry marker and push to the list.
+
+        The expiry applies to the marker only, not to the shared queue.
+
+        :return: The queue depth after pushing.
+        """
+
+        if self._enqueue_list is None:
+            raise NotInitializedError("Redis is not initialized")
+
+        expire_ms = round(expire * 1000) if expire else 0
+        depth = await self._enqueue_list(
+            keys=[key, marker],
+            args=[value, expire_ms, maxdepth],
+            client=self.command_redis(key, marker),
+        )
+        if depth == QUEUE_FULL:
+            raise QueueFullError(f"Queue '{key}' is full (max depth: {maxdepth})")
+
+        logger.info(f"Enqueue '{key}' -> {value!r} (depth: {depth})")
+        return depth
+
+    async def xenqueue_bytes(
         self,
         key: str,
+        value: bytes,
+        marker: str,
+        expire: Optional[float] = None,
+        maxdepth=0,
+        maxlen: Optional[int] = None,
+        field: bytes = STREAM_DATA_FIELD,
+    ) -> int:
+        """
+        Same as :meth:`enqueue_bytes`, but appends to the stream.
+        """
+
+        if self._enqueue_stream is None:
+            raise NotInitializedError("Redis is not initialized")
+
+        expire_ms = round(expire * 1000) if expire else 0
+        depth = await self._enqueue_stream(
+            keys=[key, marker],
+            args=[value, expire_ms, maxdepth, field, maxlen if maxlen else 0],
+            client=self.command_redis(key, marker),
+        )
+        if depth == QUEUE_FULL:
+            raise QueueFullError(f"Stream '{key}' is full (max depth: {maxdepth})")
+
+        logger.info(f"Stream enqueue '{key}' -> {value!r} (depth: {depth})")
+        return depth
+
+    async def fair_enqueue_bytes(
+        self,
+        key: str,
+        value: bytes,
+        marker: str,
+        provider: str,
+        channel: str,
+        expire: Optional[float] = None,
+        maxdepth=0,
+    ) -> int:
+        """
+        Same as :meth:`enqueue_bytes`, but pushes to the sub-queue of the flow.
+
+        The list of ``key`` holds one token per pending request,
+        so that workers can wait for requests with BRPOP.
+        """
+
+        if self._fair_enqueue is None:
+            raise NotInitializedError("Redis is not initialized")
+
+        expire_ms = round(expire * 1000) if expire else 0
+        depth = await self._fair_enqueue(
+            keys=[key, marker],
+            args=[value, expire_ms, maxdepth, provider, channel],
+            client=self.command_redis(key, marker),
+        )
+        if depth == QUEUE_FULL:
+            raise QueueFullError(f"Queue '{key}' is full (max depth: {maxdepth})")
+
+        logger.info(f"Fair enqueue '{key}' ({provider}/{channel}) (depth: {depth})")
+        return depth
+
+    async def fair_dequeue_bytes(
+        self,
+        keys: Sequence[str],
+        count: int,
+        weights: Optional[Dict[str, int]] = None,
+        refund=0,
+    ) -> List[Tuple[bytes, bytes]]:
+        """
+        Pop up to ``count`` requests in deficit round-robin order,
+        first across providers and then across the channels of each provider.
+
+        :param refund: Number of tokens of ``keys[0]`` already taken by BRPOP.
+        :return: A list of (key, value) pairs.
+        """
+
+        if self._fair_dequeue is None:
+            raise NotInitializedError("Redis is not initialized")
+
+        args: List[Any] = [count, refund]
+        for name, weight in (weights if weights else dict()).items():
+            args.extend((name, weight))
+
+        response = await self._fair_dequeue(
+            keys=list(keys),
+            args=args,
+            client=self.command_redis(*keys),
+        )
+        assert isinstance(response, list)
+        assert len(response) % 2 == 0
+        result = list(zip(response[0::2], response[1::2]))
+        if result:
+            logger.info(f"Fair dequeue {list(keys)} -> {len(result)} items")
+        return result
+
+    async def consume_marker(self, marker: str) -> bool:
+        """
+        Remove the expiry marker.
+
+        :return: If the marker has already expired, it returns False.
+        """
+
+        return await self.delete(marker) == 1
+
+    async def brpop_bytes(
+        self,
+        key: Union[str, Sequence[str]],
         timeout: Optional[int] = None,
     ) -> Optional[Sequence[bytes]]:
-        logger.debug(f"Blocking Right POP '{key}' {timeout}s ...")
-        value = await self.redis.brpop([key], timeout)
+        """
+        If several keys are given, the first non-empty key in the order is popped.
+        """
+
+        keys = [key] if isinstance(key, str) else list(key)
+        logger.debug(f"Blocking Right POP {keys} {timeout}s ...")
+        value = await self._blocking_redis_for(keys).brpop(keys, timeout)
 
         if value is None:
-            logger.debug(f"Blocking Right POP '{key}' ... timeout!")
+            logger.debug(f"Blocking Right POP {keys} ... timeout!")
             return None
 
-        assert isinstance(value, tuple)
+        assert isinstance(value, (tuple, list))
         assert len(value) % 2 == 0 and len(value) >= 2
-        logger.info(f"Blocking Right POP '{key}' -> {value}")
+        logger.info(f"Blocking Right POP {keys} -> {value}")
+        return tuple(value)
+
+    async def rpop_bytes(self, key: str, count: int) -> List[bytes]:
+        value = await self.command_redis(key).rpop(key, count)
+        if value is None:
+            return list()
+
+        assert isinstance(value, list)
+        logger.info(f"Right POP '{key}' (count: {count}) -> {len(value)} items")
         return value
+
+    async def brpop_batch_bytes(
+        self,
+        key: Union[str, Sequence[str]],
+        count: int,
+        timeout: Optional[int] = None,
+    ) -> List[Tuple[bytes, bytes]]:
+        """
+        Waits for the first item with BRPOP,
+        then drains up to ``count - 1`` more items from the same key with RPOP.
+
+        :return: A list of (key, value) pairs.
+        """
+
+        first = await self.brpop_bytes(key, timeout)
+        if first is None:
+            return list()
+
+        assert isinstance(first, tuple)
+        assert len(first) == 2
+        popped_key, value = first
+        result = [(popped_key, value)]
+
+        if count >= 2:
+            rest_key = str(popped_key, encoding=PATH_ENCODING)
+            rest = await self.rpop_bytes(rest_key, count - 1)
+            result.extend((popped_key, v) for v in rest)
+
+        return result
+
+    async def xadd_bytes(
+        self,
+        key: str,
+        value: bytes,
+        field: bytes = STREAM_DATA_FIELD,
+        maxlen: Optional[int] = None,
+    ) -> bytes:
+        entry_id = await self.command_redis(key).xadd(
+            key,
+            {field: value},
+            maxlen=maxlen,
+            approximate=True,
+        )
+        assert isinstance(entry_id, bytes)
+        logger.info(f"Stream ADD '{key}' ({entry_id!r}) -> {value!r}")
+        return entry_id
+
+    async def xgroup_create(self, key: str, group: str) -> bool:
+        try:
+            redis = self.command_redis(key)
+            await redis.xgroup_create(key, group, id="0", mkstream=True)
+        except ResponseError as e:
+            if str(e).startswith(BUSYGROUP_ERROR_PREFIX):
+                return False
+            raise
+        else:
+            logger.info(f"Stream group '{group}' was created in '{key}'")
+            return True
+
+    async def xreadgroup_bytes(
+        self,
+        key: str,
+        group: str,
+        consumer: str,
+        count: Optional[int] = None,
+        timeout: Optional[int] = None,
+        field: bytes = STREAM_DATA_FIELD,
+    ) -> List[Tuple[bytes, bytes]]:
+        entries = await self.xreadgroup_streams_bytes(
+            [key], group, consumer, count, timeout, field
+        )
+        return [(entry_id, data) for _, entry_id, data in entries]
+
+    async def xreadgroup_streams_bytes(
+        self,
+        keys: Sequence[str],
+        group: str,
+        consumer: str,
+        count: Optional[int] = None,
+        timeout: Optional[int] = None,
+        field: bytes = STREAM_DATA_FIELD,
+    ) -> List[Tuple[bytes, bytes, bytes]]:
+        """
+        Read new entries from several streams of the same group.
+
+        The ``count`` is applied to each stream.
+
+        :return: A list of (stream, entry_id, data) tuples.
+        """
+
+        block = timeout * 1000 if timeout is not None else 0
+        logger.debug(f"Stream READGROUP {keys} ({group}/{consumer}) {timeout}s ...")
+        response = await self._blocking_redis_for(keys).xreadgroup(
+            group,
+            consumer,
+            {key: ">" for key in keys},
+            count=count,
+            block=block,
+        )
+
+        if not response:
+            logger.debug(f"Stream READGROUP {keys} ... timeout!")
+            return list()
+
+        if isinstance(response, dict):
+            streams = list(response.items())
+        else:
+            streams = list(response)
+
+        result = list()
+        for stream, stream_entries in streams:
+            if isinstance(stream_entries, list) and stream_entries:
+                if isinstance(stream_entries[0], list):
+                    # RESP3 returns a nested list of entries.
+                    stream_entries = stream_entries[0]
+            stream_key = encode_path(stream)
+            for entry_id, data in _select_stream_field(stream_entries, field):
+                result.append((stream_key, entry_id, data))
+
+        logger.info(f"Stream READGROUP {keys} -> {[e[1] for e in result]}")
+        return result
+
+    async def xautoclaim_bytes(
+        self,
+        key: str,
+        group: str,
+        consumer: str,
+        min_idle: float,
+        count: Optional[int] = None,
+        field: bytes = STREAM_DATA_FIELD,
+        start_id: Union[str, bytes] = STREAM_CLAIM_START,
+    ) -> Tuple[bytes, List[Tuple[bytes, bytes]]]:
+        """
+        :return: The cursor to continue the scan from, and a list of
+            (entry_id, data) pairs. The cursor is ``0-0`` once the scan is done.
+        """
+
+        min_idle_time = int(min_idle * 1000)
+        response = await self.command_redis(key).xautoclaim(
+            key,
+            group,
+            consumer,
+            min_idle_time,
+            start_id=start_id,
+            count=count,
+        )
+
+        assert isinstance(response, (list, tuple))
+        assert len(response) >= 2
+        cursor = encode_path(response[0])
+        result = list(_select_stream_field(response[1], field))
+        if result:
+            logger.warning(f"Stream AUTOCLAIM '{key}' -> {[e[0] for e in result]}")
+        return cursor, result
+
+    async def xdelivered_count(self, key: str, group: str, entry_id: bytes) -> int:
+        """
+        :return: The number of times the pending entry was delivered,
+            or 0 if the entry is not pending.
+        """
+
+        response = await self.command_redis(key).xpending_range(
+            key,
+            group,
+            min=entry_id,
+            max=entry_id,
+            count=1,
+        )
+        if not response:
+            return 0
+
+        assert isinstance(response, list)
+        return int(response[0]["times_delivered"])
+
+    async def xtouch_pending_bytes(
+        self,
+        key: str,
+        group: str,
+        consumer: str,
+        *entry_ids: bytes,
+    ) -> List[bytes]:
+        """
+        Reset the idle time of the pending entries still owned by the consumer,
+        without increasing their delivery counts.
+
+        :return: The IDs of the entries that are still owned by the consumer.
+        """
+
+        if self._touch_pending is None:
+            raise NotInitializedError("Redis is not initialized")
+
+        result = await self._touch_pending(
+            keys=[key],
+            args=[group, consumer, *entry_ids],
+            client=self.command_redis(key),
+        )
+        assert isinstance(result, list)
+        touched = [encode_path(entry_id) for entry_id in result]
+        logger.debug(f"Stream TOUCH '{key}' ({group}) -> {touched}")
+        return touched
+
+    async def xack_bytes(
+        self,
+        key: str,
+        group: str,
+        *entry_ids: bytes,
+        delete=True,
+    ) -> None:
+        logger.info(f"Stream ACK '{key}' ({group}) -> {entry_ids}")
+        if delete:
+            redis = self.command_redis(key)
+            async with redis.pipeline(transaction=True) as pipeline:
+                # noinspection PyUnresolvedReferences
+                await pipeline.xack(key, group, *entry_ids).xdel(
+                    key, *entry_ids
+                ).execute()
+        else:
+            await self.command_redis(key).xack(key, group, *entry_ids)
+
+
+def _select_stream_field(entries, field: bytes):
+    for entry_id, fields in entries:
+        if fields is None:
+            # The entry was deleted before it could be claimed.
+            continue
+        value = fields.get(field)
+        if value is None:
+            logger.warning(f"Stream entry {entry_id!r} has no {field!r} field")
+            continue
+        yield entry_id, value
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+from typing import Any, Dict, Final, Hashable, Iterable, List, Optional, Set, Tuple
+
+from osom_api.metrics.registry import MetricsRegistry, default_registry
+from osom_api.paths import MQ_REGISTRY_PATH
+from osom_api.utils.path.mq import PATH_ENCODING
+
+TRACKING_INVALIDATE_CHANNEL: Final[bytes] = b"__redis__:invalidate"
+
+DEFAULT_CACHE_PREFIXES: Final[Tuple[str, ...]] = (MQ_REGISTRY_PATH,)
+"""
+Keys that are read on every message but rarely written.
+"""
+
+CacheEntry = Tuple[Hashable, ...]
+"""
+The command and its arguments, starting with the name and the key.
+"""
+
+CACHE_MISSING: Final = object()
+"""
+Distinguishes an entry that is not cached from a cached ``None`` reply.
+"""
+
+
+def parse_cache_prefixes(text: Optional[str]) -> List[str]:
+    """
+    Parse a comma-separated list of key prefixes.
+    """
+
+    if not text:
+        return list(DEFAULT_CACHE_PREFIXES)
+
+    result = [p.strip() for p in text.split(",") if p.strip()]
+    if not result:
+        raise ValueError("Cache prefixes do not contain any prefix")
+    return result
+
+
+class MqCache:
+    """
+    Bounded LRU cache of read replies, kept coherent by the invalidation messages
+    that Redis sends to the tracking connections.
+
+    Replies are served only while the tracking is active,
+    since invalidations could have been missed when it was not.
+    A reply read while an invalidation arrived is not stored,
+    as it may be older than the invalidation.
+    """
+
+    _entries: OrderedDict[CacheEntry, Any]
+    _keys: Dict[bytes, Set[CacheEntry]]
+
+    def __init__(
+        self,
+        max_size: int,
+        prefixes: Iterable[str] = DEFAULT_CACHE_PREFIXES,
+        registry: Optional[MetricsRegistry] = None,
+    ):
+        self._max_size = max(max_size, 0)
+        self._prefixes = tuple(prefixes)
+        self._entries = OrderedDict()
+        self._keys = dict()
+        self._active = False
+        self._epoch = 0
+
+        metrics = registry if registry is not None else default_registry()
+        self._hits = metrics.counter("mq.cache.hits")
+        self._misses = metrics.counter("mq.cache.misses")
+        self._evictions = metrics.counter("mq.cache.evictions")
+        self._invalidations = metrics.counter("mq.cache.invalidations")
+        self._size = metrics.gauge("mq.cache.size")
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_size > 0
+
+    @property
+    def active(self) -> bool:
+        return self._active
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def prefixes(self):
+        return self._prefixes
+
+    @property
+    def epoch(self) -> int:
+        return self._epoch
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def cacheable(self, key: str) -> bool:
+        return self._active and key.startswith(self._prefixes)
+
+    def activate(self) -> None:
+        self.clear()
+        self._active = True
+
+    def deactivate(self) -> None:
+        self._active = False
+        self.clear()
+
+    def get(self, entry: CacheEntry) -> Any:
+        """
+        :return: The cached reply, or ``CACHE_MISSING``.
+        """
+
+        value = self._entries.get(entry, CACHE_MISSING)
+        if value is CACHE_MISSING:
+            self._misses.inc()
+        else:
+            self._entries.move_to_end(entry)
+            self._hits.inc()
+        return value
+
+    def put(self, entry: CacheEntry, value: Any, epoch: int) -> bool:
+        """
+        :param epoch: The epoch observed before the reply was requested.
+        :return: False if the reply was not stored.
+        """
+
+        if not self._active or epoch != self._epoch:
+            return False
+
+        key = entry[1]
+        assert isinstance(key, str)
+        encoded_key = key.encode(PATH_ENCODING)
+
+        self._entries[entry] = value
+        self._entries.move_to_end(entry)
+        self._keys.setdefault(encoded_key, set()).add(entry)
+
+        while len(self._entries) > self._max_size:
+            evicted, _ = self._entries.popitem(last=False)
+            self._forget(evicted)
+            self._evictions.inc()
+
+        self._size.set(len(self._entries))
+        return True
+
+    def _forget(self, entry: CacheEntry) -> None:
+        key = entry[1]
+        assert isinstance(key, str)
+        encoded_key = key.encode(PATH_ENCODING)
+        entries = self._keys.get(encoded_key)
+        if entries is None:
+            return
+        entries.discard(entry)
+        if not entries:
+            self._keys.pop(encoded_key)
+
+    def invalidate(self, keys: Optional[Iterable[bytes]]) -> None:
+        """
+        :param keys: The modified keys, or None if the whole database was flushed.
+        """
+
+        self._epoch += 1
+        self._invalidations.inc()
+
+        if keys is None:
+            self.clear()
+            return
+
+        for key in keys:
+            for entry in self._keys.pop(key, set()):
+                self._entries.pop(entry, None)
+        self._size.set(len(self._entries))
+
+    def clear(self) -> None:
+        self._epoch += 1
+        self._entries.clear()
+        self._keys.clear()
+        self._size.set(0)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import unquote, urlsplit
+
+from redis.asyncio.client import Redis
+from redis.asyncio.cluster import RedisCluster
+from redis.asyncio.sentinel import Sentinel
+
+from osom_api.context.mq.pool import MeasuredConnectionPool
+
+try:
+    from redis.asyncio.cluster import ClusterPubSub
+except ImportError:
+    # The asyncio cluster client has sharded pub/sub since redis-py 8.0.
+    ClusterPubSub = None  # type: ignore[assignment,misc]
+
+RedisClient = Union[Redis, RedisCluster]
+
+DEFAULT_SENTINEL_PORT = 26379
+
+
+def parse_sentinel_url(url: str) -> Tuple[List[Tuple[str, int]], Dict[str, Any]]:
+    """
+    Parse a comma-separated list of Sentinel nodes.
+
+    The format looks like 'redis://[[user]:password@]host1[:port],host2[:port]/db',
+    and the credentials and database number are applied to the master connection.
+    """
+
+    result = urlsplit(url)
+    userinfo, _, hosts = result.netloc.rpartition("@")
+
+    options: Dict[str, Any] = dict()
+    if userinfo:
+        username, _, password = userinfo.partition(":")
+        if username:
+            options["username"] = unquote(username)
+        if password:
+            options["password"] = unquote(password)
+
+    db = result.path.lstrip("/")
+    if db:
+        options["db"] = int(db)
+    if result.scheme == "rediss":
+        options["ssl"] = True
+
+    sentinels = list()
+    for host in hosts.split(","):
+        if not host:
+            continue
+        name, _, port = host.rpartition(":")
+        if name:
+            sentinels.append((name, int(port)))
+        else:
+            sentinels.append((port, DEFAULT_SENTINEL_PORT))
+
+    if not sentinels:
+        raise ValueError("Sentinel URL does not contain any host")
+
+    return sentinels, options
+
+
+def create_standalone_redis(
+    url: str,
+    pool_name: str,
+    max_connections: int,
+    timeout: Optional[float],
+    **options,
+) -> Redis:
+    pool = MeasuredConnectionPool.from_url(
+        url,
+        pool_name=pool_name,
+        max_connections=max_connections,
+        timeout=timeout,
+        **options,
+    )
+    return Redis(connection_pool=pool)
+
+
+def create_sentinel_redis(
+    url: str,
+    service_name: str,
+    max_connections: int,
+    **options,
+) -> Redis:
+    sentinels, master_options = parse_sentinel_url(url)
+    sentinel_options = dict(options)
+    sentinel_options.pop("ssl_cert_reqs", None)
+    sentinel = Sentinel(sentinels, sentinel_kwargs=sentinel_options)
+
+    # [IMPORTANT]
+    # The master address is resolved through the Sentinels on every connection,
+    # so that a failover is followed by the next reconnection.
+    return sentinel.master_for(
+        service_name,
+        max_connections=max_connections,
+        **master_options,
+        **options,
+    )
+
+
+def create_cluster_redis(url: str, max_connections: int, **options) -> RedisCluster:
+    if ClusterPubSub is None:
+        raise RuntimeError("Redis Cluster mode requires redis-py 8.0 or later")
+    return RedisCluster.from_url(url, max_connections=max_connections, **options)
+
+
+async def close_redis_client(client: RedisClient) -> None:
+    if isinstance(client, RedisCluster):
+        await client.aclose()
+    else:
+        await client.connection_pool.disconnect()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+from typing import List
+
+from osom_api.arguments import DEFAULT_WORKER_DEAD_LETTER_MAXLEN
+from osom_api.chrono.datetime import tznow
+from osom_api.context.mq import MqClient
+from osom_api.context.mq.queue import MqFlow, MqQueue
+from osom_api.logging.logging import logger
+from osom_api.msg import MsgDeadLetter, MsgRequest
+from osom_api.utils.path.mq import make_dead_letter_path
+
+
+class MqDeadLetterQueue:
+    """
+    Failed request packets of each worker, kept for inspection and re-driving.
+
+    The newest dead letter is at the head of the list,
+    and only the latest ``maxlen`` dead letters are kept.
+    """
+
+    def __init__(self, mq: MqClient, maxlen=DEFAULT_WORKER_DEAD_LETTER_MAXLEN):
+        self._mq = mq
+        self._maxlen = maxlen
+
+    @property
+    def maxlen(self):
+        return self._maxlen
+
+    async def push(self, request_path: str, letter: MsgDeadLetter) -> None:
+        key = make_dead_letter_path(request_path)
+        await self._mq.lpush_trim_bytes(key, letter.encode(), self._maxlen)
+
+    async def count(self, request_path: str) -> int:
+        return await self._mq.llen(make_dead_letter_path(request_path))
+
+    async def peek(self, request_path: str, count: int) -> List[MsgDeadLetter]:
+        """
+        :return: The newest dead letters first.
+        """
+
+        key = make_dead_letter_path(request_path)
+        items = await self._mq.lrange_bytes(key, 0, count - 1)
+        return [MsgDeadLetter.decode(item) for item in items]
+
+    async def redrive(self, queue: MqQueue, request_path: str, count: int) -> int:
+        """
+        Push the oldest dead letters back to the request queue of the worker.
+
+        The deadline of the request is cleared,
+        since nobody is waiting for the reply any longer.
+        The attempts of the dead letter are carried by the request,
+        so that the worker quarantines it once it exceeds the attempt limit.
+        Dead letters that cannot be decoded are left in the list.
+
+        :return: The number of re-driven requests.
+        """
+
+        key = make_dead_letter_path(request_path)
+        items = await self._mq.lrange_bytes(key, -count, -1)
+
+        result = 0
+        for item in reversed(items):
+            try:
+                letter = MsgDeadLetter.decode(item)
+                request = MsgRequest.decode(letter.data)
+            except BaseException as e:
+                logger.error(f"Dead letter {item!r} cannot be re-driven: {e}")
+                continue
+
+            request.deadline = None
+            request.queued_at = tznow()
+            request.attempts = letter.attempts
+            await queue.push(
+                request_path,
+                request.encode(),
+                request.msg_uuid,
+                priority=request.priority,
+                flow=MqFlow.from_request(request),
+            )
+            await self._mq.lrem_bytes(key, item)
+            logger.info(f"Msg({request.msg_uuid}) Re-driven to '{request_path}'")
+            result += 1
+
+        return result
+
+    async def purge(self, request_path: str) -> int:
+        key = make_dead_letter_path(request_path)
+        count = await self._mq.llen(key)
+        await self._mq.delete(key)
+        return count
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+from asyncio import Queue, QueueFull, Task, create_task, gather
+from asyncio.exceptions import CancelledError
+from time import monotonic
+from typing import Awaitable, Callable, List, Optional, Tuple
+from zlib import crc32
+
+from osom_api.logging.logging import logger
+from osom_api.metrics.registry import MetricsRegistry, default_registry
+
+SubscribeHandler = Callable[[bytes, bytes], Awaitable[None]]
+SubscribeItem = Tuple[bytes, bytes]
+
+
+class MqDispatcher:
+    """
+    Hands subscription messages over to a bounded number of handler tasks,
+    so that a slow handler does not block the subscription loop.
+
+    If ``ordered`` is true, messages of the same channel are always handled
+    by the same task in the order they were received.
+    Otherwise, all tasks share a single queue.
+    When the queue is full, the message is dropped and counted as an overflow.
+    """
+
+    _queues: List[Queue[SubscribeItem]]
+    _tasks: List[Task[None]]
+
+    def __init__(
+        self,
+        handler: SubscribeHandler,
+        concurrency=1,
+        queue_size=0,
+        ordered=True,
+        registry: Optional[MetricsRegistry] = None,
+    ):
+        self._handler = handler
+        self._concurrency = max(concurrency, 1)
+        self._queue_size = max(queue_size, 0)
+        self._ordered = ordered
+
+        num_queues = self._concurrency if ordered else 1
+        self._queues = [Queue(self._queue_size) for _ in range(num_queues)]
+        self._tasks = list()
+
+        metrics = registry if registry is not None else default_registry()
+        self._dispatched = metrics.counter("mq.subscribe.dispatched")
+        self._overflow = metrics.counter("mq.subscribe.overflow")
+        self._pending = metrics.gauge("mq.subscribe.pending")
+        self._handle_time = metrics.summary("mq.subscribe.handle_time")
+
+    @property
+    def concurrency(self) -> int:
+        return self._concurrency
+
+    @property
+    def ordered(self) -> bool:
+        return self._ordered
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    def qsize(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    def select_queue(self, channel: bytes) -> Queue[SubscribeItem]:
+        if len(self._queues) == 1:
+            return self._queues[0]
+        return self._queues[crc32(channel) % len(self._queues)]
+
+    def dispatch(self, channel: bytes, data: bytes) -> bool:
+        try:
+            self.select_queue(channel).put_nowait((channel, data))
+        except QueueFull:
+            self._overflow.inc()
+            logger.warning(f"Subscription queue is full. Drop message: {channel!r}")
+            return False
+        else:
+            self._dispatched.inc()
+            self._pending.inc()
+            return True
+
+    async def _handler_main(self, queue: Queue[SubscribeItem]) -> None:
+        while True:
+            channel, data = await queue.get()
+            self._pending.dec()
+            begin = monotonic()
+            try:
+                await self._handler(channel, data)
+            except CancelledError:
+                raise
+            except BaseException as e:
+                logger.exception(e)
+            finally:
+                self._handle_time.observe(monotonic() - begin)
+                queue.task_done()
+
+    def start(self) -> None:
+        assert not self._tasks
+        for i in range(self._concurrency):
+            queue = self._queues[i % len(self._queues)]
+            task = create_task(self._handler_main(queue), name=f"MqDispatcher-{i}")
+            self._tasks.append(task)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+        dropped = 0
+        for queue in self._queues:
+            while not queue.empty():
+                queue.get_nowait()
+                queue.task_done()
+                dropped += 1
+
+        if dropped:
+            self._pending.dec(dropped)
+            logger.warning(f"Dropped {dropped} subscription messages on stop")
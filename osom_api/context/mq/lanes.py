@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+from typing import Dict, List, Optional, Sequence
+
+from osom_api.msg.enums.priority import MSG_PRIORITIES, MsgPriority
+
+
+def parse_priority_weights(text: Optional[str]) -> Dict[MsgPriority, int]:
+    """
+    Parse the weights of the priority lanes formatted as 'high=8,normal=4,low=1'.
+
+    Lanes that are not listed have a weight of 1.
+    """
+
+    if not text:
+        return dict()
+
+    result = {priority: 1 for priority in MSG_PRIORITIES}
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Invalid priority weight: '{item}'")
+
+        weight = int(value)
+        if weight < 1:
+            raise ValueError(f"The weight of the '{name}' lane must be positive")
+        result[MsgPriority(name.strip())] = weight
+    return result
+
+
+def parse_command_priorities(text: Optional[str]) -> Dict[str, MsgPriority]:
+    """
+    Parse the priorities of the commands formatted as 'command=high,...'.
+
+    Commands that are not listed keep the priority of the request.
+    """
+
+    result: Dict[str, MsgPriority] = dict()
+    if not text:
+        return result
+
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+
+        name, sep, value = item.partition("=")
+        if not sep or not name:
+            raise ValueError(f"Invalid command priority: '{item}'")
+        result[name.strip()] = MsgPriority(value.strip())
+    return result
+
+
+class LaneSelector:
+    """
+    Decides the order in which the priority lanes are polled.
+
+    Without weights, the lanes are always polled from the highest priority (strict).
+    With weights, the first lane is chosen by smooth weighted round-robin,
+    so lower lanes get their share even while higher lanes are busy.
+    """
+
+    _current: Dict[MsgPriority, int]
+
+    def __init__(self, weights: Optional[Dict[MsgPriority, int]] = None):
+        self._weights = dict(weights) if weights else dict()
+        self._total = sum(self._weights.values())
+        self._current = {priority: 0 for priority in self._weights}
+
+    @property
+    def weighted(self) -> bool:
+        return bool(self._weights)
+
+    def order(self) -> Sequence[MsgPriority]:
+        if not self._weights:
+            return MSG_PRIORITIES
+
+        for priority, weight in self._weights.items():
+            self._current[priority] += weight
+        first = max(MSG_PRIORITIES, key=lambda p: self._current.get(p, 0))
+        self._current[first] -= self._total
+
+        result: List[MsgPriority] = [first]
+        result.extend(p for p in MSG_PRIORITIES if p != first)
+        return result
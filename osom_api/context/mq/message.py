@@ -13,6 +13,9 @@ class MessageType(Enum):
     punsubscribe = auto()
     message = auto()
     pmessage = auto()
+    ssubscribe = auto()
+    sunsubscribe = auto()
+    smessage = auto()
 
 
 MESSAGE_TYPE_NAMES: Final[Sequence[str]] = tuple(mt.name for mt in MessageType)
@@ -49,6 +52,18 @@ class Message:
     def is_pmessage(self) -> bool:
         return self.type == MessageType.pmessage
 
+    @property
+    def is_ssubscribe(self) -> bool:
+        return self.type == MessageType.ssubscribe
+
+    @property
+    def is_sunsubscribe(self) -> bool:
+        return self.type == MessageType.sunsubscribe
+
+    @property
+    def is_smessage(self) -> bool:
+        return self.type == MessageType.smessage
+
     @property
     def has_pattern(self) -> bool:
         return len(self.pattern) >= 1
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+from time import monotonic
+from typing import Optional
+
+from redis.asyncio.connection import BlockingConnectionPool
+from redis.exceptions import ConnectionError
+
+from osom_api.metrics.registry import MetricsRegistry, default_registry
+
+
+class MeasuredConnectionPool(BlockingConnectionPool):
+    """
+    Blocking connection pool that records how long callers wait for a connection.
+
+    When all connections are checked out, the caller waits up to ``timeout``
+    seconds instead of opening a new connection.
+    """
+
+    def __init__(
+        self,
+        *args,
+        pool_name: str = "default",
+        registry: Optional[MetricsRegistry] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.pool_name = pool_name
+
+        metrics = registry if registry is not None else default_registry()
+        prefix = f"mq.pool.{pool_name}"
+        self._checkout_wait = metrics.summary(f"{prefix}.checkout_wait")
+        self._checkout_timeout = metrics.counter(f"{prefix}.checkout_timeout")
+        self._connect_error = metrics.counter(f"{prefix}.connect_error")
+        self._in_use = metrics.gauge(f"{prefix}.in_use")
+        metrics.gauge(f"{prefix}.max_connections").set(self.max_connections)
+
+    async def get_connection(self, *args, **kwargs):
+        begin = monotonic()
+        try:
+            connection = await super().get_connection(*args, **kwargs)
+        except ConnectionError as e:
+            # [IMPORTANT]
+            # Only the exhausted pool raises from the timeout of the wait.
+            # The other errors are failed connects (refused, DNS, ...),
+            # after which the pool already handed the connection to 'release()'.
+            if isinstance(e.__cause__, TimeoutError):
+                self._checkout_timeout.inc()
+            else:
+                self._connect_error.inc()
+                self._in_use.inc()
+            raise
+        finally:
+            self._checkout_wait.observe(monotonic() - begin)
+
+        self._in_use.inc()
+        return connection
+
+    async def release(self, connection) -> None:
+        self._in_use.dec()
+        await super().release(connection)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+from asyncio import Future, Task, TimerHandle, create_task, gather, get_running_loop
+from asyncio.exceptions import CancelledError
+from typing import Any, Awaitable, Callable, List, NamedTuple, Optional, Set, Tuple
+
+from osom_api.logging.logging import logger
+from osom_api.metrics.registry import MetricsRegistry, default_registry
+
+PublishItem = Tuple[str, bytes]
+PublishFlush = Callable[[List[PublishItem]], Awaitable[List[Any]]]
+"""
+Publishes the items at once and returns the result of each item,
+where a failed item is given as an exception.
+"""
+
+
+class _Pending(NamedTuple):
+    key: str
+    data: bytes
+    future: Future[None]
+
+
+class MqPublisher:
+    """
+    Coalesces the messages published within a short window,
+    so that a burst of messages shares a single round trip.
+
+    The buffer is flushed when the window expires or the batch is full,
+    or at once for a message published with ``flush``.
+    Each publisher waits until its own message has been delivered,
+    and receives the error of its own message.
+    """
+
+    _buffer: List[_Pending]
+    _timer: Optional[TimerHandle]
+    _tasks: Set[Task[None]]
+
+    def __init__(
+        self,
+        flush: PublishFlush,
+        window=0.0,
+        batch_size=0,
+        registry: Optional[MetricsRegistry] = None,
+    ):
+        self._flush = flush
+        self._window = max(window, 0.0)
+        self._batch_size = max(batch_size, 0)
+        self._buffer = list()
+        self._timer = None
+        self._tasks = set()
+
+        metrics = registry if registry is not None else default_registry()
+        self._batches = metrics.counter("mq.publish.batches")
+        self._batch_sizes = metrics.summary("mq.publish.batch_size")
+
+    @property
+    def window(self) -> float:
+        return self._window
+
+    @property
+    def batch_size(self) -> int:
+        return self._batch_size
+
+    @property
+    def enabled(self) -> bool:
+        return self._window > 0
+
+    def qsize(self) -> int:
+        return len(self._buffer)
+
+    async def publish(self, key: str, data: bytes, flush=False) -> None:
+        future = get_running_loop().create_future()
+        self._buffer.append(_Pending(key, data, future))
+
+        if flush or not self.enabled:
+            self.flush()
+        elif 0 < self._batch_size <= len(self._buffer):
+            self.flush()
+        elif self._timer is None:
+            self._timer = get_running_loop().call_later(self._window, self.flush)
+
+        await future
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if not self._buffer:
+            return
+
+        items = self._buffer
+        self._buffer = list()
+        task = create_task(self._flush_main(items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush_main(self, items: List[_Pending]) -> None:
+        self._batches.inc()
+        self._batch_sizes.observe(len(items))
+
+        try:
+            results = await self._flush([(i.key, i.data) for i in items])
+        except CancelledError:
+            for item in items:
+                if not item.future.done():
+                    item.future.cancel()
+            raise
+        except BaseException as e:
+            results = [e] * len(items)
+
+        assert len(results) == len(items)
+        for item, result in zip(items, results):
+            if item.future.done():
+                continue
+            if isinstance(result, BaseException):
+                item.future.set_exception(result)
+            else:
+                item.future.set_result(None)
+
+    async def close(self) -> None:
+        """
+        Deliver the buffered messages and wait for the flushes in progress.
+        """
+
+        self.flush()
+        if self._tasks:
+            logger.debug(f"Waiting for {len(self._tasks)} publish batches ...")
+            await gather(*self._tasks, return_exceptions=True)
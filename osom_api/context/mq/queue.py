@@ -0,0 +1,509 @@
+# -*- coding: utf-8 -*-
+
+from abc import ABCMeta, abstractmethod
+from collections import deque
+from math import ceil
+from os import getpid
+from socket import gethostname
+from time import monotonic
+from typing import Deque, Dict, Final, List, NamedTuple, Optional, Sequence, Set
+
+from osom_api.args.redis import RedisArgs
+from osom_api.arguments import (
+    DEFAULT_REDIS_STREAM_CLAIM_IDLE,
+    REDIS_MODE_CLUSTER,
+    REDIS_QUEUE_TYPE_FAIR,
+    REDIS_QUEUE_TYPE_LIST,
+    REDIS_QUEUE_TYPE_STREAM,
+)
+from osom_api.context.mq import STREAM_CLAIM_START, MqClient
+from osom_api.logging.logging import logger
+from osom_api.msg.enums.priority import MSG_PRIORITIES, MsgPriority
+from osom_api.msg.request import MsgRequest
+from osom_api.utils.path.mq import (
+    PATH_ENCODING,
+    encode_path,
+    make_expire_marker_path,
+    make_lane_path,
+)
+
+DEFAULT_FLOW_NAME: Final[str] = "default"
+
+
+def default_consumer_name() -> str:
+    return f"{gethostname()}-{getpid()}"
+
+
+class MqPacket(NamedTuple):
+    key: bytes
+    data: bytes
+    entry_id: Optional[bytes] = None
+    attempts: int = 1
+    """Number of times the packet was delivered to workers."""
+
+    @property
+    def redelivered(self) -> bool:
+        return self.attempts > 1
+
+
+class MqFlow(NamedTuple):
+    """
+    Tenant of a request, which the fair queue schedules separately.
+    """
+
+    provider: str = DEFAULT_FLOW_NAME
+    channel: str = DEFAULT_FLOW_NAME
+
+    @classmethod
+    def from_request(cls, request: MsgRequest):
+        channel = str(request.channel_id) if request.channel_id is not None else None
+        return cls(str(request.provider), channel if channel else DEFAULT_FLOW_NAME)
+
+
+def parse_fair_weights(text: Optional[str]) -> Dict[str, int]:
+    """
+    Parse the weights of the flows formatted as 'provider=8,provider:channel=2'.
+    """
+
+    result: Dict[str, int] = dict()
+    if not text:
+        return result
+
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+
+        name, sep, value = item.partition("=")
+        if not sep or not name:
+            raise ValueError(f"Invalid flow weight: '{item}'")
+
+        weight = int(value)
+        if weight < 1:
+            raise ValueError(f"The weight of the '{name}' flow must be positive")
+        result[name.strip()] = weight
+    return result
+
+
+class MqQueue(metaclass=ABCMeta):
+    """
+    Transport of the request packets sent from endpoints to workers.
+
+    Each request path is split into priority lanes (see :func:`make_lane_path`),
+    and the pop operations poll the lanes in the order of ``priorities``.
+    """
+
+    def __init__(self, mq: MqClient):
+        self._mq = mq
+
+    @property
+    def mq(self):
+        return self._mq
+
+    @staticmethod
+    def lane_paths(key: str, priorities: Sequence[MsgPriority]) -> List[str]:
+        return [make_lane_path(key, priority) for priority in priorities]
+
+    @abstractmethod
+    async def push(
+        self,
+        key: str,
+        data: bytes,
+        marker: str,
+        expire: Optional[float] = None,
+        maxdepth=0,
+        priority=MsgPriority.normal,
+        flow: Optional[MqFlow] = None,
+    ) -> int:
+        """
+        :return: The depth of the lane after pushing.
+        """
+
+        raise NotImplementedError
+
+    async def consume_marker(self, key: str, marker: str) -> bool:
+        return await self._mq.consume_marker(make_expire_marker_path(key, marker))
+
+    async def consume_packet_marker(
+        self,
+        key: str,
+        packet: MqPacket,
+        marker: str,
+    ) -> bool:
+        """
+        :return: False if the request has expired or was cancelled in the queue.
+        """
+
+        # [IMPORTANT]
+        # The first delivery consumes the marker,
+        # so a packet redelivered after a crash has no marker left
+        # and only the deadline of the request applies to it.
+        if packet.redelivered:
+            return True
+        return await self.consume_marker(key, marker)
+
+    async def pop(
+        self,
+        key: str,
+        timeout: Optional[int] = None,
+        priorities: Sequence[MsgPriority] = MSG_PRIORITIES,
+    ) -> Optional[MqPacket]:
+        packets = await self.pop_batch(key, 1, timeout, priorities)
+        return packets[0] if packets else None
+
+    @abstractmethod
+    async def pop_batch(
+        self,
+        key: str,
+        count: int,
+        timeout: Optional[int] = None,
+        priorities: Sequence[MsgPriority] = MSG_PRIORITIES,
+    ) -> List[MqPacket]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def ack(self, packet: MqPacket) -> None:
+        raise NotImplementedError
+
+
+class MqListQueue(MqQueue):
+    """
+    LPUSH/BRPOP based queue.
+
+    A packet is removed from Redis as soon as it is popped,
+    so the request is lost if the worker stops before responding.
+    """
+
+    async def push(
+        self,
+        key: str,
+        data: bytes,
+        marker: str,
+        expire: Optional[float] = None,
+        maxdepth=0,
+        priority=MsgPriority.normal,
+        flow: Optional[MqFlow] = None,
+    ) -> int:
+        lane = make_lane_path(key, priority)
+        marker_path = make_expire_marker_path(key, marker)
+        return await self._mq.enqueue_bytes(lane, data, marker_path, expire, maxdepth)
+
+    async def pop_batch(
+        self,
+        key: str,
+        count: int,
+        timeout: Optional[int] = None,
+        priorities: Sequence[MsgPriority] = MSG_PRIORITIES,
+    ) -> List[MqPacket]:
+        # [IMPORTANT]
+        # BRPOP pops from the first non-empty key in the order,
+        # so a single round trip applies the priority of the lanes.
+        lanes = self.lane_paths(key, priorities)
+        items = await self._mq.brpop_batch_bytes(lanes, count, timeout)
+        return [MqPacket(lane, data) for lane, data in items]
+
+    async def ack(self, packet: MqPacket) -> None:
+        pass
+
+
+class MqStreamQueue(MqQueue):
+    """
+    XADD/XREADGROUP/XACK based queue with at-least-once delivery.
+
+    Workers sharing the same path join the same consumer group.
+    A packet stays in the Pending Entries List until it is acknowledged,
+    and entries left idle longer than ``claim_idle`` seconds
+    (e.g. the consumer crashed) are reclaimed with XAUTOCLAIM.
+    The stuck entries are reclaimed in batches every ``claim_interval`` seconds,
+    and again at once while a whole batch is reclaimed.
+    An idle consumer blocks no longer than the interval, so it reclaims as well.
+
+    XREADGROUP over several lanes returns the entries of every lane at once,
+    so the entries exceeding the batch are kept in a local buffer
+    and handed out by the next pop in the order of the priorities.
+    They are still pending in Redis, so they are reclaimed if the worker stops.
+    Their idle time keeps growing while they wait in the buffer, so it is reset
+    with XCLAIM when they are handed out, and the entries already reclaimed
+    by another consumer are dropped instead of running twice.
+    """
+
+    _groups: Set[str]
+    _buffers: Dict[bytes, Deque[MqPacket]]
+    _claim_cursors: Dict[str, bytes]
+
+    def __init__(
+        self,
+        mq: MqClient,
+        group: str,
+        consumer: Optional[str] = None,
+        claim_idle: float = DEFAULT_REDIS_STREAM_CLAIM_IDLE,
+        claim_interval: Optional[float] = None,
+        maxlen: Optional[int] = None,
+    ):
+        super().__init__(mq)
+        self._group = group
+        self._consumer = consumer if consumer else default_consumer_name()
+        self._claim_idle = claim_idle
+        self._claim_interval = claim_interval if claim_interval else claim_idle
+        self._maxlen = maxlen if maxlen else None
+        self._groups = set()
+        self._buffers = dict()
+        self._claim_cursors = dict()
+        self._last_claim = 0.0
+
+    @property
+    def group(self):
+        return self._group
+
+    @property
+    def consumer(self):
+        return self._consumer
+
+    @property
+    def buffered_count(self) -> int:
+        return sum(len(buffer) for buffer in self._buffers.values())
+
+    async def ensure_group(self, key: str) -> None:
+        if key in self._groups:
+            return
+
+        await self._mq.xgroup_create(key, self._group)
+        self._groups.add(key)
+
+    async def push(
+        self,
+        key: str,
+        data: bytes,
+        marker: str,
+        expire: Optional[float] = None,
+        maxdepth=0,
+        priority=MsgPriority.normal,
+        flow: Optional[MqFlow] = None,
+    ) -> int:
+        # [IMPORTANT]
+        # The stream is shared by all requests of the worker,
+        # so the expiration is applied to the marker of each request only.
+        lane = make_lane_path(key, priority)
+        marker_path = make_expire_marker_path(key, marker)
+        return await self._mq.xenqueue_bytes(
+            lane,
+            data,
+            marker_path,
+            expire,
+            maxdepth,
+            maxlen=self._maxlen,
+        )
+
+    def block_timeout(self, timeout: Optional[int]) -> int:
+        """
+        :param timeout: 0 or None blocks without a limit.
+        :return: The timeout that wakes up at least once a claim interval.
+        """
+
+        interval = max(ceil(self._claim_interval), 1)
+        return min(timeout, interval) if timeout else interval
+
+    async def claim(self, lanes: Sequence[str], count: int) -> List[MqPacket]:
+        now = monotonic()
+        if now - self._last_claim < self._claim_interval:
+            return list()
+
+        result: List[MqPacket] = list()
+        for lane in lanes:
+            cursor = self._claim_cursors.get(lane, STREAM_CLAIM_START)
+            while len(result) < count:
+                cursor, entries = await self._mq.xautoclaim_bytes(
+                    lane,
+                    self._group,
+                    self._consumer,
+                    min_idle=self._claim_idle,
+                    count=count - len(result),
+                    start_id=cursor,
+                )
+                for entry_id, data in entries:
+                    logger.warning(f"Reclaimed a stuck entry {entry_id!r} in '{lane}'")
+                    delivered = await self._mq.xdelivered_count(
+                        lane, self._group, entry_id
+                    )
+                    packet = MqPacket(
+                        encode_path(lane), data, entry_id, max(delivered, 1)
+                    )
+                    result.append(packet)
+                if cursor == STREAM_CLAIM_START:
+                    break
+            self._claim_cursors[lane] = cursor
+
+        # [IMPORTANT]
+        # A scan stopped by a full batch may leave more stuck entries behind,
+        # so the next pop continues it from the cursor without waiting.
+        if len(result) < count:
+            self._last_claim = now
+        return result
+
+    def take_buffered(self, lanes: Sequence[str], count: int) -> List[MqPacket]:
+        result: List[MqPacket] = list()
+        for lane in lanes:
+            buffer = self._buffers.get(encode_path(lane))
+            while buffer and len(result) < count:
+                result.append(buffer.popleft())
+        return result
+
+    async def touch_buffered(self, packets: List[MqPacket]) -> List[MqPacket]:
+        entry_ids: Dict[bytes, List[bytes]] = dict()
+        for packet in packets:
+            assert packet.entry_id is not None
+            entry_ids.setdefault(packet.key, list()).append(packet.entry_id)
+
+        owned: Set[bytes] = set()
+        for stream, ids in entry_ids.items():
+            key = str(stream, encoding=PATH_ENCODING)
+            touched = await self._mq.xtouch_pending_bytes(
+                key, self._group, self._consumer, *ids
+            )
+            owned.update(touched)
+
+        result: List[MqPacket] = list()
+        for packet in packets:
+            if packet.entry_id in owned:
+                result.append(packet)
+            else:
+                entry_id = packet.entry_id
+                logger.warning(f"Dropped a buffered entry {entry_id!r} reclaimed")
+        return result
+
+    async def pop_batch(
+        self,
+        key: str,
+        count: int,
+        timeout: Optional[int] = None,
+        priorities: Sequence[MsgPriority] = MSG_PRIORITIES,
+    ) -> List[MqPacket]:
+        lanes = self.lane_paths(key, priorities)
+        for lane in lanes:
+            await self.ensure_group(lane)
+
+        buffered = await self.touch_buffered(self.take_buffered(lanes, count))
+        if buffered:
+            return buffered
+
+        claimed = await self.claim(lanes, count)
+        if claimed:
+            return claimed
+
+        entries = await self._mq.xreadgroup_streams_bytes(
+            lanes,
+            self._group,
+            self._consumer,
+            count=count,
+            timeout=self.block_timeout(timeout),
+        )
+        for stream, entry_id, data in entries:
+            buffer = self._buffers.get(stream)
+            if buffer is None:
+                buffer = self._buffers[stream] = deque()
+            buffer.append(MqPacket(stream, data, entry_id))
+
+        return self.take_buffered(lanes, count)
+
+    async def ack(self, packet: MqPacket) -> None:
+        assert packet.entry_id is not None
+        key = str(packet.key, encoding=PATH_ENCODING)
+        await self._mq.xack_bytes(key, self._group, packet.entry_id)
+
+
+class MqFairQueue(MqQueue):
+    """
+    Weighted fair queue across the providers and channels of the requests.
+
+    Each lane keeps a sub-queue per flow (provider and channel),
+    and the requests are popped in deficit round-robin order,
+    first across the providers and then across the channels of each provider.
+    So a single busy channel cannot take the throughput of the others.
+
+    The lane itself holds one token per pending request.
+    Workers wait for a token with BRPOP and then pop with a Lua script,
+    which also keeps the lane depth equal to the number of pending requests.
+    Like the list queue, a packet is removed from Redis as soon as it is popped.
+    """
+
+    def __init__(self, mq: MqClient, weights: Optional[Dict[str, int]] = None):
+        super().__init__(mq)
+        self._weights = dict(weights) if weights else dict()
+
+    @property
+    def weights(self):
+        return self._weights
+
+    async def push(
+        self,
+        key: str,
+        data: bytes,
+        marker: str,
+        expire: Optional[float] = None,
+        maxdepth=0,
+        priority=MsgPriority.normal,
+        flow: Optional[MqFlow] = None,
+    ) -> int:
+        flow = flow if flow is not None else MqFlow()
+        lane = make_lane_path(key, priority)
+        marker_path = make_expire_marker_path(key, marker)
+        return await self._mq.fair_enqueue_bytes(
+            lane,
+            data,
+            marker_path,
+            flow.provider,
+            flow.channel,
+            expire,
+            maxdepth,
+        )
+
+    async def pop_batch(
+        self,
+        key: str,
+        count: int,
+        timeout: Optional[int] = None,
+        priorities: Sequence[MsgPriority] = MSG_PRIORITIES,
+    ) -> List[MqPacket]:
+        lanes = self.lane_paths(key, priorities)
+        items = await self._mq.fair_dequeue_bytes(lanes, count, self._weights)
+        if items:
+            return [MqPacket(k, data) for k, data in items]
+
+        token = await self._mq.brpop_bytes(lanes, timeout)
+        if token is None:
+            return list()
+
+        # [IMPORTANT]
+        # The token taken by BRPOP is returned to the lane inside the script,
+        # so that the lane depth always matches the pending requests.
+        lane = str(token[0], encoding=PATH_ENCODING)
+        items = await self._mq.fair_dequeue_bytes([lane], count, self._weights, 1)
+        return [MqPacket(k, data) for k, data in items]
+
+    async def ack(self, packet: MqPacket) -> None:
+        pass
+
+
+def create_mq_queue(mq: MqClient, args: RedisArgs) -> MqQueue:
+    if args.redis_queue_type == REDIS_QUEUE_TYPE_LIST:
+        return MqListQueue(mq)
+    elif args.redis_queue_type == REDIS_QUEUE_TYPE_STREAM:
+        return MqStreamQueue(
+            mq,
+            group=args.redis_stream_group,
+            consumer=args.redis_stream_consumer,
+            claim_idle=args.redis_stream_claim_idle,
+            maxlen=args.redis_stream_maxlen,
+        )
+    elif args.redis_queue_type == REDIS_QUEUE_TYPE_FAIR:
+        # [IMPORTANT]
+        # The scripts of the fair queue find the sub-queues of the flows at run time,
+        # so they cannot declare every key they access, as Cluster requires.
+        if args.redis_mode == REDIS_MODE_CLUSTER:
+            raise ValueError(
+                f"The '{REDIS_QUEUE_TYPE_FAIR}' queue is not supported "
+                f"in '{REDIS_MODE_CLUSTER}' mode"
+            )
+        return MqFairQueue(mq, parse_fair_weights(args.redis_fair_weights))
+    else:
+        raise ValueError(f"Unknown queue type: {args.redis_queue_type}")
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+from typing import Final, List, NamedTuple
+
+from osom_api.context.mq import MqClient
+from osom_api.logging.logging import logger
+from osom_api.msg import MsgWorker
+from osom_api.paths import MQ_REGISTRY_WORKER_PATH
+
+REGISTRY_VERSION_FIELD: Final[str] = "#version"
+REGISTRY_FIELD_SEPERATOR: Final[str] = "/"
+
+
+def registry_field(name: str, instance: str) -> str:
+    return f"{name}{REGISTRY_FIELD_SEPERATOR}{instance}"
+
+
+class MqRegistrySnapshot(NamedTuple):
+    version: int
+    workers: List[MsgWorker]
+
+
+class MqWorkerRegistry:
+    """
+    Worker instances registered in a Redis hash, next to the published packets.
+
+    Every change increases the version of the hash,
+    so that an endpoint can tell whether its snapshot is still current.
+    """
+
+    def __init__(self, mq: MqClient, key=MQ_REGISTRY_WORKER_PATH):
+        self._mq = mq
+        self._key = key
+
+    @property
+    def key(self):
+        return self._key
+
+    async def register(self, worker: MsgWorker) -> int:
+        field = registry_field(worker.name, worker.instance)
+        data = worker.encode()
+        return await self._mq.hset_versioned(
+            self._key, field, data, REGISTRY_VERSION_FIELD
+        )
+
+    async def unregister(self, name: str, instance: str) -> int:
+        field = registry_field(name, instance)
+        return await self._mq.hdel_versioned(self._key, field, REGISTRY_VERSION_FIELD)
+
+    async def version(self) -> int:
+        data = await self._mq.hget_optional_bytes(self._key, REGISTRY_VERSION_FIELD)
+        return int(data) if data is not None else 0
+
+    async def snapshot(self) -> MqRegistrySnapshot:
+        """
+        Load every registered worker instance in a single round trip.
+
+        Entries that cannot be decoded are skipped.
+        """
+
+        items = await self._mq.hgetall_bytes(self._key)
+        version = 0
+        workers = list()
+        for field, data in items.items():
+            if field == REGISTRY_VERSION_FIELD.encode():
+                version = int(data)
+                continue
+            try:
+                workers.append(MsgWorker.decode(data))
+            except BaseException as e:
+                logger.error(f"Registry entry {field!r} decoding fail: {e}")
+        return MqRegistrySnapshot(version, workers)
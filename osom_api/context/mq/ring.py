@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+from bisect import bisect
+from hashlib import blake2b
+from typing import List, NamedTuple, Sequence, Union
+
+from osom_api.context.mq.connection import RedisClient
+from osom_api.utils.path.mq import PATH_ENCODING
+
+DEFAULT_RING_REPLICAS = 160
+"""
+Number of virtual nodes of each shard on the ring.
+"""
+
+
+class MqShard(NamedTuple):
+    url: str
+    command: RedisClient
+    blocking: RedisClient
+    pubsub: RedisClient
+
+
+def parse_shard_urls(url: str) -> List[str]:
+    """
+    Parse a comma-separated list of Redis URLs.
+    """
+
+    result = [u.strip() for u in url.split(",") if u.strip()]
+    if not result:
+        raise ValueError("Shard URL does not contain any node")
+    if len(set(result)) != len(result):
+        raise ValueError("Shard URL contains duplicate nodes")
+    return result
+
+
+def shard_key(key: Union[str, bytes], encoding=PATH_ENCODING) -> bytes:
+    """
+    The part of the key that decides the shard, the same rule as Redis Cluster.
+
+    If the key contains a non-empty hash tag, only the tag is hashed,
+    so that all keys derived from the same worker or message stay together.
+    """
+
+    data = key.encode(encoding) if isinstance(key, str) else key
+    begin = data.find(b"{")
+    if begin == -1:
+        return data
+    end = data.find(b"}", begin + 1)
+    if end == -1 or end == begin + 1:
+        return data
+    return data[begin + 1 : end]
+
+
+def _hash(data: bytes) -> int:
+    return int.from_bytes(blake2b(data, digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Consistent hashing of the keys over the nodes.
+
+    Adding or removing a node moves only the keys of the neighbouring arcs.
+    """
+
+    def __init__(self, nodes: Sequence[str], replicas=DEFAULT_RING_REPLICAS):
+        if not nodes:
+            raise ValueError("Hash ring requires at least one node")
+
+        points = list()
+        for index, node in enumerate(nodes):
+            for replica in range(replicas):
+                points.append((_hash(f"{node}#{replica}".encode()), index))
+        points.sort()
+
+        self._size = len(nodes)
+        self._hashes = [point[0] for point in points]
+        self._indexes = [point[1] for point in points]
+
+    def __len__(self):
+        return self._size
+
+    def index(self, key: Union[str, bytes]) -> int:
+        if self._size == 1:
+            return 0
+        position = bisect(self._hashes, _hash(shard_key(key)))
+        return self._indexes[position % len(self._hashes)]
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+from typing import Final
+
+QUEUE_FULL: Final[int] = -1
+"""
+Value returned by the enqueue scripts when the queue depth reached the limit.
+"""
+
+ENQUEUE_LIST_SCRIPT: Final[str] = """
+-- KEYS[1]: Queue (List)
+-- KEYS[2]: Expiry marker of the request
+-- ARGV[1]: Request packet
+-- ARGV[2]: Expiry of the marker in milliseconds (0 is persistent)
+-- ARGV[3]: Maximum queue depth (0 is unlimited)
+local maxdepth = tonumber(ARGV[3])
+if maxdepth > 0 and redis.call('LLEN', KEYS[1]) >= maxdepth then
+    return -1
+end
+local expire = tonumber(ARGV[2])
+if expire > 0 then
+    redis.call('SET', KEYS[2], '1', 'PX', expire)
+else
+    redis.call('SET', KEYS[2], '1')
+end
+return redis.call('LPUSH', KEYS[1], ARGV[1])
+"""
+
+ENQUEUE_STREAM_SCRIPT: Final[str] = """
+-- KEYS[1]: Queue (Stream)
+-- KEYS[2]: Expiry marker of the request
+-- ARGV[1]: Request packet
+-- ARGV[2]: Expiry of the marker in milliseconds (0 is persistent)
+-- ARGV[3]: Maximum queue depth (0 is unlimited)
+-- ARGV[4]: Field name of the packet
+-- ARGV[5]: Approximate maximum length of the stream (0 is unlimited)
+local maxdepth = tonumber(ARGV[3])
+if maxdepth > 0 and redis.call('XLEN', KEYS[1]) >= maxdepth then
+    return -1
+end
+local expire = tonumber(ARGV[2])
+if expire > 0 then
+    redis.call('SET', KEYS[2], '1', 'PX', expire)
+else
+    redis.call('SET', KEYS[2], '1')
+end
+local maxlen = tonumber(ARGV[5])
+if maxlen > 0 then
+    redis.call('XADD', KEYS[1], 'MAXLEN', '~', maxlen, '*', ARGV[4], ARGV[1])
+else
+    redis.call('XADD', KEYS[1], '*', ARGV[4], ARGV[1])
+end
+return redis.call('XLEN', KEYS[1])
+"""
+
+# [WARNING]
+# The fair queue scripts access the sub-queues of the flows under the lane,
+# which are not declared in KEYS. So the fair queue is refused in Cluster mode.
+
+FAIR_ENQUEUE_SCRIPT: Final[str] = """
+-- KEYS[1]: Lane (List of tokens, one per pending request)
+-- KEYS[2]: Expiry marker of the request
+-- ARGV[1]: Request packet
+-- ARGV[2]: Expiry of the marker in milliseconds (0 is persistent)
+-- ARGV[3]: Maximum queue depth (0 is unlimited)
+-- ARGV[4]: Provider of the flow
+-- ARGV[5]: Channel of the flow
+local maxdepth = tonumber(ARGV[3])
+if maxdepth > 0 and redis.call('LLEN', KEYS[1]) >= maxdepth then
+    return -1
+end
+local expire = tonumber(ARGV[2])
+if expire > 0 then
+    redis.call('SET', KEYS[2], '1', 'PX', expire)
+else
+    redis.call('SET', KEYS[2], '1')
+end
+local prefix = KEYS[1] .. '/fair'
+local provider_prefix = prefix .. '/p/' .. ARGV[4]
+local channels = provider_prefix .. '/channels'
+local items = provider_prefix .. '/c/' .. ARGV[5]
+if redis.call('LLEN', items) == 0 then
+    if redis.call('LLEN', channels) == 0 then
+        redis.call('RPUSH', prefix .. '/providers', ARGV[4])
+    end
+    redis.call('RPUSH', channels, ARGV[5])
+end
+redis.call('LPUSH', items, ARGV[1])
+return redis.call('LPUSH', KEYS[1], '1')
+"""
+
+FAIR_DEQUEUE_SCRIPT: Final[str] = """
+-- KEYS[n]: Lanes in the order of priority
+-- ARGV[1]: Maximum number of requests
+-- ARGV[2]: Number of tokens already popped from KEYS[1] by the caller
+-- ARGV[3..]: Pairs of weight name and weight ('provider' or 'provider:channel')
+local count = tonumber(ARGV[1])
+local weights = {}
+for i = 3, #ARGV, 2 do
+    weights[ARGV[i]] = tonumber(ARGV[i + 1])
+end
+
+local function charge(deficits, member, weight)
+    local credit = tonumber(redis.call('HGET', deficits, member) or '0')
+    if credit <= 0 then
+        credit = credit + weight
+    end
+    credit = credit - 1
+    redis.call('HSET', deficits, member, credit)
+    return credit
+end
+
+local function settle(ring, deficits, member, credit, remaining)
+    if remaining == 0 then
+        redis.call('LPOP', ring)
+        redis.call('HDEL', deficits, member)
+    elseif credit <= 0 then
+        redis.call('LMOVE', ring, ring, 'LEFT', 'RIGHT')
+    end
+end
+
+local refund = tonumber(ARGV[2])
+if refund > 0 then
+    for _ = 1, refund do
+        redis.call('RPUSH', KEYS[1], '1')
+    end
+end
+
+local result = {}
+for _, lane in ipairs(KEYS) do
+    local prefix = lane .. '/fair'
+    local providers = prefix .. '/providers'
+    local provider_deficits = prefix .. '/deficits'
+    while #result < count * 2 do
+        local provider = redis.call('LINDEX', providers, 0)
+        if not provider then
+            break
+        end
+        local provider_prefix = prefix .. '/p/' .. provider
+        local channels = provider_prefix .. '/channels'
+        local channel_deficits = provider_prefix .. '/deficits'
+        local channel = redis.call('LINDEX', channels, 0)
+        if channel then
+            local items = provider_prefix .. '/c/' .. channel
+            local item = redis.call('RPOP', items)
+            if item then
+                redis.call('RPOP', lane)
+                table.insert(result, lane)
+                table.insert(result, item)
+            end
+            local channel_weight = weights[provider .. ':' .. channel] or 1
+            local channel_credit = charge(channel_deficits, channel, channel_weight)
+            local remaining = redis.call('LLEN', items)
+            settle(channels, channel_deficits, channel, channel_credit, remaining)
+        end
+        local provider_weight = weights[provider] or 1
+        local provider_credit = charge(provider_deficits, provider, provider_weight)
+        local remaining = redis.call('LLEN', channels)
+        settle(providers, provider_deficits, provider, provider_credit, remaining)
+    end
+end
+return result
+"""
+
+PUSH_REPLY_SCRIPT: Final[str] = """
+-- KEYS[1]: Reply list shared by the requests of an endpoint
+-- ARGV[1]: Response packet
+-- ARGV[2]: Expiry of the list in seconds
+local length = redis.call('LPUSH', KEYS[1], ARGV[1])
+if length == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return length
+"""
+
+RELEASE_LOCK_SCRIPT: Final[str] = """
+-- KEYS[1]: Lock
+-- ARGV[1]: Token of the owner
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+VERSIONED_HSET_SCRIPT: Final[str] = """
+-- KEYS[1]: Versioned hash
+-- ARGV[1]: Field of the entry
+-- ARGV[2]: Value of the entry
+-- ARGV[3]: Field of the version
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+return redis.call('HINCRBY', KEYS[1], ARGV[3], 1)
+"""
+
+VERSIONED_HDEL_SCRIPT: Final[str] = """
+-- KEYS[1]: Versioned hash
+-- ARGV[1]: Field of the entry
+-- ARGV[2]: Field of the version
+if redis.call('HDEL', KEYS[1], ARGV[1]) == 1 then
+    return redis.call('HINCRBY', KEYS[1], ARGV[2], 1)
+end
+return tonumber(redis.call('HGET', KEYS[1], ARGV[2]) or '0')
+"""
+
+TOUCH_PENDING_SCRIPT: Final[str] = """
+-- KEYS[1]: Stream
+-- ARGV[1]: Consumer group
+-- ARGV[2]: Consumer expected to own the entries
+-- ARGV[3...]: Entry IDs
+local result = {}
+for i = 3, #ARGV do
+    local pending = redis.call('XPENDING', KEYS[1], ARGV[1], ARGV[i], ARGV[i], 1)
+    if #pending == 1 and pending[1][2] == ARGV[2] then
+        redis.call('XCLAIM', KEYS[1], ARGV[1], ARGV[2], 0, ARGV[i], 'JUSTID')
+        table.insert(result, ARGV[i])
+    end
+end
+return result
+"""
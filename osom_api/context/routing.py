@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+
+from time import monotonic
+from typing import Dict, List, Optional, Tuple
+
+from osom_api.arguments import DEFAULT_ENDPOINT_HEARTBEAT_TIMEOUT
+from osom_api.msg import MsgHeartbeat, MsgWorker
+
+
+class WorkerInstance:
+    def __init__(
+        self,
+        instance: str,
+        now: float,
+        direct_address=str(),
+        heartbeat_interval=0.0,
+    ):
+        self.instance = instance
+        self.direct_address = direct_address
+        self.heartbeat_interval = heartbeat_interval
+        self.inflight = 0
+        self.concurrency = 1
+        self.lag = 0.0
+        self.seen_at = now
+
+    @property
+    def expirable(self) -> bool:
+        """
+        An instance that does not send heartbeats is removed only when unregistered.
+        """
+
+        return self.heartbeat_interval > 0
+
+    def update(self, heartbeat: MsgHeartbeat, now: float) -> None:
+        self.inflight = heartbeat.inflight
+        self.concurrency = max(heartbeat.concurrency, 1)
+        self.lag = heartbeat.lag
+        self.seen_at = now
+
+
+class WorkerPool:
+    """
+    Replicas of a worker, which pull the requests from the same queue.
+    """
+
+    _instances: Dict[str, WorkerInstance]
+
+    def __init__(self, worker: MsgWorker):
+        self.worker = worker
+        self._instances = dict()
+
+    @property
+    def name(self):
+        return self.worker.name
+
+    @property
+    def path(self):
+        return self.worker.path
+
+    @property
+    def refcount(self) -> int:
+        return len(self._instances)
+
+    @property
+    def instances(self):
+        return list(self._instances.values())
+
+    def get(self, instance: str) -> Optional[WorkerInstance]:
+        return self._instances.get(instance)
+
+    def add(
+        self,
+        instance: str,
+        now: float,
+        direct_address=str(),
+        heartbeat_interval=0.0,
+    ) -> WorkerInstance:
+        result = self._instances.get(instance)
+        if result is None:
+            result = WorkerInstance(instance, now, direct_address, heartbeat_interval)
+            self._instances[instance] = result
+        else:
+            result.seen_at = now
+            result.direct_address = direct_address
+            result.heartbeat_interval = heartbeat_interval
+        return result
+
+    def remove(self, instance: str) -> bool:
+        return self._instances.pop(instance, None) is not None
+
+    def expire(self, deadline: float) -> List[str]:
+        """
+        :param deadline: Instances last seen before this are removed.
+        :return: The removed instances.
+        """
+
+        expired = [
+            i.instance
+            for i in self._instances.values()
+            if i.expirable and i.seen_at < deadline
+        ]
+        for instance in expired:
+            self._instances.pop(instance)
+        return expired
+
+    def load(self) -> Tuple[float, float]:
+        """
+        The utilization of the whole pool, and the longest queue lag reported.
+
+        Once every pool is saturated, the one with the shorter lag is preferred.
+        """
+
+        instances = self._instances.values()
+        inflight = sum(i.inflight for i in instances)
+        concurrency = sum(i.concurrency for i in instances)
+        lag = max((i.lag for i in instances), default=0.0)
+        return inflight / max(concurrency, 1), lag
+
+    def direct_address(self) -> Optional[str]:
+        """
+        The address of the least-utilized instance that serves direct requests.
+        """
+
+        instances = [i for i in self._instances.values() if i.direct_address]
+        if not instances:
+            return None
+        instance = min(instances, key=lambda i: i.inflight / i.concurrency)
+        return instance.direct_address
+
+
+class WorkerRouter:
+    """
+    Reference-counted worker instances, grouped into pools by the worker name.
+
+    A command registered by several pools is routed to the least-loaded one.
+    Instances that stopped sending heartbeats are considered dead and removed,
+    and a pool is removed with its last instance.
+    Instances registered without heartbeats are kept until they unregister.
+    """
+
+    _pools: Dict[str, WorkerPool]
+    _commands: Dict[str, List[str]]
+
+    def __init__(self, timeout=DEFAULT_ENDPOINT_HEARTBEAT_TIMEOUT):
+        self._timeout = timeout
+        self._pools = dict()
+        self._commands = dict()
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @property
+    def pools(self):
+        return list(self._pools.values())
+
+    def get(self, name: str) -> Optional[WorkerPool]:
+        return self._pools.get(name)
+
+    def _reindex(self) -> None:
+        self._commands.clear()
+        for pool in self._pools.values():
+            for cmd in pool.worker.cmds:
+                self._commands.setdefault(cmd.key, list()).append(pool.name)
+
+    def register(self, worker: MsgWorker, now: Optional[float] = None) -> bool:
+        """
+        :return: True if the worker is the first instance of its pool.
+        """
+
+        now = now if now is not None else monotonic()
+        pool = self._pools.get(worker.name)
+        created = pool is None
+        if pool is None:
+            pool = self._pools[worker.name] = WorkerPool(worker)
+        else:
+            # The latest registration describes the commands of the pool.
+            pool.worker = worker
+
+        pool.add(
+            worker.instance,
+            now,
+            worker.direct_address,
+            worker.heartbeat_interval,
+        )
+        self._reindex()
+        return created
+
+    def unregister(self, name: str, instance: str) -> bool:
+        """
+        :return: True if the pool was removed with its last instance.
+        """
+
+        pool = self._pools.get(name)
+        if pool is None:
+            return False
+
+        pool.remove(instance)
+        if pool.refcount >= 1:
+            return False
+
+        self._pools.pop(name)
+        self._reindex()
+        return True
+
+    def heartbeat(self, heartbeat: MsgHeartbeat, now: Optional[float] = None) -> bool:
+        """
+        :return: False if the instance is not registered.
+        """
+
+        pool = self._pools.get(heartbeat.name)
+        if pool is None:
+            return False
+
+        instance = pool.get(heartbeat.instance)
+        if instance is None:
+            return False
+
+        instance.update(heartbeat, now if now is not None else monotonic())
+        return True
+
+    def expire(self, now: Optional[float] = None) -> List[Tuple[WorkerPool, str]]:
+        """
+        :return: The removed instances with their pools.
+            A pool without any instances left has been removed as well.
+        """
+
+        if self._timeout <= 0:
+            return list()
+
+        now = now if now is not None else monotonic()
+        deadline = now - self._timeout
+
+        removed: List[Tuple[WorkerPool, str]] = list()
+        for pool in list(self._pools.values()):
+            for instance in pool.expire(deadline):
+                removed.append((pool, instance))
+            if pool.refcount == 0:
+                self._pools.pop(pool.name)
+
+        if removed:
+            self._reindex()
+        return removed
+
+    def route(self, command: str) -> Optional[WorkerPool]:
+        names = self._commands.get(command)
+        if not names:
+            return None
+
+        # Ties go to the pool registered first.
+        return min((self._pools[name] for name in names), key=lambda p: p.load())
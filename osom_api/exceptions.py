@@ -9,10 +9,30 @@ class PollingTimeoutError(OsomApiError):
     pass
 
 
+class ResponseTimeoutError(OsomApiError):
+    pass
+
+
+class QueueFullError(OsomApiError):
+    pass
+
+
+class RequestExpiredError(OsomApiError):
+    pass
+
+
 class PacketLoadError(OsomApiError):
     pass
 
 
+class PacketQuarantinedError(OsomApiError):
+    pass
+
+
+class TransportError(OsomApiError):
+    pass
+
+
 class EmptyApiError(OsomApiError):
     pass
 
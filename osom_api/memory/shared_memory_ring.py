@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+from multiprocessing.shared_memory import SharedMemory
+from struct import Struct
+from typing import Final, NamedTuple, Optional, Set
+
+from osom_api.memory.shared_memory_utils import (
+    _unregister_shared_memory_tracker,
+    create_shared_memory,
+    destroy_shared_memory,
+)
+
+_POSITION: Final = Struct("<Q")
+
+RING_HEAD_OFFSET: Final[int] = 0
+RING_TAIL_OFFSET: Final[int] = 64
+"""
+The head and tail are written by different processes,
+so they are kept on separate cache lines.
+"""
+
+RING_HEADER_SIZE: Final[int] = 128
+
+_created_names: Set[str] = set()
+
+
+class RingSlot(NamedTuple):
+    """
+    Location of a record, where ``start`` is a position that only ever increases.
+    """
+
+    start: int
+    size: int
+
+
+class SharedMemoryRing:
+    """
+    Single-producer, single-consumer byte ring in shared memory.
+
+    The head is advanced only by the producer and the tail only by the consumer.
+    The producer passes the slot of each record to the consumer over another
+    channel, which also serves as the wakeup, and the consumer has to read
+    the records in the order they were written.
+    A record never wraps around the end of the buffer;
+    the remaining space is skipped instead.
+    """
+
+    def __init__(self, sm: SharedMemory, owner: bool):
+        if sm.size <= RING_HEADER_SIZE:
+            raise ValueError("Shared memory is too small for a ring")
+
+        assert sm.buf is not None
+        self._sm = sm
+        self._buf = sm.buf
+        self._owner = owner
+        self._capacity = sm.size - RING_HEADER_SIZE
+
+    @classmethod
+    def create(cls, capacity: int) -> "SharedMemoryRing":
+        if capacity <= 0:
+            raise ValueError("The 'capacity' argument must be greater than 0")
+
+        sm = create_shared_memory(RING_HEADER_SIZE + capacity)
+        ring = cls(sm, owner=True)
+        ring._buf[:RING_HEADER_SIZE] = bytes(RING_HEADER_SIZE)
+        _created_names.add(sm.name)
+        return ring
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedMemoryRing":
+        sm = SharedMemory(name=name)
+        # The creator unlinks the memory, not the resource tracker of this process.
+        # Within the creating process, the registration belongs to the creator.
+        if sm.name not in _created_names:
+            _unregister_shared_memory_tracker(sm)
+        return cls(sm, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._sm.name
+
+    @property
+    def owner(self) -> bool:
+        return self._owner
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def _load(self, offset: int) -> int:
+        return _POSITION.unpack_from(self._buf, offset)[0]
+
+    def _store(self, offset: int, value: int) -> None:
+        _POSITION.pack_into(self._buf, offset, value)
+
+    @property
+    def head(self) -> int:
+        return self._load(RING_HEAD_OFFSET)
+
+    @property
+    def tail(self) -> int:
+        return self._load(RING_TAIL_OFFSET)
+
+    @property
+    def used(self) -> int:
+        return self.head - self.tail
+
+    def write(self, data: bytes) -> Optional[RingSlot]:
+        """
+        :return: The slot of the record, or None if there is not enough free space.
+        """
+
+        size = len(data)
+        if size == 0 or size > self._capacity:
+            return None
+
+        head = self.head
+        start = head
+        offset = head % self._capacity
+        if offset + size > self._capacity:
+            start += self._capacity - offset
+            offset = 0
+
+        if start + size - self.tail > self._capacity:
+            return None
+
+        begin = RING_HEADER_SIZE + offset
+        self._buf[begin : begin + size] = data
+        # [IMPORTANT]
+        # Publish the head only after the record has been written.
+        self._store(RING_HEAD_OFFSET, start + size)
+        return RingSlot(start, size)
+
+    def read(self, slot: RingSlot) -> bytes:
+        """
+        Copy the record out and release its space to the producer.
+        """
+
+        start, size = slot
+        tail = self.tail
+        if start < tail or start + size > self.head or size > self._capacity:
+            raise ValueError(f"Invalid ring slot: {slot} (tail: {tail})")
+
+        offset = start % self._capacity
+        if offset + size > self._capacity:
+            raise ValueError(f"Ring slot wraps around the buffer: {slot}")
+
+        begin = RING_HEADER_SIZE + offset
+        result = bytes(self._buf[begin : begin + size])
+        self._store(RING_TAIL_OFFSET, start + size)
+        return result
+
+    def close(self) -> None:
+        if self._owner:
+            _created_names.discard(self._sm.name)
+            destroy_shared_memory(self._sm)
+        else:
+            self._sm.close()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, Union
+
+Number = Union[int, float]
+
+
+class Counter:
+    """
+    A value that only increases.
+    """
+
+    def __init__(self, value: Number = 0):
+        self._value = value
+
+    @property
+    def value(self) -> Number:
+        return self._value
+
+    def inc(self, amount: Number = 1) -> None:
+        assert amount >= 0
+        self._value += amount
+
+    def as_value(self) -> Any:
+        return self._value
+
+
+class Gauge:
+    """
+    A value that can go up and down.
+    """
+
+    def __init__(self, value: Number = 0):
+        self._value = value
+
+    @property
+    def value(self) -> Number:
+        return self._value
+
+    def set(self, value: Number) -> None:
+        self._value = value
+
+    def inc(self, amount: Number = 1) -> None:
+        self._value += amount
+
+    def dec(self, amount: Number = 1) -> None:
+        self._value -= amount
+
+    def as_value(self) -> Any:
+        return self._value
+
+
+class Summary:
+    """
+    Count, total and maximum of the observed values.
+    """
+
+    def __init__(self):
+        self._count = 0
+        self._total = 0.0
+        self._max = 0.0
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def total(self) -> float:
+        return self._total
+
+    @property
+    def max(self) -> float:
+        return self._max
+
+    @property
+    def mean(self) -> float:
+        return self._total / self._count if self._count else 0.0
+
+    def observe(self, value: Number) -> None:
+        self._count += 1
+        self._total += value
+        if value > self._max:
+            self._max = value
+
+    def as_value(self) -> Dict[str, Number]:
+        return {
+            "count": self._count,
+            "total": self._total,
+            "mean": self.mean,
+            "max": self._max,
+        }
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+from functools import lru_cache
+from typing import Any, Dict, Type, TypeVar, Union
+
+from osom_api.metrics.metrics import Counter, Gauge, Summary
+
+Metric = Union[Counter, Gauge, Summary]
+_M = TypeVar("_M", Counter, Gauge, Summary)
+
+
+class MetricsRegistry:
+    _metrics: Dict[str, Metric]
+
+    def __init__(self):
+        self._metrics = dict()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._metrics
+
+    def __len__(self) -> int:
+        return len(self._metrics)
+
+    def _get_or_create(self, name: str, cls: Type[_M]) -> _M:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = cls()
+            self._metrics[name] = metric
+        elif not isinstance(metric, cls):
+            raise TypeError(
+                f"Metric '{name}' is already registered as {type(metric).__name__}"
+            )
+        return metric
+
+    def counter(self, name: str) -> Counter:
+        return self._get_or_create(name, Counter)
+
+    def gauge(self, name: str) -> Gauge:
+        return self._get_or_create(name, Gauge)
+
+    def summary(self, name: str) -> Summary:
+        return self._get_or_create(name, Summary)
+
+    def clear(self) -> None:
+        self._metrics.clear()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: self._metrics[name].as_value() for name in sorted(self._metrics)}
+
+
+@lru_cache
+def default_registry() -> MetricsRegistry:
+    return MetricsRegistry()
@@ -1,16 +1,21 @@
 # -*- coding: utf-8 -*-
 
 from osom_api.msg.cmd import MsgCmd
-from osom_api.msg.enums import MsgFlow, MsgProvider, MsgStorage
+from osom_api.msg.dead_letter import MsgDeadLetter
+from osom_api.msg.enums import MsgFlow, MsgPriority, MsgProvider, MsgStorage
 from osom_api.msg.file import MsgFile
+from osom_api.msg.heartbeat import MsgHeartbeat
 from osom_api.msg.request import MsgRequest
 from osom_api.msg.response import MsgResponse
 from osom_api.msg.worker import MsgWorker
 
 __all__ = [
     "MsgCmd",
+    "MsgDeadLetter",
     "MsgFile",
     "MsgFlow",
+    "MsgHeartbeat",
+    "MsgPriority",
     "MsgProvider",
     "MsgRequest",
     "MsgResponse",
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+from base64 import b64decode, b64encode
+from datetime import datetime
+from typing import Optional
+
+from type_serialize import decode, encode
+from type_serialize.byte.byte_coder import DEFAULT_BYTE_CODING_TYPE
+from type_serialize.variables import COMPRESS_LEVEL_TRADEOFF
+
+from osom_api.chrono.datetime import tznow
+
+
+class MsgDeadLetter:
+    key: str
+    packet: str
+    error: str
+    attempts: int
+    msg_uuid: Optional[str]
+    failed_at: datetime
+
+    def __init__(
+        self,
+        key: str,
+        packet: str,
+        error: str,
+        attempts=1,
+        msg_uuid: Optional[str] = None,
+        failed_at: Optional[datetime] = None,
+    ):
+        self.key = key
+        self.packet = packet
+        self.error = error
+        self.attempts = attempts
+        self.msg_uuid = msg_uuid if msg_uuid else None
+        self.failed_at = failed_at if failed_at else tznow()
+
+    @classmethod
+    def from_packet(
+        cls,
+        key: str,
+        data: bytes,
+        error: str,
+        attempts=1,
+        msg_uuid: Optional[str] = None,
+    ):
+        """
+        The raw packet is kept in Base64, since it may not be decodable.
+        """
+
+        return cls(
+            key, str(b64encode(data), encoding="ascii"), error, attempts, msg_uuid
+        )
+
+    @property
+    def data(self) -> bytes:
+        return b64decode(self.packet)
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<{self.msg_uuid}>"
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}"
+            f"<key={self.key}"
+            f",data={len(self.data)}bytes"
+            f",error={self.error}"
+            f",attempts={self.attempts}"
+            f",msg_uuid={self.msg_uuid}"
+            f",failed_at={self.failed_at}>"
+        )
+
+    def encode(self, level=COMPRESS_LEVEL_TRADEOFF, coding=DEFAULT_BYTE_CODING_TYPE):
+        return encode(self, level=level, coding=coding)
+
+    @classmethod
+    def decode(cls, data: bytes, coding=DEFAULT_BYTE_CODING_TYPE):
+        result = decode(data, cls=cls, coding=coding)
+        assert isinstance(result, cls)
+        return result
@@ -1,11 +1,13 @@
 # -*- coding: utf-8 -*-
 
 from osom_api.msg.enums.flow import MsgFlow
+from osom_api.msg.enums.priority import MsgPriority
 from osom_api.msg.enums.provider import MsgProvider
 from osom_api.msg.enums.storage import MsgStorage
 
 __all__ = [
     "MsgFlow",
+    "MsgPriority",
     "MsgProvider",
     "MsgStorage",
 ]
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+
+from enum import StrEnum, auto, unique
+from typing import Final, Sequence
+
+
+@unique
+class MsgPriority(StrEnum):
+    high = auto()
+    normal = auto()
+    low = auto()
+
+
+MSG_PRIORITIES: Final[Sequence[MsgPriority]] = tuple(MsgPriority)
+"""
+Priority classes in descending order.
+"""
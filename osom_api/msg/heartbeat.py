@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+from typing import Optional
+
+from type_serialize import decode, encode
+from type_serialize.byte.byte_coder import DEFAULT_BYTE_CODING_TYPE
+from type_serialize.variables import COMPRESS_LEVEL_TRADEOFF
+
+from osom_api.chrono.datetime import tznow
+
+
+class MsgHeartbeat:
+    name: str
+    instance: str
+    inflight: int
+    concurrency: int
+    lag: float
+    created_at: datetime
+
+    def __init__(
+        self,
+        name: str,
+        instance: str,
+        inflight=0,
+        concurrency=1,
+        lag=0.0,
+        created_at: Optional[datetime] = None,
+    ):
+        self.name = name
+        self.instance = instance
+        self.inflight = inflight
+        self.concurrency = concurrency
+        self.lag = lag
+        self.created_at = created_at if created_at else tznow()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<{self.name}:{self.instance}>"
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}"
+            f"<name={self.name}"
+            f",instance={self.instance}"
+            f",inflight={self.inflight}"
+            f",concurrency={self.concurrency}"
+            f",lag={self.lag:.3f}"
+            f",created_at={self.created_at}>"
+        )
+
+    @property
+    def utilization(self) -> float:
+        return self.inflight / max(self.concurrency, 1)
+
+    def encode(self, level=COMPRESS_LEVEL_TRADEOFF, coding=DEFAULT_BYTE_CODING_TYPE):
+        return encode(self, level=level, coding=coding)
+
+    @classmethod
+    def decode(cls, data: bytes, coding=DEFAULT_BYTE_CODING_TYPE):
+        result = decode(data, cls=cls, coding=coding)
+        assert isinstance(result, cls)
+        return result
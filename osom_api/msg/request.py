@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Iterable, List, Optional
 from uuid import uuid4
 
@@ -16,6 +16,7 @@ from osom_api.commands import (
     KV_SEPERATOR,
 )
 from osom_api.msg.cmd import MsgCmd
+from osom_api.msg.enums.priority import MsgPriority
 from osom_api.msg.enums.provider import MsgProvider
 from osom_api.msg.file import MsgFile, files_repr
 from osom_api.utils.path.mq import make_response_path
@@ -31,6 +32,11 @@ class MsgRequest:
     files: List[MsgFile]
     created_at: datetime
     msg_uuid: str
+    reply_path: Optional[str]
+    priority: MsgPriority
+    deadline: Optional[datetime]
+    queued_at: Optional[datetime]
+    attempts: int
 
     def __init__(
         self,
@@ -43,6 +49,11 @@ class MsgRequest:
         files: Optional[Iterable[MsgFile]] = None,
         created_at: Optional[datetime] = None,
         msg_uuid: Optional[str] = None,
+        reply_path: Optional[str] = None,
+        priority=MsgPriority.normal,
+        deadline: Optional[datetime] = None,
+        queued_at: Optional[datetime] = None,
+        attempts=0,
         *,
         command_prefix=COMMAND_PREFIX,
         body_seperator=BODY_SEPERATOR,
@@ -58,6 +69,11 @@ class MsgRequest:
         self.files = list(files) if files is not None else list()
         self.created_at = created_at if created_at else tznow()
         self.msg_uuid = msg_uuid if msg_uuid else str(uuid4())
+        self.reply_path = reply_path if reply_path else None
+        self.priority = MsgPriority(priority)
+        self.deadline = deadline if deadline else None
+        self.queued_at = queued_at if queued_at else None
+        self.attempts = attempts
 
         if self.content and self.content.startswith(command_prefix):
             self._msg_cmd = MsgCmd.from_content(
@@ -84,7 +100,12 @@ class MsgRequest:
             f",content={self.content}"
             f",files=[{files_repr(self.files)}]"
             f",created_at={self.created_at}"
-            f",msg_uuid={self.msg_uuid}>"
+            f",msg_uuid={self.msg_uuid}"
+            f",reply_path={self.reply_path}"
+            f",priority={self.priority}"
+            f",deadline={self.deadline}"
+            f",queued_at={self.queued_at}"
+            f",attempts={self.attempts}>"
         )
 
     def encode(self, level=COMPRESS_LEVEL_TRADEOFF, coding=DEFAULT_BYTE_CODING_TYPE):
@@ -116,5 +137,43 @@ class MsgRequest:
     def body(self):
         return self._msg_cmd.body
 
+    def set_timeout(self, timeout: float, now: Optional[datetime] = None) -> None:
+        """
+        Set the absolute deadline of the request from now.
+
+        The deadline is compared with the clock of the worker,
+        so the clocks of the endpoints and workers are assumed to be synchronized.
+        """
+
+        now = now if now is not None else tznow()
+        self.deadline = now + timedelta(seconds=timeout)
+
+    def remaining(self, now: Optional[datetime] = None) -> Optional[float]:
+        """
+        :return: The remaining seconds until the deadline, or None if there is none.
+        """
+
+        if self.deadline is None:
+            return None
+        now = now if now is not None else tznow()
+        return (self.deadline - now).total_seconds()
+
+    def expired(self, now: Optional[datetime] = None) -> bool:
+        remaining = self.remaining(now)
+        return remaining is not None and remaining <= 0
+
+    def waited(self, now: Optional[datetime] = None) -> Optional[float]:
+        """
+        :return: The seconds spent in the queue, or None if it was never queued.
+        """
+
+        if self.queued_at is None:
+            return None
+        now = now if now is not None else tznow()
+        return max((now - self.queued_at).total_seconds(), 0.0)
+
     def get_response_path(self) -> str:
-        return make_response_path(self.msg_uuid)
+        if self.reply_path:
+            return self.reply_path
+        else:
+            return make_response_path(self.msg_uuid)
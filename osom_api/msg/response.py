@@ -17,6 +17,8 @@ class MsgResponse:
     error: Optional[str]
     files: List[MsgFile]
     created_at: datetime
+    busy: bool
+    cancelled: bool
 
     def __init__(
         self,
@@ -25,12 +27,16 @@ class MsgResponse:
         error: Optional[str] = None,
         files: Optional[Iterable[MsgFile]] = None,
         created_at: Optional[datetime] = None,
+        busy=False,
+        cancelled=False,
     ):
         self.msg_uuid = msg_uuid
         self.content = content
         self.error = error
         self.files = list(files) if files is not None else list()
         self.created_at = created_at if created_at else tznow()
+        self.busy = busy
+        self.cancelled = cancelled
 
     def __str__(self):
         return f"{self.__class__.__name__}<{self.msg_uuid}>"
@@ -42,7 +48,32 @@ class MsgResponse:
             f",content={self.content}"
             f",error={self.error}"
             f",files=[{files_repr(self.files)}]"
-            f",created_at={self.created_at}>"
+            f",created_at={self.created_at}"
+            f",busy={self.busy}"
+            f",cancelled={self.cancelled}>"
+        )
+
+    @classmethod
+    def from_busy(cls, msg_uuid: str, reason: str):
+        return cls(msg_uuid, error=f"Worker is busy. {reason}", busy=True)
+
+    @classmethod
+    def from_cancelled(cls, msg_uuid: str, reason: str):
+        return cls(msg_uuid, error=f"Request was cancelled. {reason}", cancelled=True)
+
+    def with_msg_uuid(self, msg_uuid: str):
+        """
+        Copy of the response addressed to another request.
+        """
+
+        return type(self)(
+            msg_uuid=msg_uuid,
+            content=self.content,
+            error=self.error,
+            files=self.files,
+            created_at=self.created_at,
+            busy=self.busy,
+            cancelled=self.cancelled,
         )
 
     @property
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from io import StringIO
-from typing import List
+from typing import List, Optional
 
 from type_serialize import decode, encode
 from type_serialize.byte.byte_coder import DEFAULT_BYTE_CODING_TYPE
@@ -17,6 +17,9 @@ class MsgWorker:
     doc: str
     path: str
     cmds: List[CmdDesc]
+    instance: str
+    direct_address: str
+    heartbeat_interval: float
 
     def __init__(
         self,
@@ -25,15 +28,21 @@ class MsgWorker:
         doc: str,
         path: str,
         cmds: List[CmdDesc],
+        instance: Optional[str] = None,
+        direct_address: Optional[str] = None,
+        heartbeat_interval=0.0,
     ):
         self.name = name
         self.version = version
         self.doc = doc
         self.path = path
         self.cmds = cmds
+        self.instance = instance if instance else str()
+        self.direct_address = direct_address if direct_address else str()
+        self.heartbeat_interval = heartbeat_interval
 
     def __str__(self):
-        return f"{self.__class__.__name__}<{self.name}>"
+        return f"{self.__class__.__name__}<{self.name}:{self.instance}>"
 
     def __repr__(self):
         return (
@@ -42,7 +51,10 @@ class MsgWorker:
             f",version={self.version}"
             f",doc={self.doc}"
             f",path={self.path}"
-            f",cmds={self.cmds}>"
+            f",cmds={self.cmds}"
+            f",instance={self.instance}"
+            f",direct_address={self.direct_address}"
+            f",heartbeat_interval={self.heartbeat_interval}>"
         )
 
     def encode(self, level=COMPRESS_LEVEL_TRADEOFF, coding=DEFAULT_BYTE_CODING_TYPE):
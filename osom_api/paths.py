@@ -14,6 +14,39 @@ You typically append the worker's name to this path as a subkey.
 
 The final format will look like '/osom/api/request/{worker_name}',
 and it uses a FIFO (First In, First Out) Queue.
+The braces are kept in the key as a Redis Cluster hash tag.
+"""
+
+MQ_DEFAULT_LANE: Final[str] = "normal"
+"""
+Priority lane stored in the request path itself.
+
+The other lanes append the priority to the request path,
+like '/osom/api/request/{worker_name}/high'.
+"""
+
+MQ_EXPIRE_MARKER_SUBPATH: Final[str] = "expire"
+"""
+Subpath of the request path where the expiry marker of each request is stored.
+
+The final format will look like '/osom/api/request/{worker_name}/expire/{msg_uuid}'.
+The request is dropped by the worker if the marker has expired.
+"""
+
+MQ_DONE_SUBPATH: Final[str] = "done"
+"""
+Subpath of the request path where the responses of the completed requests are kept.
+
+The final format will look like '/osom/api/request/{worker_name}/done/{msg_uuid}',
+and a redelivered request is answered with it instead of running again.
+"""
+
+MQ_DEAD_LETTER_SUBPATH: Final[str] = "dead"
+"""
+Subpath of the request path where the failed requests of the worker are kept.
+
+The final format will look like '/osom/api/request/{worker_name}/dead',
+and it is a List of dead letters with the newest one at the head.
 """
 
 MQ_RESPONSE_PATH: Final[str] = "/osom/api/response"
@@ -23,13 +56,65 @@ You typically append the unique ID (uuid) of the message to this path as a subke
 
 The final format will look like '/osom/api/response/{msg_uuid}',
 and the data type is a String.
+The braces are kept in the key as a Redis Cluster hash tag.
+"""
+
+MQ_REPLY_PATH: Final[str] = "/osom/api/reply"
+"""
+This is the base path of the reply queue owned by each endpoint instance.
+You typically append the unique ID of the endpoint to this path as a subkey.
+
+The final format will look like '/osom/api/reply/{endpoint_uuid}',
+and every response addressed to the endpoint is pushed to this single queue.
+The braces are kept in the key as a Redis Cluster hash tag.
 """
 
 MQ_BROADCAST_PATH: Final[str] = "/osom/api/broadcast"
 
+MQ_FLIGHT_PATH: Final[str] = "/osom/api/flight"
+"""
+This is the base path of the requests coalesced by the single-flight layer.
+You typically append the digest of the command to this path as a subkey.
+
+The final format will look like '/osom/api/flight/{digest}',
+and the data type is a String holding the UUID of the leading request.
+The response of the leading request is published to this path itself,
+so that every endpoint waiting for it is notified.
+"""
+
+MQ_FLIGHT_RESULT_SUBPATH: Final[str] = "result"
+"""
+Subpath of the flight path where the response of the leading request is kept
+for a short time, for the waiters that subscribed after it was published.
+"""
+
+MQ_CANCEL_PATH: Final[str] = "/osom/api/cancel"
+"""
+Channel where endpoints publish the UUID of the requests to be cancelled.
+
+Every worker subscribes to it and cancels the command running for the request.
+"""
+
 MQ_REGISTER_PATH: Final[str] = "/osom/api/register"
 MQ_REGISTER_WORKER_PATH: Final[str] = "/osom/api/register/worker"
 MQ_REGISTER_WORKER_REQUEST_PATH: Final[str] = "/osom/api/register/worker/request"
 
 MQ_UNREGISTER_PATH: Final[str] = "/osom/api/unregister"
 MQ_UNREGISTER_WORKER_PATH: Final[str] = "/osom/api/unregister/worker"
+
+MQ_REGISTRY_PATH: Final[str] = "/osom/api/registry"
+MQ_REGISTRY_WORKER_PATH: Final[str] = "/osom/api/registry/worker"
+"""
+Hash of the registered worker instances, with a version increased on every change.
+
+Endpoints load it at startup instead of asking every worker to register again.
+"""
+
+MQ_HEARTBEAT_PATH: Final[str] = "/osom/api/heartbeat"
+MQ_HEARTBEAT_WORKER_PATH: Final[str] = "/osom/api/heartbeat/worker"
+"""
+Channel where every worker instance periodically publishes its load.
+
+Endpoints route the commands to the least-loaded worker pool with it,
+and forget the instances that stopped publishing.
+"""
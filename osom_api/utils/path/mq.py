@@ -2,24 +2,103 @@
 
 from typing import Final, Union
 
-from osom_api.paths import MQ_REQUEST_PATH, MQ_RESPONSE_PATH
+from osom_api.paths import (
+    MQ_DEAD_LETTER_SUBPATH,
+    MQ_DEFAULT_LANE,
+    MQ_DONE_SUBPATH,
+    MQ_EXPIRE_MARKER_SUBPATH,
+    MQ_FLIGHT_PATH,
+    MQ_FLIGHT_RESULT_SUBPATH,
+    MQ_REPLY_PATH,
+    MQ_REQUEST_PATH,
+    MQ_RESPONSE_PATH,
+)
 from osom_api.utils.path.join import join_path
 
 PATH_ENCODING: Final[str] = "Latin1"
 
 
+def hash_tag(name: str) -> str:
+    """
+    Wrap the name with braces so that Redis Cluster hashes only this part.
+
+    All keys derived from the same name are assigned to the same slot,
+    which allows multi-key operations on them.
+    """
+
+    return "{" + name + "}"
+
+
 def make_request_path(worker_name: Union[str, bytes], encoding=PATH_ENCODING) -> str:
     if isinstance(worker_name, bytes):
-        return join_path(MQ_REQUEST_PATH, str(worker_name, encoding=encoding))
-    else:
-        return join_path(MQ_REQUEST_PATH, worker_name)
+        worker_name = str(worker_name, encoding=encoding)
+    return join_path(MQ_REQUEST_PATH, hash_tag(worker_name))
+
+
+def make_lane_path(request_path: str, priority: str) -> str:
+    """
+    The normal lane is the request path itself,
+    and the other lanes share its hash tag.
+    """
+
+    if priority == MQ_DEFAULT_LANE:
+        return request_path
+    return join_path(request_path, priority)
 
 
 def make_response_path(msg_uuid: Union[str, bytes], encoding=PATH_ENCODING) -> str:
     if isinstance(msg_uuid, bytes):
-        return join_path(MQ_RESPONSE_PATH, str(msg_uuid, encoding=encoding))
-    else:
-        return join_path(MQ_RESPONSE_PATH, msg_uuid)
+        msg_uuid = str(msg_uuid, encoding=encoding)
+    return join_path(MQ_RESPONSE_PATH, hash_tag(msg_uuid))
+
+
+def make_reply_path(endpoint_uuid: Union[str, bytes], encoding=PATH_ENCODING) -> str:
+    if isinstance(endpoint_uuid, bytes):
+        endpoint_uuid = str(endpoint_uuid, encoding=encoding)
+    return join_path(MQ_REPLY_PATH, hash_tag(endpoint_uuid))
+
+
+def make_expire_marker_path(
+    request_path: Union[str, bytes],
+    msg_uuid: Union[str, bytes],
+    encoding=PATH_ENCODING,
+) -> str:
+    """
+    The marker shares the hash tag of the request queue,
+    so that it can be set in the same script as the push.
+    """
+
+    if isinstance(request_path, bytes):
+        request_path = str(request_path, encoding=encoding)
+    if isinstance(msg_uuid, bytes):
+        msg_uuid = str(msg_uuid, encoding=encoding)
+    return join_path(request_path, MQ_EXPIRE_MARKER_SUBPATH, msg_uuid)
+
+
+def make_done_path(
+    request_path: Union[str, bytes],
+    msg_uuid: Union[str, bytes],
+    encoding=PATH_ENCODING,
+) -> str:
+    if isinstance(request_path, bytes):
+        request_path = str(request_path, encoding=encoding)
+    if isinstance(msg_uuid, bytes):
+        msg_uuid = str(msg_uuid, encoding=encoding)
+    return join_path(request_path, MQ_DONE_SUBPATH, msg_uuid)
+
+
+def make_dead_letter_path(request_path: Union[str, bytes], encoding=PATH_ENCODING):
+    if isinstance(request_path, bytes):
+        request_path = str(request_path, encoding=encoding)
+    return join_path(request_path, MQ_DEAD_LETTER_SUBPATH)
+
+
+def make_flight_path(digest: str) -> str:
+    return join_path(MQ_FLIGHT_PATH, hash_tag(digest))
+
+
+def make_flight_result_path(flight_path: str) -> str:
+    return join_path(flight_path, MQ_FLIGHT_RESULT_SUBPATH)
 
 
 def encode_path(path: Union[str, bytes], encoding=PATH_ENCODING) -> bytes:
@@ -11,6 +11,7 @@ from osom_api.worker.descs import CmdDesc, ParamDesc
 from osom_api.worker.metas import AnnotatedMeta, ParamMeta
 from osom_api.worker.params import (
     BodyParam,
+    BudgetParam,
     ContentParam,
     CreatedAtParam,
     FileParam,
@@ -169,6 +170,11 @@ class WorkerCommand:
                             value = None
                     elif issubclass(hint, MsgUUIDParam):
                         value = MsgUUIDParam(request.msg_uuid)
+                    elif issubclass(hint, BudgetParam):
+                        if request.deadline is not None:
+                            value = BudgetParam.from_deadline(request.deadline)
+                        else:
+                            value = None
                     else:
                         raise CommandRuntimeError(f"Invalid parameter hint: {hint}")
                 elif issubclass(hint, str):
@@ -77,3 +77,14 @@ class CreatedAtParam(datetime, Param):
 
 class MsgUUIDParam(str, Param):
     pass
+
+
+class BudgetParam(float, Param):
+    """
+    Remaining seconds until the deadline of the request.
+    """
+
+    @classmethod
+    def from_deadline(cls, deadline: datetime, now: Optional[datetime] = None):
+        now = now if now is not None else datetime.now(tz=deadline.tzinfo)
+        return cls((deadline - now).total_seconds())
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from osom_api.aio.backoff import exponential_backoff
+
+
+class BackoffTestCase(TestCase):
+    def test_no_jitter(self):
+        self.assertEqual(0.5, exponential_backoff(0, 0.5, 10.0, jitter=False))
+        self.assertEqual(1.0, exponential_backoff(1, 0.5, 10.0, jitter=False))
+        self.assertEqual(4.0, exponential_backoff(3, 0.5, 10.0, jitter=False))
+        self.assertEqual(10.0, exponential_backoff(5, 0.5, 10.0, jitter=False))
+        self.assertEqual(10.0, exponential_backoff(1000, 0.5, 10.0, jitter=False))
+
+    def test_jitter(self):
+        for attempt in range(10):
+            delay = exponential_backoff(attempt, 0.5, 10.0, jitter=False)
+            jitter_delay = exponential_backoff(attempt, 0.5, 10.0)
+            self.assertLessEqual(delay / 2, jitter_delay)
+            self.assertLessEqual(jitter_delay, delay)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+from typing import List
+from unittest import IsolatedAsyncioTestCase, main
+
+from osom_api.apps.worker.context import WorkerContext
+from osom_api.arguments import CMD_WORKER, get_default_arguments
+from osom_api.exceptions import CommandRuntimeError, MsgError
+from osom_api.msg import MsgProvider, MsgRequest, MsgResponse
+from tester.context import FAKE_REDIS_URL, patch_fake_context
+
+
+def _chain(error: BaseException) -> CommandRuntimeError:
+    """
+    Wrap the error the way the module and the worker context do.
+    """
+
+    try:
+        try:
+            raise RuntimeError("Raised a runtime error") from error
+        except RuntimeError as e:
+            raise CommandRuntimeError("A command runtime error") from e
+    except CommandRuntimeError as e:
+        return e
+
+
+class WorkerContextTestCase(IsolatedAsyncioTestCase):
+    errors: List[BaseException]
+
+    async def asyncSetUp(self):
+        cmdline = [
+            "--no-dotenv",
+            CMD_WORKER,
+            "--redis-url",
+            FAKE_REDIS_URL,
+            "--worker-max-attempts",
+            "3",
+        ]
+        with patch_fake_context():
+            self.context = WorkerContext(get_default_arguments(cmdline))
+        self.path = self.context._module.path
+        self.errors = list()
+
+        async def _on_message(request: MsgRequest) -> MsgResponse:
+            if self.errors:
+                raise self.errors.pop(0)
+            return MsgResponse(request.msg_uuid, "done")
+
+        self.context.on_message = _on_message  # type: ignore[method-assign]
+
+    async def asyncTearDown(self):
+        await self.context.mq.redis.aclose()
+
+    async def push(self, request: MsgRequest) -> None:
+        await self.context.queue.push(self.path, request.encode(), request.msg_uuid)
+
+    async def replies(self, request: MsgRequest) -> List[MsgResponse]:
+        path = request.get_response_path()
+        items = await self.context.mq.lrange_bytes(path, 0, -1)
+        return [MsgResponse.decode(item) for item in items]
+
+    async def run_queue(self) -> int:
+        count = 0
+        while await self.context.mq.llen(self.path):
+            await self.context.handle_packet(await self.context.fetch_packet())
+            count += 1
+        return count
+
+    def test_retryable(self):
+        self.assertTrue(WorkerContext.retryable(_chain(ConnectionError("reset"))))
+        self.assertFalse(WorkerContext.retryable(_chain(MsgError("uuid", "Empty"))))
+        self.assertFalse(WorkerContext.retryable(MsgError("uuid", "Empty")))
+
+    async def test_retry_until_success(self):
+        request = MsgRequest(MsgProvider.tester, content="/echo hello")
+        self.errors = [_chain(ConnectionError("reset")) for _ in range(2)]
+        await self.push(request)
+
+        self.assertEqual(3, await self.run_queue())
+        replies = await self.replies(request)
+        self.assertEqual(1, len(replies))
+        self.assertEqual("done", replies[0].content)
+        self.assertEqual(0, await self.context._dead_letters.count(self.path))
+
+    async def test_dead_letter_at_limit(self):
+        request = MsgRequest(MsgProvider.tester, content="/echo hello")
+        self.errors = [_chain(ConnectionError("reset")) for _ in range(3)]
+        await self.push(request)
+
+        self.assertEqual(3, await self.run_queue())
+        replies = await self.replies(request)
+        self.assertEqual(1, len(replies))
+        self.assertTrue(replies[0].has_error)
+
+        letters = await self.context._dead_letters.peek(self.path, 2)
+        self.assertEqual(1, len(letters))
+        self.assertEqual(3, letters[0].attempts)
+        self.assertEqual(request.msg_uuid, letters[0].msg_uuid)
+
+    async def test_request_error(self):
+        request = MsgRequest(MsgProvider.tester, content="/echo hello")
+        self.errors = [_chain(MsgError(request.msg_uuid, "Invalid argument"))]
+        await self.push(request)
+
+        # The request is replied at once, without retries and dead letters.
+        self.assertEqual(1, await self.run_queue())
+        replies = await self.replies(request)
+        self.assertEqual(1, len(replies))
+        self.assertTrue(replies[0].has_error)
+        self.assertEqual(0, await self.context._dead_letters.count(self.path))
+
+    async def test_direct_retry(self):
+        request = MsgRequest(MsgProvider.tester, content="/echo hello")
+        self.errors = [_chain(ConnectionError("reset"))]
+        response = await self.context.on_direct_request(request)
+        self.assertEqual("done", response.content)
+
+        request = MsgRequest(MsgProvider.tester, content="/echo hello")
+        self.errors = [_chain(ConnectionError("reset")) for _ in range(3)]
+        response = await self.context.on_direct_request(request)
+        self.assertTrue(response.has_error)
+        letters = await self.context._dead_letters.peek(self.path, 2)
+        self.assertEqual(1, len(letters))
+        self.assertEqual(3, letters[0].attempts)
+
+
+class WorkerRegistryTestCase(IsolatedAsyncioTestCase):
+    def create_context(self, heartbeat_interval: float) -> WorkerContext:
+        cmdline = [
+            "--no-dotenv",
+            CMD_WORKER,
+            "--redis-url",
+            FAKE_REDIS_URL,
+            "--worker-heartbeat-interval",
+            str(heartbeat_interval),
+        ]
+        with patch_fake_context():
+            return WorkerContext(get_default_arguments(cmdline))
+
+    async def test_register(self):
+        context = self.create_context(10.0)
+        await context.publish_register_worker()
+        snapshot = await context._registry.snapshot()
+        await context.mq.redis.aclose()
+        self.assertEqual(1, len(snapshot.workers))
+        self.assertEqual(context.instance, snapshot.workers[0].instance)
+
+    async def test_register_without_heartbeats(self):
+        context = self.create_context(0.0)
+        await context.publish_register_worker()
+        snapshot = await context._registry.snapshot()
+        await context.mq.redis.aclose()
+        self.assertEqual(0, len(snapshot.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+from contextlib import contextmanager
+from typing import Iterator, List
+from unittest.mock import patch
+
+from tester.context.mq import patch_fake_redis
+
+FAKE_REDIS_URL = "redis://localhost"
+
+
+class FakeDbClient:
+    """
+    Database client that keeps the inserted rows in memory, in place of Supabase.
+    """
+
+    msgs: List[dict]
+    replies: List[dict]
+
+    def __init__(self):
+        self.msgs = list()
+        self.replies = list()
+
+    @classmethod
+    def from_args(cls, args):
+        return cls()
+
+    async def open(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def insert_msg(self, **kwargs) -> None:
+        self.msgs.append(kwargs)
+
+    async def insert_reply(self, **kwargs) -> None:
+        self.replies.append(kwargs)
+
+
+@contextmanager
+def patch_fake_context() -> Iterator[None]:
+    """
+    Contexts created in the block use the in-memory Redis and database.
+    Their arguments must give ``FAKE_REDIS_URL`` as the Redis URL.
+    """
+
+    with patch_fake_redis():
+        with patch("osom_api.context.base.DbClient", FakeDbClient):
+            yield
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+
+from contextlib import contextmanager
+from typing import Iterator
+from unittest.mock import patch
+
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from osom_api.context.mq import MqClient
+
+
+@contextmanager
+def patch_fake_redis() -> Iterator[FakeServer]:
+    """
+    The standalone clients created in the block share one in-memory server.
+    """
+
+    server = FakeServer()
+
+    def _create_redis(*args, **options):
+        return FakeAsyncRedis(server=server)
+
+    with patch("osom_api.context.mq.create_standalone_redis", _create_redis):
+        yield server
+
+
+def create_fake_mq_client(**kwargs) -> MqClient:
+    """
+    Client whose command, blocking and pub/sub pools share one in-memory server.
+    """
+
+    with patch_fake_redis():
+        return MqClient(url="redis://localhost", **kwargs)
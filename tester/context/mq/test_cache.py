@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from osom_api.context.mq.cache import (
+    CACHE_MISSING,
+    DEFAULT_CACHE_PREFIXES,
+    MqCache,
+    parse_cache_prefixes,
+)
+from osom_api.metrics.registry import MetricsRegistry
+
+
+class CacheTestCase(TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.cache = MqCache(2, prefixes=("/a/",), registry=self.registry)
+        self.cache.activate()
+
+    def test_parse_cache_prefixes(self):
+        self.assertEqual(list(DEFAULT_CACHE_PREFIXES), parse_cache_prefixes(None))
+        self.assertEqual(["/a", "/b"], parse_cache_prefixes(" /a, /b,"))
+        with self.assertRaises(ValueError):
+            parse_cache_prefixes(" , ")
+
+    def test_cacheable(self):
+        self.assertTrue(self.cache.cacheable("/a/1"))
+        self.assertFalse(self.cache.cacheable("/b/1"))
+        self.cache.deactivate()
+        self.assertFalse(self.cache.cacheable("/a/1"))
+        self.assertFalse(self.cache.put(("get", "/a/1"), b"1", self.cache.epoch))
+
+    def test_lru(self):
+        epoch = self.cache.epoch
+        self.assertTrue(self.cache.put(("get", "/a/1"), b"1", epoch))
+        self.assertTrue(self.cache.put(("get", "/a/2"), None, epoch))
+        self.assertIsNone(self.cache.get(("get", "/a/2")))
+        self.assertEqual(b"1", self.cache.get(("get", "/a/1")))
+
+        self.assertTrue(self.cache.put(("get", "/a/3"), b"3", epoch))
+        self.assertEqual(2, len(self.cache))
+        self.assertIs(CACHE_MISSING, self.cache.get(("get", "/a/2")))
+        self.assertEqual(b"1", self.cache.get(("get", "/a/1")))
+
+        self.assertEqual(3, self.registry.counter("mq.cache.hits").value)
+        self.assertEqual(1, self.registry.counter("mq.cache.misses").value)
+        self.assertEqual(1, self.registry.counter("mq.cache.evictions").value)
+
+    def test_invalidate(self):
+        epoch = self.cache.epoch
+        self.cache.put(("hget", "/a/1", "x"), b"x", epoch)
+        self.cache.put(("hgetall", "/a/1"), {b"x": b"x"}, epoch)
+        self.cache.invalidate([b"/a/1"])
+        self.assertEqual(0, len(self.cache))
+
+        # A reply requested before the invalidation may be older than it.
+        self.assertFalse(self.cache.put(("get", "/a/2"), b"2", epoch))
+        self.assertTrue(self.cache.put(("get", "/a/2"), b"2", self.cache.epoch))
+        self.cache.invalidate(None)
+        self.assertEqual(0, len(self.cache))
+        self.assertEqual(2, self.registry.counter("mq.cache.invalidations").value)
+
+
+if __name__ == "__main__":
+    main()
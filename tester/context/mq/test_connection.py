@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main, skipIf
+from unittest.mock import patch
+
+from redis.asyncio.cluster import RedisCluster
+
+from osom_api.context.mq import MqClient
+from osom_api.context.mq.connection import ClusterPubSub, parse_sentinel_url
+from osom_api.utils.path.mq import (
+    make_dead_letter_path,
+    make_done_path,
+    make_expire_marker_path,
+    make_request_path,
+    make_response_path,
+)
+
+
+class ConnectionTestCase(TestCase):
+    def test_parse_sentinel_url(self):
+        sentinels, options = parse_sentinel_url("redis://:pw@h1:26380,h2/2")
+        self.assertListEqual([("h1", 26380), ("h2", 26379)], sentinels)
+        self.assertDictEqual({"password": "pw", "db": 2}, options)
+
+    def test_sentinel_mode(self):
+        mq = MqClient("redis://h1,h2", mode="sentinel", sentinel_service="master")
+        self.assertEqual("master", mq.redis.connection_pool.service_name)
+        self.assertFalse(mq.sharded)
+
+    @skipIf(ClusterPubSub is None, "Sharded pub/sub requires redis-py 8.0")
+    def test_cluster_mode(self):
+        # RedisCluster does not connect until the first command.
+        mq = MqClient("redis://localhost:7000", mode="cluster")
+        self.assertIsInstance(mq.redis, RedisCluster)
+        self.assertTrue(mq.sharded)
+
+    def test_cluster_mode_without_sharded_pubsub(self):
+        with patch("osom_api.context.mq.connection.ClusterPubSub", None):
+            with self.assertRaises(RuntimeError):
+                MqClient("redis://localhost:7000", mode="cluster")
+
+    def test_hash_tag(self):
+        self.assertEqual("/osom/api/request/{worker}", make_request_path("worker"))
+        self.assertEqual("/osom/api/response/{uuid}", make_response_path(b"uuid"))
+
+        marker = make_expire_marker_path(make_request_path("worker"), "uuid")
+        self.assertEqual("/osom/api/request/{worker}/expire/uuid", marker)
+        dead = make_dead_letter_path(make_request_path("worker"))
+        self.assertEqual("/osom/api/request/{worker}/dead", dead)
+
+        done = make_done_path(make_request_path("worker"), b"uuid")
+        self.assertEqual("/osom/api/request/{worker}/done/uuid", done)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+from unittest import IsolatedAsyncioTestCase, main
+
+from osom_api.chrono.datetime import tznow
+from osom_api.context.mq.dead_letter import MqDeadLetterQueue
+from osom_api.context.mq.queue import MqListQueue
+from osom_api.msg import MsgDeadLetter, MsgRequest
+from osom_api.msg.enums.provider import MsgProvider
+from osom_api.utils.path.mq import make_dead_letter_path, make_lane_path
+from tester.context.mq import create_fake_mq_client
+
+
+class DeadLetterQueueTestCase(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.mq = create_fake_mq_client()
+        self.queue = MqListQueue(self.mq)
+        self.dead_letters = MqDeadLetterQueue(self.mq)
+
+    async def asyncTearDown(self):
+        await self.mq.redis.aclose()
+
+    async def test_redrive_attempts(self):
+        request = MsgRequest(MsgProvider.tester, deadline=tznow())
+        key = make_lane_path("/worker", request.priority)
+        letter = MsgDeadLetter.from_packet(key, request.encode(), "Error", 2)
+        await self.dead_letters.push("/worker", letter)
+        await self.dead_letters.push("/worker", MsgDeadLetter(key, "", "Error"))
+        self.assertEqual(2, await self.dead_letters.count("/worker"))
+
+        self.assertEqual(1, await self.dead_letters.redrive(self.queue, "/worker", 1))
+        self.assertEqual(1, await self.dead_letters.count("/worker"))
+
+        # The list queue delivers a packet only once,
+        # so the attempts of a re-driven request come from its dead letter.
+        packets = await self.queue.pop_batch("/worker", 2, 1)
+        self.assertEqual(1, len(packets))
+        self.assertEqual(1, packets[0].attempts)
+        redriven = MsgRequest.decode(packets[0].data)
+        self.assertEqual(request.msg_uuid, redriven.msg_uuid)
+        self.assertEqual(2, redriven.attempts)
+        self.assertIsNone(redriven.deadline)
+        self.assertIsNotNone(redriven.queued_at)
+
+    async def test_redrive_corrupt_entry(self):
+        request = MsgRequest(MsgProvider.tester)
+        key = make_lane_path("/worker", request.priority)
+        letter = MsgDeadLetter.from_packet(key, request.encode(), "Error")
+        await self.dead_letters.push("/worker", letter)
+        path = make_dead_letter_path("/worker")
+        await self.mq.lpush_trim_bytes(path, b"\x00corrupt", 0)
+
+        # The corrupt entry is left in the list, and the others are re-driven.
+        self.assertEqual(1, await self.dead_letters.redrive(self.queue, "/worker", 2))
+        self.assertListEqual([b"\x00corrupt"], await self.mq.lrange_bytes(path, 0, -1))
+        packets = await self.queue.pop_batch("/worker", 2, 1)
+        self.assertEqual(1, len(packets))
+
+
+if __name__ == "__main__":
+    main()
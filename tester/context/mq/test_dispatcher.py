@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+from asyncio import Event, sleep
+from unittest import IsolatedAsyncioTestCase, main
+
+from osom_api.context.mq.dispatcher import MqDispatcher
+from osom_api.metrics.registry import MetricsRegistry
+
+
+class DispatcherTestCase(IsolatedAsyncioTestCase):
+    async def test_ordered(self):
+        received = list()
+
+        async def _handler(channel: bytes, data: bytes) -> None:
+            await sleep(0.001 if channel == b"slow" else 0)
+            received.append((channel, data))
+
+        registry = MetricsRegistry()
+        dispatcher = MqDispatcher(_handler, concurrency=4, registry=registry)
+        dispatcher.start()
+        try:
+            for i in range(10):
+                self.assertTrue(dispatcher.dispatch(b"slow", str(i).encode()))
+                self.assertTrue(dispatcher.dispatch(b"fast", str(i).encode()))
+            while dispatcher.qsize() or len(received) < 20:
+                await sleep(0.01)
+        finally:
+            await dispatcher.stop()
+
+        slow = [d for c, d in received if c == b"slow"]
+        fast = [d for c, d in received if c == b"fast"]
+        self.assertEqual([str(i).encode() for i in range(10)], slow)
+        self.assertEqual([str(i).encode() for i in range(10)], fast)
+        self.assertEqual(20, registry.counter("mq.subscribe.dispatched").value)
+        self.assertEqual(0, registry.gauge("mq.subscribe.pending").value)
+
+    async def test_overflow(self):
+        blocker = Event()
+
+        async def _handler(channel: bytes, data: bytes) -> None:
+            await blocker.wait()
+
+        registry = MetricsRegistry()
+        dispatcher = MqDispatcher(
+            _handler,
+            concurrency=1,
+            queue_size=2,
+            ordered=False,
+            registry=registry,
+        )
+        dispatcher.start()
+        try:
+            self.assertTrue(dispatcher.dispatch(b"a", b"0"))
+            await sleep(0)  # The handler takes the first message.
+            self.assertTrue(dispatcher.dispatch(b"a", b"1"))
+            self.assertTrue(dispatcher.dispatch(b"a", b"2"))
+            self.assertFalse(dispatcher.dispatch(b"a", b"3"))
+        finally:
+            await dispatcher.stop()
+
+        self.assertEqual(1, registry.counter("mq.subscribe.overflow").value)
+        self.assertEqual(0, registry.gauge("mq.subscribe.pending").value)
+
+
+if __name__ == "__main__":
+    main()
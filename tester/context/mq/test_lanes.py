@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+from collections import Counter
+from unittest import TestCase, main
+
+from osom_api.context.mq.lanes import (
+    LaneSelector,
+    parse_command_priorities,
+    parse_priority_weights,
+)
+from osom_api.msg.enums.priority import MSG_PRIORITIES, MsgPriority
+from osom_api.utils.path.mq import make_lane_path
+
+
+class LanesTestCase(TestCase):
+    def test_lane_path(self):
+        path = "/osom/api/request/{worker}"
+        self.assertEqual(path, make_lane_path(path, MsgPriority.normal))
+        self.assertEqual(path + "/high", make_lane_path(path, MsgPriority.high))
+
+    def test_parse_priority_weights(self):
+        weights = parse_priority_weights("high=8, normal=4")
+        self.assertEqual(8, weights[MsgPriority.high])
+        self.assertEqual(4, weights[MsgPriority.normal])
+        self.assertEqual(1, weights[MsgPriority.low])
+        self.assertDictEqual(dict(), parse_priority_weights(None))
+        with self.assertRaises(ValueError):
+            parse_priority_weights("high=0")
+
+    def test_parse_command_priorities(self):
+        priorities = parse_command_priorities("chat=high, batch=low,")
+        self.assertDictEqual(
+            {"chat": MsgPriority.high, "batch": MsgPriority.low}, priorities
+        )
+        self.assertDictEqual(dict(), parse_command_priorities(None))
+        with self.assertRaises(ValueError):
+            parse_command_priorities("chat")
+        with self.assertRaises(ValueError):
+            parse_command_priorities("chat=urgent")
+
+    def test_strict(self):
+        selector = LaneSelector()
+        self.assertFalse(selector.weighted)
+        self.assertSequenceEqual(MSG_PRIORITIES, selector.order())
+
+    def test_weighted(self):
+        selector = LaneSelector(parse_priority_weights("high=4,normal=2,low=1"))
+        firsts = Counter(selector.order()[0] for _ in range(70))
+        self.assertEqual(40, firsts[MsgPriority.high])
+        self.assertEqual(20, firsts[MsgPriority.normal])
+        self.assertEqual(10, firsts[MsgPriority.low])
+
+        order = selector.order()
+        self.assertEqual(len(MSG_PRIORITIES), len(order))
+        self.assertSetEqual(set(MSG_PRIORITIES), set(order))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+from unittest import IsolatedAsyncioTestCase, TestCase, main
+
+from redis.exceptions import ConnectionError
+
+from osom_api.context.mq import MqClient
+from osom_api.context.mq.pool import MeasuredConnectionPool
+from osom_api.metrics.registry import MetricsRegistry
+
+
+class PoolTestCase(TestCase):
+    def test_separate_pools(self):
+        mq = MqClient(
+            "redis://localhost:6379",
+            max_command_connections=4,
+            max_blocking_connections=8,
+            max_pubsub_connections=1,
+        )
+
+        command_pool = mq.redis.connection_pool
+        blocking_pool = mq.blocking_redis.connection_pool
+        pubsub_pool = mq.pubsub_redis.connection_pool
+
+        self.assertIsInstance(command_pool, MeasuredConnectionPool)
+        self.assertIsInstance(blocking_pool, MeasuredConnectionPool)
+        self.assertIsInstance(pubsub_pool, MeasuredConnectionPool)
+
+        self.assertEqual("command", command_pool.pool_name)
+        self.assertEqual("blocking", blocking_pool.pool_name)
+        self.assertEqual("pubsub", pubsub_pool.pool_name)
+
+        self.assertEqual(4, command_pool.max_connections)
+        self.assertEqual(8, blocking_pool.max_connections)
+        self.assertEqual(1, pubsub_pool.max_connections)
+
+
+class _ConnectedPool(MeasuredConnectionPool):
+    async def ensure_connection(self, connection) -> None:
+        pass
+
+
+class PoolErrorTestCase(IsolatedAsyncioTestCase):
+    async def test_checkout_timeout(self):
+        registry = MetricsRegistry()
+        pool = _ConnectedPool(max_connections=1, timeout=0.01, registry=registry)
+        connection = await pool.get_connection()
+
+        with self.assertRaises(ConnectionError):
+            await pool.get_connection()
+        self.assertEqual(1, registry.counter("mq.pool.default.checkout_timeout").value)
+        self.assertEqual(0, registry.counter("mq.pool.default.connect_error").value)
+        self.assertEqual(1, registry.gauge("mq.pool.default.in_use").value)
+
+        await pool.release(connection)
+        self.assertEqual(0, registry.gauge("mq.pool.default.in_use").value)
+        await pool.disconnect()
+
+    async def test_connect_error(self):
+        registry = MetricsRegistry()
+        pool = MeasuredConnectionPool(
+            host="127.0.0.1",
+            port=1,
+            max_connections=1,
+            timeout=0.01,
+            registry=registry,
+        )
+
+        with self.assertRaises(ConnectionError):
+            await pool.get_connection()
+        self.assertEqual(0, registry.counter("mq.pool.default.checkout_timeout").value)
+        self.assertEqual(1, registry.counter("mq.pool.default.connect_error").value)
+        self.assertEqual(0, registry.gauge("mq.pool.default.in_use").value)
+        await pool.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+from asyncio import gather, wait_for
+from typing import Any, List
+from unittest import IsolatedAsyncioTestCase, main
+
+from osom_api.context.mq.publisher import MqPublisher, PublishItem
+from osom_api.metrics.registry import MetricsRegistry
+
+
+class PublisherTestCase(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.batches: List[List[PublishItem]] = list()
+
+        async def _flush(items: List[PublishItem]) -> List[Any]:
+            self.batches.append(items)
+            return [ValueError(k) if k == "error" else 1 for k, _ in items]
+
+        self.registry = MetricsRegistry()
+        self.flush = _flush
+
+    async def test_disabled(self):
+        publisher = MqPublisher(self.flush, registry=self.registry)
+        self.assertFalse(publisher.enabled)
+        await publisher.publish("a", b"0")
+        await publisher.publish("b", b"1")
+        self.assertEqual([[("a", b"0")], [("b", b"1")]], self.batches)
+
+    async def test_window(self):
+        publisher = MqPublisher(self.flush, window=0.01, registry=self.registry)
+        coros = [publisher.publish(str(i), str(i).encode()) for i in range(5)]
+        await wait_for(gather(*coros), 4.0)
+        self.assertEqual(1, len(self.batches))
+        self.assertEqual(5, len(self.batches[0]))
+        self.assertEqual(0, publisher.qsize())
+
+    async def test_batch_size(self):
+        publisher = MqPublisher(
+            self.flush,
+            window=60.0,
+            batch_size=2,
+            registry=self.registry,
+        )
+        coros = [publisher.publish(str(i), str(i).encode()) for i in range(4)]
+        await wait_for(gather(*coros), 4.0)
+        self.assertEqual([2, 2], [len(b) for b in self.batches])
+
+    async def test_flush(self):
+        publisher = MqPublisher(self.flush, window=60.0, registry=self.registry)
+        slow = publisher.publish("slow", b"0")
+        fast = publisher.publish("fast", b"1", flush=True)
+        await wait_for(gather(slow, fast), 4.0)
+        self.assertEqual([[("slow", b"0"), ("fast", b"1")]], self.batches)
+
+    async def test_error(self):
+        publisher = MqPublisher(self.flush, window=0.01, registry=self.registry)
+        results = await wait_for(
+            gather(
+                publisher.publish("ok", b"0"),
+                publisher.publish("error", b"1"),
+                return_exceptions=True,
+            ),
+            4.0,
+        )
+        self.assertIsNone(results[0])
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(1, len(self.batches))
+
+
+if __name__ == "__main__":
+    main()
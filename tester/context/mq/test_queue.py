@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+
+from asyncio import sleep
+from typing import List
+from unittest import IsolatedAsyncioTestCase, TestCase, main
+
+from osom_api.arguments import CMD_WORKER, get_default_arguments
+from osom_api.context.mq import MqClient
+from osom_api.context.mq.lanes import parse_command_priorities
+from osom_api.context.mq.queue import (
+    MqFairQueue,
+    MqFlow,
+    MqListQueue,
+    MqStreamQueue,
+    create_mq_queue,
+    parse_fair_weights,
+)
+from osom_api.exceptions import QueueFullError
+from osom_api.msg import MsgProvider, MsgRequest
+from osom_api.msg.enums.priority import MsgPriority
+from osom_api.utils.path.mq import make_expire_marker_path, make_lane_path
+from tester.context.mq import create_fake_mq_client
+
+
+class QueueTestCase(TestCase):
+    def test_create_list_queue(self):
+        args = get_default_arguments(["--no-dotenv", CMD_WORKER])
+        queue = create_mq_queue(MqClient(), args)
+        self.assertIsInstance(queue, MqListQueue)
+
+    def test_create_stream_queue(self):
+        cmdline = [
+            "--no-dotenv",
+            CMD_WORKER,
+            "--redis-queue-type",
+            "stream",
+            "--redis-stream-group",
+            "group",
+            "--redis-stream-consumer",
+            "consumer",
+        ]
+        args = get_default_arguments(cmdline)
+        queue = create_mq_queue(MqClient(), args)
+        self.assertIsInstance(queue, MqStreamQueue)
+        assert isinstance(queue, MqStreamQueue)
+        self.assertEqual("group", queue.group)
+        self.assertEqual("consumer", queue.consumer)
+
+    def test_create_fair_queue(self):
+        cmdline = [
+            "--no-dotenv",
+            CMD_WORKER,
+            "--redis-queue-type",
+            "fair",
+            "--redis-fair-weights",
+            "discord=2,telegram:100=3",
+        ]
+        args = get_default_arguments(cmdline)
+        queue = create_mq_queue(MqClient(), args)
+        self.assertIsInstance(queue, MqFairQueue)
+        assert isinstance(queue, MqFairQueue)
+        self.assertEqual({"discord": 2, "telegram:100": 3}, queue.weights)
+
+    def test_create_fair_queue_in_cluster(self):
+        cmdline = [
+            "--no-dotenv",
+            CMD_WORKER,
+            "--redis-queue-type",
+            "fair",
+            "--redis-mode",
+            "cluster",
+        ]
+        args = get_default_arguments(cmdline)
+        with self.assertRaises(ValueError):
+            create_mq_queue(MqClient(), args)
+
+    def test_parse_fair_weights(self):
+        self.assertEqual(dict(), parse_fair_weights(None))
+        self.assertEqual({"a": 1, "b:c": 4}, parse_fair_weights(" a=1, b:c=4 ,"))
+        with self.assertRaises(ValueError):
+            parse_fair_weights("a")
+        with self.assertRaises(ValueError):
+            parse_fair_weights("a=0")
+
+
+class EnqueueTestCase(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.mq = create_fake_mq_client()
+        self.queue = MqListQueue(self.mq)
+
+    async def asyncTearDown(self):
+        await self.mq.redis.aclose()
+
+    async def test_list_enqueue(self):
+        self.assertEqual(1, await self.queue.push("/worker", b"0", "0", expire=8.0))
+        self.assertEqual(2, await self.queue.push("/worker", b"1", "1", maxdepth=2))
+        with self.assertRaises(QueueFullError):
+            await self.queue.push("/worker", b"2", "2", maxdepth=2)
+
+        # The expiry applies to the marker of each request, not to the queue.
+        lane = make_lane_path("/worker", MsgPriority.normal)
+        self.assertEqual(-1, await self.mq.redis.ttl(lane))
+        marker_ttl = await self.mq.redis.pttl(make_expire_marker_path("/worker", "0"))
+        self.assertTrue(0 < marker_ttl <= 8000)
+        marker_ttl = await self.mq.redis.pttl(make_expire_marker_path("/worker", "1"))
+        self.assertEqual(-1, marker_ttl)
+        self.assertFalse(await self.mq.exists(make_expire_marker_path("/worker", "2")))
+
+        packets = await self.queue.pop_batch("/worker", 4, 1)
+        self.assertListEqual([b"0", b"1"], [p.data for p in packets])
+        self.assertTrue(
+            await self.queue.consume_packet_marker("/worker", packets[0], "0")
+        )
+        self.assertFalse(await self.queue.consume_marker("/worker", "0"))
+
+    async def test_priority_overtakes_backlog(self):
+        priorities = parse_command_priorities("chat=high")
+        for i in range(4):
+            request = MsgRequest(MsgProvider.tester, content=f"/echo {i}")
+            request.priority = priorities.get(request.command, request.priority)
+            await self.queue.push("/worker", request.encode(), request.msg_uuid)
+
+        request = MsgRequest(MsgProvider.tester, content="/chat hello")
+        request.priority = priorities.get(request.command, request.priority)
+        self.assertEqual(MsgPriority.high, request.priority)
+        data = request.encode()
+        await self.queue.push(
+            "/worker", data, request.msg_uuid, priority=MsgPriority.high
+        )
+
+        packets = await self.queue.pop_batch("/worker", 1, 1)
+        self.assertListEqual([data], [p.data for p in packets])
+        packets = await self.queue.pop_batch("/worker", 8, 1)
+        contents = [MsgRequest.decode(p.data).content for p in packets]
+        self.assertListEqual([f"/echo {i}" for i in range(4)], contents)
+
+    async def test_stream_enqueue(self):
+        queue = MqStreamQueue(self.mq, "group", "a")
+        self.assertEqual(1, await queue.push("/worker", b"0", "0", expire=8.0))
+        with self.assertRaises(QueueFullError):
+            await queue.push("/worker", b"1", "1", maxdepth=1)
+
+        marker_ttl = await self.mq.redis.pttl(make_expire_marker_path("/worker", "0"))
+        self.assertTrue(0 < marker_ttl <= 8000)
+        self.assertFalse(await self.mq.exists(make_expire_marker_path("/worker", "1")))
+
+
+class StreamQueueTestCase(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.mq = create_fake_mq_client()
+
+    async def asyncTearDown(self):
+        await self.mq.redis.aclose()
+
+    def create_queue(self, consumer: str, claim_idle=60.0) -> MqStreamQueue:
+        return MqStreamQueue(self.mq, "group", consumer, claim_idle=claim_idle)
+
+    async def test_push_pop_ack(self):
+        queue = self.create_queue("a")
+        self.assertEqual(1, await queue.push("/worker", b"0", "0"))
+        self.assertEqual(2, await queue.push("/worker", b"1", "1"))
+        high = MsgPriority.high
+        self.assertEqual(1, await queue.push("/worker", b"h", "h", priority=high))
+
+        packets = await queue.pop_batch("/worker", 2, 1)
+        self.assertListEqual([b"h", b"0"], [p.data for p in packets])
+        self.assertEqual(1, queue.buffered_count)
+        self.assertListEqual(
+            [b"1"], [p.data for p in await queue.pop_batch("/worker", 2, 1)]
+        )
+
+        lane = make_lane_path("/worker", MsgPriority.normal)
+        for packet in packets:
+            await queue.ack(packet)
+        # The acknowledged entries are deleted, and the last one is still pending.
+        self.assertEqual(1, await self.mq.redis.xlen(lane))
+        pending = await self.mq.redis.xpending(lane, "group")
+        self.assertEqual(1, pending["pending"])
+
+    async def test_reclaim_after_crash(self):
+        crashed = self.create_queue("a")
+        await crashed.push("/worker", b"data", "uuid", expire=60.0)
+
+        packet = await crashed.pop("/worker", timeout=1)
+        self.assertIsNotNone(packet)
+        assert packet is not None
+        self.assertEqual(1, packet.attempts)
+        self.assertTrue(await crashed.consume_packet_marker("/worker", packet, "uuid"))
+
+        # The consumer stopped without acknowledging the packet.
+        reclaimer = self.create_queue("b", claim_idle=0.0)
+        reclaimed = await reclaimer.pop("/worker", timeout=1)
+        self.assertIsNotNone(reclaimed)
+        assert reclaimed is not None
+        self.assertEqual(packet.entry_id, reclaimed.entry_id)
+        self.assertEqual(b"data", reclaimed.data)
+        self.assertEqual(2, reclaimed.attempts)
+
+        # The marker was consumed by the first delivery.
+        self.assertFalse(await reclaimer.consume_marker("/worker", "uuid"))
+        self.assertTrue(
+            await reclaimer.consume_packet_marker("/worker", reclaimed, "uuid")
+        )
+
+        await reclaimer.ack(reclaimed)
+        self.assertListEqual(list(), await reclaimer.pop_batch("/worker", 4, 1))
+
+    async def test_reclaim_batch(self):
+        crashed = self.create_queue("a")
+        for i in range(5):
+            await crashed.push("/worker", str(i).encode(), str(i))
+        self.assertEqual(5, len(await crashed.pop_batch("/worker", 8, 1)))
+
+        reclaimer = self.create_queue("b", claim_idle=0.0)
+        first = await reclaimer.pop_batch("/worker", 3, 1)
+        self.assertListEqual([b"0", b"1", b"2"], [p.data for p in first])
+
+        # A whole batch was reclaimed, so the rest follows without the interval.
+        second = await reclaimer.pop_batch("/worker", 3, 1)
+        self.assertListEqual([b"3", b"4"], [p.data for p in second])
+        self.assertTrue(all(p.attempts == 2 for p in first + second))
+
+    async def test_touch_buffered(self):
+        queue = self.create_queue("a")
+        high = MsgPriority.high
+        for i in range(2):
+            await queue.push("/worker", f"h{i}".encode(), f"h{i}", priority=high)
+            await queue.push("/worker", str(i).encode(), str(i))
+        packets = await queue.pop_batch("/worker", 2, 1)
+        self.assertListEqual([b"h0", b"h1"], [p.data for p in packets])
+        self.assertEqual(2, queue.buffered_count)
+        for packet in packets:
+            await queue.ack(packet)
+
+        lane = make_lane_path("/worker", MsgPriority.normal)
+        await sleep(0.2)
+        packets = await queue.pop_batch("/worker", 1, 1)
+        self.assertEqual([b"0"], [p.data for p in packets])
+
+        # The idle time is reset when the buffered entry is handed out.
+        pending = await self.mq.redis.xpending_range(lane, "group", "-", "+", 8)
+        idles = {p["message_id"]: p["time_since_delivered"] for p in pending}
+        counts = {p["message_id"]: p["times_delivered"] for p in pending}
+        entry_ids = [p["message_id"] for p in pending]
+        self.assertLess(idles[packets[0].entry_id], 200)
+        self.assertGreaterEqual(idles[entry_ids[1]], 200)
+        self.assertTrue(all(count == 1 for count in counts.values()))
+        await queue.ack(packets[0])
+
+        # The buffered entry reclaimed by another consumer is not run twice.
+        reclaimer = self.create_queue("b", claim_idle=0.1)
+        reclaimed = await reclaimer.pop_batch("/worker", 8, 1)
+        self.assertListEqual([b"1"], [p.data for p in reclaimed])
+        self.assertListEqual(list(), await queue.pop_batch("/worker", 1, 1))
+        self.assertEqual(0, queue.buffered_count)
+
+    def test_block_timeout(self):
+        queue = MqStreamQueue(MqClient(), "group", claim_idle=60.0)
+        self.assertEqual(60, queue.block_timeout(None))
+        self.assertEqual(60, queue.block_timeout(0))
+        self.assertEqual(60, queue.block_timeout(3600))
+        self.assertEqual(4, queue.block_timeout(4))
+
+        queue = MqStreamQueue(MqClient(), "group", claim_idle=60.0, claim_interval=0.1)
+        self.assertEqual(1, queue.block_timeout(None))
+
+
+class FairQueueTestCase(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.mq = create_fake_mq_client()
+
+    async def asyncTearDown(self):
+        await self.mq.redis.aclose()
+
+    async def push(self, queue: MqFairQueue, provider: str, channel: str, n: int):
+        for i in range(n):
+            data = f"{provider}:{channel}:{i}"
+            await queue.push(
+                "/worker", data.encode(), data, flow=MqFlow(provider, channel)
+            )
+
+    async def pop_all(self, queue: MqFairQueue) -> List[str]:
+        packets = await queue.pop_batch("/worker", 16, 1)
+        return [str(p.data, encoding="utf8") for p in packets]
+
+    async def test_round_robin(self):
+        queue = MqFairQueue(self.mq)
+        await self.push(queue, "a", "1", 3)
+        await self.push(queue, "a", "2", 1)
+        await self.push(queue, "b", "1", 2)
+
+        lane = make_lane_path("/worker", MsgPriority.normal)
+        self.assertEqual(6, await self.mq.llen(lane))
+
+        # Providers take turns, and so do the channels of each provider.
+        expected = ["a:1:0", "b:1:0", "a:2:0", "b:1:1", "a:1:1", "a:1:2"]
+        self.assertListEqual(expected, await self.pop_all(queue))
+        self.assertEqual(0, await self.mq.llen(lane))
+        self.assertListEqual(list(), await self.pop_all(queue))
+
+    async def test_weights(self):
+        queue = MqFairQueue(self.mq, {"a": 2, "b:2": 3})
+        await self.push(queue, "a", "1", 4)
+        await self.push(queue, "b", "1", 2)
+        await self.push(queue, "b", "2", 4)
+
+        expected = [
+            "a:1:0",
+            "a:1:1",
+            "b:1:0",
+            "a:1:2",
+            "a:1:3",
+            "b:2:0",
+            "b:2:1",
+            "b:2:2",
+            "b:1:1",
+            "b:2:3",
+        ]
+        self.assertListEqual(expected, await self.pop_all(queue))
+
+    async def test_blocking_pop(self):
+        queue = MqFairQueue(self.mq)
+        await self.push(queue, "a", "1", 1)
+        self.assertListEqual(["a:1:0"], await self.pop_all(queue))
+        self.assertListEqual(list(), await queue.pop_batch("/worker", 1, 1))
+
+        # The token taken by BRPOP is given back to the script.
+        lane = make_lane_path("/worker", MsgPriority.normal)
+        await self.push(queue, "a", "1", 2)
+        token = await self.mq.brpop_bytes(lane, 1)
+        self.assertIsNotNone(token)
+        items = await self.mq.fair_dequeue_bytes([lane], 1, refund=1)
+        self.assertEqual(1, len(items))
+        self.assertEqual(1, await self.mq.llen(lane))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+from unittest import IsolatedAsyncioTestCase, main
+
+from osom_api.context.mq.registry import MqWorkerRegistry
+from osom_api.msg import MsgWorker
+from tester.context.mq import create_fake_mq_client
+
+
+def _worker(instance: str) -> MsgWorker:
+    return MsgWorker("echo", "0.0.0", "doc", "/echo", list(), instance)
+
+
+class RegistryTestCase(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.mq = create_fake_mq_client()
+        self.registry = MqWorkerRegistry(self.mq)
+
+    async def asyncTearDown(self):
+        await self.mq.redis.aclose()
+
+    async def test_versions(self):
+        self.assertEqual(0, await self.registry.version())
+        self.assertEqual(1, await self.registry.register(_worker("1")))
+        self.assertEqual(2, await self.registry.register(_worker("2")))
+        self.assertEqual(3, await self.registry.register(_worker("1")))
+
+        snapshot = await self.registry.snapshot()
+        self.assertEqual(3, snapshot.version)
+        self.assertListEqual(["1", "2"], sorted(w.instance for w in snapshot.workers))
+
+        self.assertEqual(4, await self.registry.unregister("echo", "1"))
+        # Removing an unknown instance does not change the version.
+        self.assertEqual(4, await self.registry.unregister("echo", "1"))
+        self.assertEqual(4, await self.registry.version())
+
+        snapshot = await self.registry.snapshot()
+        self.assertListEqual(["2"], [w.instance for w in snapshot.workers])
+
+
+if __name__ == "__main__":
+    main()
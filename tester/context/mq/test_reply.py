@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+from unittest import IsolatedAsyncioTestCase, main
+
+from osom_api.utils.path.mq import make_reply_path
+from tester.context.mq import create_fake_mq_client
+
+
+class ReplyTestCase(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.mq = create_fake_mq_client()
+
+    async def asyncTearDown(self):
+        await self.mq.redis.aclose()
+
+    async def test_push_reply(self):
+        key = make_reply_path("endpoint")
+        self.assertEqual(1, await self.mq.push_reply_bytes(key, b"0", 60))
+        await self.mq.redis.expire(key, 10)
+
+        # Later replies do not extend the expiry of the list.
+        self.assertEqual(2, await self.mq.push_reply_bytes(key, b"1", 60))
+        self.assertTrue(0 < await self.mq.redis.ttl(key) <= 10)
+
+        # A drained list is deleted, and the next reply creates it again.
+        await self.mq.redis.delete(key)
+        self.assertEqual(1, await self.mq.push_reply_bytes(key, b"2", 60))
+        self.assertTrue(10 < await self.mq.redis.ttl(key) <= 60)
+
+
+if __name__ == "__main__":
+    main()
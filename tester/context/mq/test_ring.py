@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from osom_api.context.mq import MqClient
+from osom_api.context.mq.ring import HashRing, parse_shard_urls, shard_key
+from osom_api.utils.path.mq import (
+    make_done_path,
+    make_expire_marker_path,
+    make_request_path,
+)
+
+
+class RingTestCase(TestCase):
+    def test_parse_shard_urls(self):
+        urls = parse_shard_urls("redis://h1:6379/0, redis://h2:6379/0")
+        self.assertListEqual(["redis://h1:6379/0", "redis://h2:6379/0"], urls)
+        with self.assertRaises(ValueError):
+            parse_shard_urls(" , ")
+        with self.assertRaises(ValueError):
+            parse_shard_urls("redis://h1,redis://h1")
+
+    def test_shard_key(self):
+        self.assertEqual(b"worker", shard_key("/osom/api/request/{worker}/dead"))
+        self.assertEqual(b"/a/{}/b", shard_key("/a/{}/b"))
+        self.assertEqual(b"/a/b", shard_key(b"/a/b"))
+
+    def test_consistent(self):
+        keys = [f"key{i}" for i in range(1000)]
+        ring3 = HashRing(["a", "b", "c"])
+        ring4 = HashRing(["a", "b", "c", "d"])
+
+        counts = [0, 0, 0]
+        for key in keys:
+            counts[ring3.index(key)] += 1
+        self.assertTrue(all(count > 200 for count in counts))
+
+        # Only the keys taken by the new node move.
+        moved = [k for k in keys if ring3.index(k) != ring4.index(k)]
+        self.assertTrue(all(ring4.index(k) == 3 for k in moved))
+        self.assertLess(len(moved), 400)
+
+    def test_shards_mode(self):
+        mq = MqClient("redis://h1:6379,redis://h2:6379", mode="shards")
+        self.assertEqual(2, mq.shard_count)
+        self.assertFalse(mq.sharded)
+
+        request_path = make_request_path("worker")
+        index = mq.shard_index(request_path)
+        marker = make_expire_marker_path(request_path, "uuid")
+        self.assertEqual(index, mq.shard_index(marker))
+        self.assertEqual(index, mq.shard_index(make_done_path(request_path, "uuid")))
+
+        indexes = {mq.shard_index(make_request_path(f"w{i}")) for i in range(32)}
+        self.assertSetEqual({0, 1}, indexes)
+        with self.assertRaises(ValueError):
+            keys = [make_request_path(f"w{i}") for i in range(32)]
+            mq.command_redis(*keys)
+
+
+if __name__ == "__main__":
+    main()
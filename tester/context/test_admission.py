@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+from math import inf
+from unittest import TestCase, main
+
+from osom_api.context.admission import (
+    AdmissionController,
+    DrainRateEstimator,
+    QueueLimit,
+    parse_queue_limits,
+)
+from osom_api.metrics.registry import MetricsRegistry
+
+
+class AdmissionTestCase(TestCase):
+    def test_parse_queue_limits(self):
+        limits = parse_queue_limits("echo=100:2.5, gpt=20,image=:10")
+        self.assertEqual(QueueLimit(100, 2.5), limits["echo"])
+        self.assertEqual(QueueLimit(20, 0.0), limits["gpt"])
+        self.assertEqual(QueueLimit(0, 10.0), limits["image"])
+        self.assertDictEqual(dict(), parse_queue_limits(None))
+        with self.assertRaises(ValueError):
+            parse_queue_limits("echo")
+
+    def test_drain_rate(self):
+        estimator = DrainRateEstimator(alpha=1.0)
+        estimator.observe(10, now=0.0)
+        estimator.observe(7, now=1.0)  # 4 requests were drained in 1 second
+        self.assertEqual(4.0, estimator.rate)
+        self.assertEqual(5.0, estimator.estimate_depth(now=1.5))
+        self.assertEqual(1.25, estimator.estimate_wait(now=1.5))
+
+    def test_check(self):
+        registry = MetricsRegistry()
+        controller = AdmissionController(max_wait=1.0, registry=registry)
+        controller.register("/w", "w")
+        self.assertIsNone(controller.check("/w", now=0.0))
+
+        controller.admit("/w", 10, now=0.0)
+        controller.admit("/w", 10, now=0.5)  # 1 request was drained in 0.5 seconds
+        self.assertIsNotNone(controller.check("/w", "/w", now=0.6))
+
+        # The estimate is no longer trusted, so the worker is probed again.
+        self.assertIsNone(controller.check("/w", "/w", now=2.0))
+        self.assertEqual(2, registry.counter("endpoint.admission.admitted").value)
+
+    def test_stalled_worker(self):
+        registry = MetricsRegistry()
+        controller = AdmissionController(max_wait=1.0, registry=registry)
+        controller.register("/w", "w")
+        for i in range(10):
+            controller.admit("/w", 100 + i, now=i * 0.1)
+
+        estimator = controller.estimator("/w")
+        self.assertEqual(0.0, estimator.rate)
+        self.assertEqual(inf, estimator.estimate_wait(now=1.0))
+        self.assertIsNotNone(controller.check("/w", "/w", now=1.0))
+
+        # The wait is unknown until a drain rate has been observed.
+        estimator = DrainRateEstimator()
+        estimator.observe(100, now=0.0)
+        self.assertIsNone(estimator.estimate_wait(now=0.5))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+import os
+from asyncio import Event, StreamReader, gather, sleep, wait_for
+from tempfile import TemporaryDirectory
+from unittest import IsolatedAsyncioTestCase, main
+
+from osom_api.context.direct import (
+    DirectClient,
+    DirectServer,
+    FrameKind,
+    encode_frame_header,
+    read_frame,
+)
+from osom_api.exceptions import TransportError
+from osom_api.msg import MsgProvider, MsgRequest, MsgResponse
+
+
+class DirectTestCase(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.temp = TemporaryDirectory()
+        self.address = "unix:" + os.path.join(self.temp.name, "worker.sock")
+
+    async def asyncTearDown(self):
+        self.temp.cleanup()
+
+    async def test_frame(self):
+        reader = StreamReader()
+        reader.feed_data(encode_frame_header(FrameKind.inline, 5) + b"hello")
+        reader.feed_data(encode_frame_header(FrameKind.attach, 0))
+        reader.feed_eof()
+        self.assertEqual((FrameKind.inline, b"hello"), await read_frame(reader))
+        self.assertEqual((FrameKind.attach, b""), await read_frame(reader))
+
+        reader = StreamReader()
+        reader.feed_data(encode_frame_header(FrameKind.inline, 5) + b"hello")
+        with self.assertRaises(TransportError):
+            await read_frame(reader, max_size=4)
+
+    async def test_multiplexing(self):
+        release = Event()
+
+        async def _handler(request: MsgRequest) -> MsgResponse:
+            if request.content == "slow":
+                await release.wait()
+            return MsgResponse(request.msg_uuid, request.content)
+
+        server = DirectServer(self.address, _handler, concurrency=2)
+        await server.open()
+        client = DirectClient(self.address)
+        try:
+            slow = MsgRequest(MsgProvider.tester, content="slow")
+            fast = MsgRequest(MsgProvider.tester, content="fast")
+            slow_task = client.request(slow, timeout=4.0)
+
+            async def _fast():
+                response = await client.request(fast, timeout=4.0)
+                # The fast response overtakes the slow one on the same connection.
+                self.assertEqual(1, server.active_count)
+                release.set()
+                return response
+
+            results = await wait_for(gather(slow_task, _fast()), 8.0)
+            self.assertEqual(slow.msg_uuid, results[0].msg_uuid)
+            self.assertEqual("slow", results[0].content)
+            self.assertEqual(fast.msg_uuid, results[1].msg_uuid)
+            self.assertEqual("fast", results[1].content)
+            self.assertTrue(client.connected)
+            self.assertEqual(0, client.pending_count)
+        finally:
+            await client.close()
+            await server.close()
+
+        self.assertFalse(os.path.exists(self.address[len("unix:") :]))
+
+    async def test_ring(self):
+        async def _handler(request: MsgRequest) -> MsgResponse:
+            assert request.content is not None
+            return MsgResponse(request.msg_uuid, request.content[::-1])
+
+        ring_size = 1024 * 1024
+        server = DirectServer(self.address, _handler, ring_size=ring_size)
+        await server.open()
+        client = DirectClient(self.address, ring_size=ring_size)
+        try:
+            # Random contents are not compressed below the threshold of the ring.
+            # The last one is larger than the ring, so it goes through the socket.
+            for size in (16, 256 * 1024, 384 * 1024, 512 * 1024, 2 * ring_size):
+                content = os.urandom(size // 2).hex()
+                request = MsgRequest(MsgProvider.tester, content=content)
+                response = await wait_for(client.request(request), 8.0)
+                self.assertEqual(content[::-1], response.content)
+            self.assertTrue(client.shared)
+        finally:
+            await client.close()
+            await server.close()
+
+    async def test_concurrency(self):
+        release = Event()
+
+        async def _handler(request: MsgRequest) -> MsgResponse:
+            await release.wait()
+            return MsgResponse(request.msg_uuid, request.content)
+
+        server = DirectServer(self.address, _handler, concurrency=1)
+        await server.open()
+        client = DirectClient(self.address)
+        try:
+            requests = [
+                MsgRequest(MsgProvider.tester, content=str(i)) for i in range(3)
+            ]
+            tasks = [client.request(request, timeout=4.0) for request in requests]
+
+            async def _release():
+                while not server.active_count:
+                    await sleep(0.01)
+                await sleep(0.1)
+                # The other requests wait for the slot of the running one.
+                self.assertEqual(1, server.active_count)
+                release.set()
+
+            results = await wait_for(gather(*tasks, _release()), 8.0)
+            self.assertListEqual(["0", "1", "2"], [r.content for r in results[:3]])
+            self.assertEqual(0, server.active_count)
+        finally:
+            await client.close()
+            await server.close()
+
+    async def test_connection_lost(self):
+        async def _handler(request: MsgRequest) -> MsgResponse:
+            await Event().wait()
+            assert False, "Inaccessible section"
+
+        server = DirectServer(self.address, _handler)
+        await server.open()
+        client = DirectClient(self.address)
+        try:
+            request = MsgRequest(MsgProvider.tester, content="hang")
+            task = client.request(request, timeout=4.0)
+
+            async def _close():
+                while not server.active_count:
+                    await sleep(0.01)
+                await server.close()
+
+            with self.assertRaises(TransportError):
+                await wait_for(gather(task, _close()), 8.0)
+        finally:
+            await client.close()
+            await server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+from asyncio import create_task, gather, sleep, wait_for
+from typing import List
+from unittest import IsolatedAsyncioTestCase, main
+
+from osom_api.arguments import CMD_DISCORD, CMD_TELEGRAM, get_default_arguments
+from osom_api.context.endpoint import EndpointContext
+from osom_api.exceptions import ResponseTimeoutError
+from osom_api.msg import MsgHeartbeat, MsgProvider, MsgRequest, MsgResponse, MsgWorker
+from osom_api.msg.enums.priority import MsgPriority
+from osom_api.worker.descs import CmdDesc
+from tester.context import FAKE_REDIS_URL, patch_fake_context
+
+
+def _worker(instance: str, heartbeat_interval: float = 0.0) -> MsgWorker:
+    cmds = [CmdDesc("echo", "Echo the content", list())]
+    return MsgWorker(
+        "echo",
+        "0.0.0",
+        "doc",
+        "/echo",
+        cmds,
+        instance,
+        heartbeat_interval=heartbeat_interval,
+    )
+
+
+def _telegram_cmdline(*options: str) -> List[str]:
+    return [
+        "--no-dotenv",
+        CMD_TELEGRAM,
+        "--redis-url",
+        FAKE_REDIS_URL,
+        "--telegram-token",
+        "123456:ABCDEF",
+        *options,
+    ]
+
+
+class EndpointTestCase(IsolatedAsyncioTestCase):
+    def create_telegram_context(self, *options: str) -> EndpointContext:
+        from osom_api.apps.telegram.context import TelegramContext
+
+        with patch_fake_context():
+            args = get_default_arguments(_telegram_cmdline(*options))
+            return TelegramContext(args)
+
+    async def _assert_worker_routing(self, context: EndpointContext) -> None:
+        context.register_worker(_worker("1"))
+        self.assertTrue(context._worker_router.heartbeat(MsgHeartbeat("echo", "1")))
+        command = await context.find_command("echo")
+        self.assertIsNotNone(command)
+        assert command is not None
+        self.assertEqual("/echo", command.request_path)
+        self.assertIn("echo", context.help)
+
+        context.unregister_worker("echo", "1")
+        self.assertIsNone(await context.find_command("echo"))
+
+    async def test_telegram(self):
+        context = self.create_telegram_context()
+        await self._assert_worker_routing(context)
+
+    async def test_discord(self):
+        from osom_api.apps.discord.context import DiscordContext
+
+        cmdline = [
+            "--no-dotenv",
+            CMD_DISCORD,
+            "--redis-url",
+            FAKE_REDIS_URL,
+            "--discord-application-id",
+            "1",
+            "--discord-token",
+            "token",
+        ]
+        with patch_fake_context():
+            context = DiscordContext(get_default_arguments(cmdline))
+        await self._assert_worker_routing(context)
+
+    async def test_load_worker_registry(self):
+        context = self.create_telegram_context()
+        await context._registry.register(_worker("1", heartbeat_interval=10.0))
+        await context._registry.register(_worker("2"))
+
+        # The instance without heartbeats is pruned instead of being routed to.
+        self.assertTrue(await context.load_worker_registry())
+        self.assertIsNotNone(await context.find_command("echo"))
+        snapshot = await context._registry.snapshot()
+        self.assertListEqual(["1"], [w.instance for w in snapshot.workers])
+
+        await context._registry.unregister("echo", "1")
+        context.unregister_worker("echo", "1")
+        self.assertFalse(await context.load_worker_registry())
+        self.assertIsNone(await context.find_command("echo"))
+        await context.mq.redis.aclose()
+
+    async def test_priorities(self):
+        context = self.create_telegram_context("--endpoint-priorities", "chat=high")
+        chat = MsgRequest(MsgProvider.tester, content="/chat hello")
+        echo = MsgRequest(MsgProvider.tester, content="/echo hello")
+        context.prioritize(chat)
+        context.prioritize(echo)
+        self.assertEqual(MsgPriority.high, chat.priority)
+        self.assertEqual(MsgPriority.normal, echo.priority)
+
+
+class EndpointWorkerTestCase(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        from osom_api.apps.telegram.context import TelegramContext
+
+        options = ["--endpoint-request-timeout", "4.0"]
+        with patch_fake_context():
+            args = get_default_arguments(_telegram_cmdline(*options))
+            self.context = TelegramContext(args)
+        self.context.register_worker(_worker("1"))
+
+        self.reply_task = create_task(self.context._reply_main())
+
+    async def asyncTearDown(self):
+        self.reply_task.cancel()
+        await gather(self.reply_task, return_exceptions=True)
+        await self.context.mq.redis.aclose()
+
+    async def pop_request(self) -> MsgRequest:
+        packets = await self.context.queue.pop_batch("/echo", 1, 1)
+        self.assertEqual(1, len(packets))
+        return MsgRequest.decode(packets[0].data)
+
+    async def test_on_cmd_worker(self):
+        request = MsgRequest(MsgProvider.tester, content="/echo hello")
+        task = create_task(self.context.do_message(request))
+
+        queued = await wait_for(self.pop_request(), 4.0)
+        self.assertEqual(request.msg_uuid, queued.msg_uuid)
+        self.assertEqual(self.context.reply_path, queued.reply_path)
+        self.assertIsNotNone(queued.deadline)
+        self.assertIn(request.msg_uuid, self.context._replies)
+
+        response = MsgResponse(queued.msg_uuid, "world")
+        path = queued.get_response_path()
+        await self.context.mq.push_reply_bytes(path, response.encode(), 60)
+
+        result = await wait_for(task, 4.0)
+        assert result is not None
+        self.assertEqual("world", result.content)
+        self.assertDictEqual(dict(), self.context._replies)
+        self.assertDictEqual(dict(), self.context._pending)
+
+    async def test_reply_to_the_waiting_request(self):
+        request0 = MsgRequest(MsgProvider.tester, content="/echo 0")
+        request1 = MsgRequest(MsgProvider.tester, content="/echo 1")
+        task0 = create_task(self.context.do_message(request0))
+        task1 = create_task(self.context.do_message(request1))
+        await wait_for(self.pop_request(), 4.0)
+        await wait_for(self.pop_request(), 4.0)
+
+        # Replies share the list of the endpoint and are matched by the UUID.
+        path = self.context.reply_path
+        for request in (request1, request0):
+            content = request.content
+            response = MsgResponse(request.msg_uuid, content)
+            await self.context.mq.push_reply_bytes(path, response.encode(), 60)
+
+        result0 = await wait_for(task0, 4.0)
+        result1 = await wait_for(task1, 4.0)
+        assert result0 is not None and result1 is not None
+        self.assertEqual("/echo 0", result0.content)
+        self.assertEqual("/echo 1", result1.content)
+
+    async def test_timeout(self):
+        self.context._request_timeout = 0.2
+        request = MsgRequest(MsgProvider.tester, content="/echo hello")
+        command = await self.context.find_command("echo")
+        assert command is not None
+
+        with self.assertRaises(ResponseTimeoutError):
+            await wait_for(command(request), 4.0)
+
+        # The marker is consumed, so the worker drops the queued request.
+        queue = self.context.queue
+        self.assertFalse(await queue.consume_marker("/echo", request.msg_uuid))
+        self.assertDictEqual(dict(), self.context._replies)
+        self.assertDictEqual(dict(), self.context._pending)
+
+    async def test_cancel_message(self):
+        request = MsgRequest(
+            MsgProvider.tester,
+            message_id=2,
+            channel_id=1,
+            content="/echo hello",
+        )
+        task = create_task(self.context.do_message(request))
+        while request.msg_uuid not in self.context._pending:
+            await sleep(0.01)
+
+        self.assertTrue(await self.context.cancel_message(1, 2))
+        result = await wait_for(task, 4.0)
+        assert result is not None
+        self.assertTrue(result.cancelled)
+        self.assertFalse(await self.context.cancel_message(1, 2))
+
+
+if __name__ == "__main__":
+    main()
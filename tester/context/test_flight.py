@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+from asyncio import Event, create_task, gather, sleep, wait_for
+from asyncio.exceptions import CancelledError
+from typing import Optional
+from unittest import IsolatedAsyncioTestCase, TestCase, main
+
+from osom_api.context.flight import SingleFlight, flight_digest
+from osom_api.exceptions import MsgError, ResponseTimeoutError
+from osom_api.msg import MsgFile, MsgProvider, MsgRequest, MsgResponse
+from osom_api.utils.path.mq import make_flight_path, make_flight_result_path
+from tester.context.mq import create_fake_mq_client
+
+
+class FlightTestCase(TestCase):
+    def test_digest(self):
+        req0 = MsgRequest(MsgProvider.discord, content="/gpt,b=1,a=2 hello")
+        req1 = MsgRequest(MsgProvider.telegram, content="/gpt,a=2,b=1 hello")
+        req2 = MsgRequest(MsgProvider.discord, content="/gpt,a=2,b=1 world")
+        req3 = MsgRequest(MsgProvider.discord, content="/gpt,a=3,b=1 hello")
+        self.assertEqual(flight_digest(req0), flight_digest(req1))
+        self.assertNotEqual(flight_digest(req0), flight_digest(req2))
+        self.assertNotEqual(flight_digest(req0), flight_digest(req3))
+
+    def test_coalescible(self):
+        self.assertTrue(
+            SingleFlight.coalescible(MsgRequest(MsgProvider.tester, content="/gpt"))
+        )
+        self.assertFalse(
+            SingleFlight.coalescible(MsgRequest(MsgProvider.tester, content="gpt"))
+        )
+        file = MsgFile(MsgProvider.tester, native_id="0", name="image.png")
+        request = MsgRequest(MsgProvider.tester, content="/gpt", files=[file])
+        self.assertFalse(SingleFlight.coalescible(request))
+
+
+class FlightRunTestCase(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.mq = create_fake_mq_client()
+        self.leader = SingleFlight(self.mq, 4.0)
+        self.follower = SingleFlight(self.mq, 4.0)
+        self.request0 = MsgRequest(MsgProvider.tester, content="/gpt hello")
+        self.request1 = MsgRequest(MsgProvider.tester, content="/gpt hello")
+        self.path = make_flight_path(flight_digest(self.request0))
+        self.release = Event()
+
+    async def asyncTearDown(self):
+        await self.mq.redis.aclose()
+
+    async def _lead(self, response: Optional[MsgResponse]) -> Optional[MsgResponse]:
+        await self.release.wait()
+        if response is None:
+            raise MsgError(self.request0.msg_uuid, "Leader failed")
+        return response
+
+    async def _follow(self, callback) -> Optional[MsgResponse]:
+        """
+        Wait until the follower is waiting for the leader,
+        then deliver the publication of the leader as the subscription would.
+        """
+
+        task = create_task(self.follower.run(self.request1, callback))
+        while not self.follower.waiting_count:
+            await sleep(0.01)
+        self.release.set()
+        await gather(self.leading, return_exceptions=True)
+
+        result_path = make_flight_result_path(self.path)
+        data = await self.mq.get_optional_bytes(result_path)
+        assert data is not None
+        self.follower.on_done(data)
+        return await wait_for(task, 4.0)
+
+    async def _unexpected(self) -> Optional[MsgResponse]:
+        assert False, "Inaccessible section"
+
+    async def test_leader_succeeds(self):
+        response = MsgResponse(self.request0.msg_uuid, "world")
+        coro = self.leader.run(self.request0, lambda: self._lead(response))
+        self.leading = create_task(coro)
+        while not await self.mq.exists(self.path):
+            await sleep(0.01)
+
+        result = await self._follow(self._unexpected)
+        assert result is not None
+        self.assertEqual(self.request1.msg_uuid, result.msg_uuid)
+        self.assertEqual("world", result.content)
+        self.assertIs(response, self.leading.result())
+        self.assertFalse(await self.mq.exists(self.path))
+
+    async def test_leader_fails(self):
+        coro = self.leader.run(self.request0, lambda: self._lead(None))
+        self.leading = create_task(coro)
+        while not await self.mq.exists(self.path):
+            await sleep(0.01)
+
+        result = await self._follow(self._unexpected)
+        assert result is not None
+        self.assertEqual(self.request1.msg_uuid, result.msg_uuid)
+        self.assertEqual("Leader failed", result.error)
+        self.assertFalse(result.cancelled)
+        self.assertIsInstance(self.leading.exception(), MsgError)
+
+    async def test_leader_cancelled(self):
+        coro = self.leader.run(self.request0, lambda: self._lead(None))
+        self.leading = create_task(coro)
+        while not await self.mq.exists(self.path):
+            await sleep(0.01)
+
+        async def _run_alone() -> MsgResponse:
+            return MsgResponse(self.request1.msg_uuid, "alone")
+
+        task = create_task(self.follower.run(self.request1, _run_alone))
+        while not self.follower.waiting_count:
+            await sleep(0.01)
+        self.leading.cancel()
+        with self.assertRaises(CancelledError):
+            await self.leading
+
+        result_path = make_flight_result_path(self.path)
+        data = await self.mq.get_optional_bytes(result_path)
+        assert data is not None
+        self.assertTrue(MsgResponse.decode(data).cancelled)
+        self.follower.on_done(data)
+
+        # The follower does not take over the cancellation and becomes the leader.
+        result = await wait_for(task, 4.0)
+        assert result is not None
+        self.assertEqual("alone", result.content)
+        self.assertFalse(result.cancelled)
+
+    async def test_follower_timeout(self):
+        follower = SingleFlight(self.mq, 0.1)
+        await self.mq.acquire_lock(self.path, self.request0.msg_uuid, 4.0)
+        with self.assertRaises(ResponseTimeoutError):
+            await follower.run(self.request1, self._unexpected)
+        self.assertEqual(0, follower.waiting_count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from osom_api.context.routing import WorkerRouter
+from osom_api.msg import MsgHeartbeat, MsgWorker
+from osom_api.worker.descs import CmdDesc
+
+
+def _worker(name: str, instance: str, *keys: str, interval=1.0) -> MsgWorker:
+    cmds = [CmdDesc(key, key, list()) for key in keys]
+    return MsgWorker(
+        name,
+        "0.0.0",
+        "doc",
+        f"/{name}",
+        cmds,
+        instance,
+        heartbeat_interval=interval,
+    )
+
+
+class RoutingTestCase(TestCase):
+    def test_refcount(self):
+        router = WorkerRouter(timeout=0)
+        self.assertTrue(router.register(_worker("a", "1", "echo"), now=0.0))
+        self.assertFalse(router.register(_worker("a", "2", "echo"), now=0.0))
+        self.assertEqual(2, router.get("a").refcount)
+
+        self.assertFalse(router.unregister("a", "1"))
+        self.assertEqual("a", router.route("echo").name)
+        self.assertTrue(router.unregister("a", "2"))
+        self.assertIsNone(router.route("echo"))
+
+    def test_least_loaded(self):
+        router = WorkerRouter(timeout=0)
+        router.register(_worker("a", "1", "echo"), now=0.0)
+        router.register(_worker("b", "1", "echo", "only_b"), now=0.0)
+        self.assertEqual("a", router.route("echo").name)
+
+        router.heartbeat(MsgHeartbeat("a", "1", inflight=2, concurrency=4), now=1.0)
+        router.heartbeat(MsgHeartbeat("b", "1", inflight=1, concurrency=4), now=1.0)
+        self.assertEqual("b", router.route("echo").name)
+        self.assertEqual("b", router.route("only_b").name)
+
+        # Both are saturated, so the shorter lag wins.
+        router.heartbeat(MsgHeartbeat("a", "1", 4, 4, lag=0.5), now=2.0)
+        router.heartbeat(MsgHeartbeat("b", "1", 4, 4, lag=3.0), now=2.0)
+        self.assertEqual("a", router.route("echo").name)
+
+        self.assertFalse(router.heartbeat(MsgHeartbeat("c", "1"), now=2.0))
+
+    def test_expire(self):
+        router = WorkerRouter(timeout=5.0)
+        router.register(_worker("a", "1", "echo"), now=0.0)
+        router.register(_worker("a", "2", "echo"), now=0.0)
+        router.heartbeat(MsgHeartbeat("a", "2"), now=4.0)
+
+        removed = router.expire(now=6.0)
+        self.assertListEqual([("a", "1")], [(p.name, i) for p, i in removed])
+        self.assertEqual(1, router.get("a").refcount)
+
+        removed = router.expire(now=10.0)
+        self.assertListEqual([("a", "2")], [(p.name, i) for p, i in removed])
+        self.assertEqual(0, removed[0][0].refcount)
+        self.assertIsNone(router.route("echo"))
+
+    def test_expire_without_heartbeats(self):
+        router = WorkerRouter(timeout=5.0)
+        router.register(_worker("a", "1", "echo", interval=0.0), now=0.0)
+        self.assertListEqual([], router.expire(now=60.0))
+        self.assertEqual("a", router.route("echo").name)
+        self.assertTrue(router.unregister("a", "1"))
+
+
+if __name__ == "__main__":
+    main()
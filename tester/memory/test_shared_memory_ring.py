@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from osom_api.memory.shared_memory_ring import RingSlot, SharedMemoryRing
+
+
+class SharedMemoryRingTestCase(TestCase):
+    def setUp(self):
+        self.producer = SharedMemoryRing.create(16)
+        self.consumer = SharedMemoryRing.attach(self.producer.name)
+
+    def tearDown(self):
+        self.consumer.close()
+        self.producer.close()
+
+    def test_default(self):
+        self.assertTrue(self.producer.owner)
+        self.assertFalse(self.consumer.owner)
+        self.assertEqual(16, self.consumer.capacity)
+
+        slot0 = self.producer.write(b"aaaaa")
+        slot1 = self.producer.write(b"bbbbbb")
+        self.assertEqual(RingSlot(0, 5), slot0)
+        self.assertEqual(RingSlot(5, 6), slot1)
+        self.assertEqual(11, self.consumer.used)
+
+        # There is no room until the consumer releases the records.
+        self.assertIsNone(self.producer.write(b"cccccc"))
+
+        assert slot0 is not None and slot1 is not None
+        self.assertEqual(b"aaaaa", self.consumer.read(slot0))
+        self.assertEqual(b"bbbbbb", self.consumer.read(slot1))
+        self.assertEqual(0, self.producer.used)
+
+        # The record does not fit before the end, so it starts over at the front.
+        slot2 = self.producer.write(b"cccccc")
+        self.assertEqual(RingSlot(16, 6), slot2)
+        assert slot2 is not None
+        self.assertEqual(b"cccccc", self.consumer.read(slot2))
+
+    def test_invalid(self):
+        self.assertIsNone(self.producer.write(b""))
+        self.assertIsNone(self.producer.write(bytes(17)))
+
+        slot = self.producer.write(b"aaaa")
+        assert slot is not None
+        self.assertEqual(b"aaaa", self.consumer.read(slot))
+        with self.assertRaises(ValueError):
+            self.consumer.read(slot)
+        with self.assertRaises(ValueError):
+            self.consumer.read(RingSlot(4, 4))
+
+
+if __name__ == "__main__":
+    main()
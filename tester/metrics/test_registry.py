@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from osom_api.metrics.registry import MetricsRegistry
+
+
+class RegistryTestCase(TestCase):
+    def test_default(self):
+        registry = MetricsRegistry()
+        registry.counter("a").inc()
+        registry.counter("a").inc(2)
+        registry.gauge("b").set(10)
+        registry.gauge("b").dec(3)
+        registry.summary("c").observe(1.0)
+        registry.summary("c").observe(3.0)
+
+        self.assertEqual(3, len(registry))
+        self.assertIn("a", registry)
+        self.assertEqual(3, registry.counter("a").value)
+        self.assertEqual(7, registry.gauge("b").value)
+        self.assertEqual(2, registry.summary("c").count)
+        self.assertEqual(2.0, registry.summary("c").mean)
+        self.assertEqual(3.0, registry.summary("c").max)
+
+        result = registry.as_dict()
+        self.assertEqual(["a", "b", "c"], list(result.keys()))
+        self.assertEqual(4.0, result["c"]["total"])
+
+    def test_type_mismatch(self):
+        registry = MetricsRegistry()
+        registry.counter("a")
+        with self.assertRaises(TypeError):
+            registry.gauge("a")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from osom_api.msg.dead_letter import MsgDeadLetter
+
+
+class DeadLetterTestCase(TestCase):
+    def test_encode_decode(self):
+        msg0 = MsgDeadLetter.from_packet(
+            "/osom/api/request/{worker}",
+            b"\x00\xffpacket",
+            "PacketLoadError: Packet decoding fail",
+            attempts=2,
+            msg_uuid="uuid",
+        )
+        data = msg0.encode()
+        msg1 = MsgDeadLetter.decode(data)
+
+        self.assertEqual(msg1.key, msg0.key)
+        self.assertEqual(msg1.data, b"\x00\xffpacket")
+        self.assertEqual(msg1.error, msg0.error)
+        self.assertEqual(msg1.attempts, msg0.attempts)
+        self.assertEqual(msg1.msg_uuid, msg0.msg_uuid)
+        self.assertEqual(msg1.failed_at, msg0.failed_at)
+
+
+if __name__ == "__main__":
+    main()
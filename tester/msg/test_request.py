@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 
+from datetime import timedelta
 from unittest import TestCase, main
 
+from osom_api.chrono.datetime import tznow
+from osom_api.msg.enums.priority import MsgPriority
 from osom_api.msg.enums.provider import MsgProvider
 from osom_api.msg.request import MsgRequest
 
@@ -11,6 +14,10 @@ class RequestTestCase(TestCase):
         msg0 = MsgRequest(
             MsgProvider.tester,
             content="/chat,model=gpt-4o,n=1 your_message",
+            reply_path="/osom/api/reply/endpoint",
+            priority=MsgPriority.high,
+            deadline=tznow(),
+            attempts=2,
         )
         data = msg0.encode()
         msg1 = MsgRequest.decode(data)
@@ -24,8 +31,44 @@ class RequestTestCase(TestCase):
         self.assertEqual(msg1.files, msg0.files)
         self.assertEqual(msg1.created_at, msg0.created_at)
         self.assertEqual(msg1.msg_uuid, msg0.msg_uuid)
+        self.assertEqual(msg1.reply_path, msg0.reply_path)
+        self.assertEqual(msg1.priority, msg0.priority)
+        self.assertEqual(msg1.deadline, msg0.deadline)
+        self.assertEqual(msg1.attempts, msg0.attempts)
         self.assertEqual(msg1._msg_cmd, msg0._msg_cmd)
 
+    def test_deadline(self):
+        msg = MsgRequest(MsgProvider.tester)
+        self.assertIsNone(msg.deadline)
+        self.assertIsNone(msg.remaining())
+        self.assertFalse(msg.expired())
+
+        now = tznow()
+        msg.set_timeout(10, now)
+        self.assertEqual(now + timedelta(seconds=10), msg.deadline)
+        self.assertEqual(4.0, msg.remaining(now + timedelta(seconds=6)))
+        self.assertFalse(msg.expired(now + timedelta(seconds=6)))
+        self.assertTrue(msg.expired(now + timedelta(seconds=10)))
+
+        data = MsgRequest.decode(MsgRequest(MsgProvider.tester).encode())
+        self.assertIsNone(data.deadline)
+
+    def test_waited(self):
+        msg = MsgRequest(MsgProvider.tester)
+        self.assertIsNone(msg.waited())
+
+        now = tznow()
+        msg.queued_at = now
+        self.assertEqual(1.5, msg.waited(now + timedelta(seconds=1.5)))
+        self.assertEqual(0.0, msg.waited(now - timedelta(seconds=1)))
+        self.assertEqual(now, MsgRequest.decode(msg.encode()).queued_at)
+
+    def test_response_path(self):
+        msg = MsgRequest(MsgProvider.tester, msg_uuid="uuid")
+        self.assertEqual("/osom/api/response/{uuid}", msg.get_response_path())
+        msg.reply_path = "/osom/api/reply/endpoint"
+        self.assertEqual("/osom/api/reply/endpoint", msg.get_response_path())
+
 
 if __name__ == "__main__":
     main()
@@ -16,6 +16,29 @@ class ResponseTestCase(TestCase):
         self.assertEqual(msg1.error, msg0.error)
         self.assertEqual(msg1.files, msg0.files)
         self.assertEqual(msg1.created_at, msg0.created_at)
+        self.assertEqual(msg1.busy, msg0.busy)
+        self.assertEqual(msg1.cancelled, msg0.cancelled)
+
+    def test_busy(self):
+        msg0 = MsgResponse.from_busy("unknown_uuid", "Queue is full")
+        msg1 = MsgResponse.decode(msg0.encode())
+        self.assertTrue(msg1.busy)
+        self.assertTrue(msg1.has_error)
+
+    def test_with_msg_uuid(self):
+        msg0 = MsgResponse.from_busy("uuid0", "Queue is full")
+        msg1 = msg0.with_msg_uuid("uuid1")
+        self.assertEqual("uuid1", msg1.msg_uuid)
+        self.assertEqual(msg0.error, msg1.error)
+        self.assertEqual(msg0.created_at, msg1.created_at)
+        self.assertTrue(msg1.busy)
+
+    def test_cancelled(self):
+        msg0 = MsgResponse.from_cancelled("unknown_uuid", "Message was deleted")
+        msg1 = MsgResponse.decode(msg0.encode())
+        self.assertTrue(msg1.cancelled)
+        self.assertFalse(msg1.busy)
+        self.assertTrue(msg1.has_error)
 
 
 if __name__ == "__main__":
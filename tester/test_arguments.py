@@ -4,7 +4,7 @@ from pathlib import Path
 from tempfile import TemporaryDirectory
 from unittest import TestCase, main
 
-from osom_api.arguments import CMD_MASTER, get_default_arguments
+from osom_api.arguments import CMD_MASTER, CMD_WORKER, get_default_arguments
 
 
 class ArgumentsTestCase(TestCase):
@@ -23,6 +23,13 @@ class ArgumentsTestCase(TestCase):
             self.assertEqual(args.verbose, 20)
             self.assertTrue(args.D)
 
+    def test_worker_arguments(self):
+        cmdline = ["--no-dotenv", CMD_WORKER, "--worker-concurrency", "16"]
+        args = get_default_arguments(cmdline)
+        self.assertEqual(args.cmd, CMD_WORKER)
+        self.assertEqual(args.worker_concurrency, 16)
+        self.assertIsInstance(args.worker_shutdown_timeout, float)
+
 
 if __name__ == "__main__":
     main()
@@ -7,6 +7,7 @@ from osom_api.paths import (
     MQ_REGISTER_PATH,
     MQ_REGISTER_WORKER_PATH,
     MQ_REGISTER_WORKER_REQUEST_PATH,
+    MQ_REPLY_PATH,
     MQ_REQUEST_PATH,
     MQ_RESPONSE_PATH,
     MQ_ROOT_PATH,
@@ -23,6 +24,7 @@ class PathsTestCase(TestCase):
     def test_mq_msg_paths(self):
         self.assertEqual(MQ_REQUEST_PATH, join_path(MQ_ROOT_PATH, "request"))
         self.assertEqual(MQ_RESPONSE_PATH, join_path(MQ_ROOT_PATH, "response"))
+        self.assertEqual(MQ_REPLY_PATH, join_path(MQ_ROOT_PATH, "reply"))
 
     def test_mq_broadcast_paths(self):
         self.assertEqual(MQ_BROADCAST_PATH, join_path(MQ_ROOT_PATH, "broadcast"))
@@ -8,6 +8,7 @@ from osom_api.worker.command import WorkerCommand
 from osom_api.worker.metas import ParamMeta
 from osom_api.worker.params import (
     BodyParam,
+    BudgetParam,
     CreatedAtParam,
     FileParam,
     FilesParam,
@@ -33,6 +34,7 @@ class CommandTestCase(IsolatedAsyncioTestCase):
         n6: CreatedAtParam,
         n7: MsgUUIDParam,
         n8: Annotated[MsgUUIDParam, "UnsupportedAnnotated"],
+        n9: BudgetParam,
         p0,
         p1: Annotated[bool, ParamMeta(name="PP1")],
         p2: Annotated[str, ParamMeta(doc="Doc2", default="Default2")],
@@ -43,7 +45,7 @@ class CommandTestCase(IsolatedAsyncioTestCase):
         p7=None,
     ) -> str:
         """TestDescription"""
-        self.msg_params = [n0, n1, n2, n3, n4, n5, n6, n7, n8]
+        self.msg_params = [n0, n1, n2, n3, n4, n5, n6, n7, n8, n9]
         return f"{p0},{p1},{p2},{p3},{p4},{p5},{p6},{p7}"
 
     def test_default(self):
@@ -60,7 +62,7 @@ class CommandTestCase(IsolatedAsyncioTestCase):
         self.assertIsInstance(res, MsgResponse)
         self.assertEqual(res.content, "kk,True,Default2,0,4,5,6,None")
 
-        self.assertEqual(len(self.msg_params), 9)
+        self.assertEqual(len(self.msg_params), 10)
         self.assertIsInstance(self.msg_params[0], MsgRequest)
         self.assertEqual(self.msg_params[1], "[content]")
         self.assertIsNone(self.msg_params[2], None)
@@ -70,6 +72,14 @@ class CommandTestCase(IsolatedAsyncioTestCase):
         self.assertEqual(self.msg_params[6], req.created_at)
         self.assertEqual(self.msg_params[7], req.msg_uuid)
         self.assertEqual(self.msg_params[8], req.msg_uuid)
+        self.assertIsNone(self.msg_params[9])
+
+    async def test_budget(self):
+        req = MsgRequest(provider=MsgProvider.tester, content="/test_callback")
+        req.set_timeout(10)
+        await self.cmd(req)
+        self.assertIsInstance(self.msg_params[9], BudgetParam)
+        self.assertTrue(0 < self.msg_params[9] <= 10)
 
     def test_params(self):
         self.assertEqual(len(self.cmd.params), 8)
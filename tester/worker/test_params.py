@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from unittest import TestCase, main
 
 from osom_api.worker.params import (
     BodyParam,
+    BudgetParam,
     ContentParam,
     CreatedAtParam,
     FileParam,
@@ -30,6 +31,7 @@ class ParamsTestCase(TestCase):
         self.assertIsInstance(NicknameParam(), Param)
         self.assertIsInstance(CreatedAtParam.now(), Param)
         self.assertIsInstance(MsgUUIDParam(), Param)
+        self.assertIsInstance(BudgetParam(), Param)
 
         self.assertIsInstance(BodyParam(), str)
         self.assertIsInstance(ContentParam(), str)
@@ -38,6 +40,12 @@ class ParamsTestCase(TestCase):
         self.assertIsInstance(NicknameParam(), str)
         self.assertIsInstance(CreatedAtParam.now(), datetime)
         self.assertIsInstance(MsgUUIDParam(), str)
+        self.assertIsInstance(BudgetParam(), float)
+
+    def test_budget_from_deadline(self):
+        now = datetime.now()
+        budget = BudgetParam.from_deadline(now + timedelta(seconds=3), now)
+        self.assertEqual(3.0, budget)
 
 
 if __name__ == "__main__":